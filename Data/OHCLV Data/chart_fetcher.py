@@ -0,0 +1,253 @@
+"""
+Async Yahoo chart fetcher for the OHLCV loaders (RUBIKVIEW_OHLCV_FETCHER=chart).
+
+One asyncio event loop drives every request over a shared httpx connection
+pool instead of a fixed pool of fetch threads:
+  - a token bucket caps the request rate (RUBIKVIEW_FETCH_RATE requests per
+    second, bursts of RUBIKVIEW_FETCH_BURST; 0 = uncapped)
+  - an AIMD limiter sets how many requests are in flight: it grows by about
+    one per round of clean responses and halves on 429 / 5xx, transport
+    errors or latency above RUBIKVIEW_FETCH_LATENCY_TARGET seconds
+  - throttled and failed requests are retried with jittered exponential
+    backoff, honouring Retry-After
+
+The fetcher only depends on the v8 chart JSON contract served at
+RUBIKVIEW_YAHOO_CHART_URL, so a local stub server can stand in for Yahoo.
+"""
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+import httpx
+import pandas as pd
+
+CHART_URL = os.getenv("RUBIKVIEW_YAHOO_CHART_URL", "https://query2.finance.yahoo.com/v8/finance/chart")
+FETCH_RATE = float(os.getenv("RUBIKVIEW_FETCH_RATE", "20"))
+FETCH_BURST = int(os.getenv("RUBIKVIEW_FETCH_BURST", "20"))
+LATENCY_TARGET = float(os.getenv("RUBIKVIEW_FETCH_LATENCY_TARGET", "2.0"))
+INITIAL_CONCURRENCY = 4
+MAX_CONCURRENCY = int(os.getenv("RUBIKVIEW_FETCH_MAX_CONCURRENCY", "64"))
+RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+TIMEOUT = 30.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+
+# ===== FLOW CONTROL =====
+
+class TokenBucket:
+    """Request-rate cap shared by all coroutines of one fetch."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AimdLimiter:
+    """In-flight request limit: additive increase on success, multiplicative decrease on pressure.
+
+    Used as ``async with limiter:`` around each request. Cuts are spaced at
+    least ``LATENCY_TARGET`` apart so one burst of 429s halves the limit once.
+    """
+
+    def __init__(self, initial=INITIAL_CONCURRENCY, maximum=MAX_CONCURRENCY):
+        self.maximum = max(1, maximum)
+        self.limit = float(min(max(1, initial), self.maximum))
+        self.in_flight = 0
+        self.peak = self.limit
+        self._last_cut = 0.0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self, latency):
+        if latency > LATENCY_TARGET:
+            self.on_pressure()
+            return
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        self.peak = max(self.peak, self.limit)
+
+    def on_pressure(self):
+        now = time.monotonic()
+        if now - self._last_cut < LATENCY_TARGET:
+            return
+        self._last_cut = now
+        self.limit = max(1.0, self.limit / 2)
+
+
+def _backoff(attempt, retry_after=None):
+    """Seconds to wait before retry ``attempt`` (0-based): Retry-After, else full jitter."""
+    if retry_after:
+        try:
+            return min(BACKOFF_MAX, float(retry_after))
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+# ===== CHART RESPONSES =====
+
+def _epoch(day):
+    return int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp())
+
+
+def parse_chart(payload):
+    """History frame shaped like yfinance's (``Date`` index, exchange-local dates); None without bars."""
+    chart = payload.get("chart") or {}
+    results = chart.get("result") or []
+    if chart.get("error") or not results:
+        return None
+    result = results[0]
+    stamps = result.get("timestamp") or []
+    if not stamps:
+        return None
+    n = len(stamps)
+    offset = (result.get("meta") or {}).get("gmtoffset") or 0
+    indicators = result.get("indicators") or {}
+    quote_ = (indicators.get("quote") or [{}])[0]
+    adjclose = (indicators.get("adjclose") or [{}])[0].get("adjclose")
+
+    def local_dates(values):
+        return pd.to_datetime(pd.Series(values, dtype="int64") + offset, unit="s").dt.normalize()
+
+    dates = pd.DatetimeIndex(local_dates(stamps), name="Date")
+    df = pd.DataFrame({
+        "Open": quote_.get("open") or [None] * n,
+        "High": quote_.get("high") or [None] * n,
+        "Low": quote_.get("low") or [None] * n,
+        "Close": quote_.get("close") or [None] * n,
+        "Adj Close": adjclose or quote_.get("close") or [None] * n,
+        "Volume": quote_.get("volume") or [None] * n,
+    }, index=dates, dtype=float)
+    events = result.get("events") or {}
+    dividends = pd.Series(0.0, index=dates)
+    splits = pd.Series(0.0, index=dates)
+    for event in (events.get("dividends") or {}).values():
+        day = local_dates([event["date"]]).iloc[0]
+        if day in dividends.index:
+            dividends[day] = float(event.get("amount") or 0.0)
+    for event in (events.get("splits") or {}).values():
+        day = local_dates([event["date"]]).iloc[0]
+        if day in splits.index and event.get("denominator"):
+            splits[day] = float(event["numerator"]) / float(event["denominator"])
+    df["Dividends"] = dividends
+    df["Stock Splits"] = splits
+    # The live bar can be repeated at the end of the series; drop empty bars as well
+    df = df[~df.index.duplicated(keep="last")]
+    return df.dropna(subset=["Open", "High", "Low", "Close"], how="all")
+
+
+# ===== FETCH =====
+
+async def _fetch_one(client, bucket, limiter, symbol, start, end):
+    url = f"{CHART_URL.rstrip('/')}/{quote(symbol)}"
+    params = {
+        "period1": _epoch(start),
+        "period2": _epoch(end),
+        "interval": "1d",
+        "events": "div,splits",
+        "includeAdjustedClose": "true",
+    }
+    error = None
+    for attempt in range(RETRIES + 1):
+        retry_after = None
+        await bucket.acquire()
+        async with limiter:
+            began = time.monotonic()
+            try:
+                resp = await client.get(url, params=params)
+            except httpx.TransportError as e:
+                limiter.on_pressure()
+                error = e
+            else:
+                latency = time.monotonic() - began
+                if resp.status_code == 404:
+                    # Unknown or delisted symbol
+                    limiter.on_success(latency)
+                    return None
+                if resp.status_code in RETRY_STATUS:
+                    limiter.on_pressure()
+                    retry_after = resp.headers.get("Retry-After")
+                    error = RuntimeError(f"HTTP {resp.status_code} for {symbol}")
+                else:
+                    resp.raise_for_status()
+                    limiter.on_success(latency)
+                    return parse_chart(resp.json())
+        if attempt < RETRIES:
+            await asyncio.sleep(_backoff(attempt, retry_after))
+    raise error
+
+
+async def _fetch_all(jobs, on_result):
+    bucket = TokenBucket(FETCH_RATE, FETCH_BURST)
+    limiter = AimdLimiter()
+    limits = httpx.Limits(max_connections=MAX_CONCURRENCY, max_keepalive_connections=MAX_CONCURRENCY)
+    async with httpx.AsyncClient(headers=HEADERS, timeout=TIMEOUT, limits=limits, follow_redirects=True) as client:
+
+        async def run(symbol, start, end):
+            try:
+                frame = await _fetch_one(client, bucket, limiter, symbol, start, end)
+            except Exception as e:
+                on_result(symbol, None, e)
+                return
+            on_result(symbol, frame, None)
+
+        await asyncio.gather(*(run(*job) for job in jobs))
+    return limiter
+
+
+def fetch_all(jobs, on_result):
+    """Fetch every ``(symbol, start, end)`` in ``jobs`` (``end`` exclusive).
+
+    ``on_result(symbol, frame, error)`` is called on this thread as each
+    symbol finishes; ``frame`` is None for symbols without bars. Blocking in
+    the callback (e.g. on a full writer queue) pauses the whole fetch, which
+    is the back-pressure. Returns the limiter, for its final ``limit`` and
+    ``peak``.
+    """
+    return asyncio.run(_fetch_all(jobs, on_result))
+
+
+def fetch_chart(symbols, start, end):
+    """Fetcher interface of the loaders: ``{symbol: frame}`` for symbols sharing one date range."""
+    frames, errors = {}, []
+
+    def keep(symbol, frame, error):
+        if error is not None:
+            errors.append(error)
+        elif frame is not None and not frame.empty:
+            frames[symbol] = frame
+
+    fetch_all([(symbol, start, end) for symbol in symbols], keep)
+    if errors and not frames:
+        raise errors[0]
+    return frames
@@ -0,0 +1,722 @@
+"""
+Shared ingestion core of the OHLCV loaders (update_stocks_ohlcv.py,
+update_Index_ohlcv.py).
+
+Both loaders run the same pipeline against their own database and
+dataset (``storage.DATASETS``: ``ohlcv`` -> yahoo_ohlcv in stocks.duckdb,
+``index_ohlcv`` -> index_ohlcv in index.duckdb):
+  - plan from ``ohlcv_watermarks`` (one row per symbol, kept next to the
+    data so each batch and its watermarks commit together)
+  - fetch with the fetcher picked by RUBIKVIEW_OHLCV_FETCHER
+  - merge through one writer thread with a set-based upsert keyed on
+    (symbol, date), or new Parquet files with RUBIKVIEW_STORAGE_BACKEND=parquet
+
+Needs Engine/ on sys.path (for ``storage``), as the loaders set up.
+"""
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import yfinance as yf
+
+import chart_fetcher
+import storage
+
+# Fetched rows merged per write batch (one transaction / one set of Parquet files)
+WRITE_BATCH_ROWS = 50_000
+# Fetch outcomes per write batch when few rows are fetched (e.g. up-to-date runs)
+WATERMARK_BATCH = 500
+# Symbols whose fetch came back empty are re-checked after 1, 2, 4, ... days, up to this
+RECHECK_MAX_DAYS = 64
+
+# Fetcher (see FETCHERS):
+#   chart    - async requests to the Yahoo chart API (chart_fetcher.py); replaces
+#              the thread pool with rate-limited, adaptive concurrency (default)
+#   ticker   - one yf.Ticker(...).history request per symbol
+#   download - multi-ticker yf.download requests for symbols sharing a date range
+#   fixture  - local CSVs in RUBIKVIEW_OHLCV_FIXTURE_DIR, for offline benchmarks
+FETCH_MODE = os.getenv("RUBIKVIEW_OHLCV_FETCHER", "chart").strip().lower()
+# Symbols per multi-ticker request: starting size and bounds of the adaptive size
+DOWNLOAD_BATCH = int(os.getenv("RUBIKVIEW_DOWNLOAD_BATCH", "50"))
+DOWNLOAD_BATCH_MAX = 200
+DOWNLOAD_BATCH_STEP = 10
+# Share of failed / empty symbols in a request above which the size is halved
+DOWNLOAD_MAX_ERROR_RATE = 0.2
+FIXTURE_DIR = os.getenv("RUBIKVIEW_OHLCV_FIXTURE_DIR")
+# Simulated round-trip per fixture request, in seconds
+FIXTURE_LATENCY = float(os.getenv("RUBIKVIEW_FIXTURE_LATENCY", "0"))
+
+
+# ===== FRAMES AND TABLES =====
+def normalize(col: str) -> str:
+    return col.strip().lower().replace(" ", "_").replace("-", "_")
+
+def table_name(dataset):
+    return storage.DATASETS[dataset][0]
+
+def get_table_columns(conn, table):
+    rows = conn.execute(f"PRAGMA table_info('{table}')").fetchall()
+    return [r[1] for r in rows]
+
+def init_db(db_path, dataset):
+    with duckdb.connect(str(db_path)) as conn:
+        conn.execute(f"""
+          CREATE TABLE IF NOT EXISTS {table_name(dataset)} (
+            symbol VARCHAR,
+            date   DATE
+          );
+        """)
+
+def prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalised column names and naive, midnight ``date`` values."""
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    df = df.rename(columns=normalize)
+    dates = pd.to_datetime(df['date'])
+    if dates.dt.tz is not None:
+        # Keep the exchange's calendar date rather than the session time zone's
+        dates = dates.dt.tz_localize(None)
+    df['date'] = dates.dt.normalize()
+    return df
+
+def upsert_dynamic(conn, table, df: pd.DataFrame):
+    """Merge fetched bars into ``table`` with set-based statements keyed on (symbol, date).
+
+    The frame is staged once; stored bars whose values differ are deleted
+    and every staged bar not (or no longer) in the table is inserted. Run it
+    inside the caller's transaction. Returns the number of rows written.
+    """
+    df = prepare_frame(df)
+    existing = get_table_columns(conn, table)
+    # Ensure all columns in df are present in table, add if not
+    for col in df.columns:
+        if col not in existing:
+            if col in ('symbol', 'date'):
+                continue
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {col} DOUBLE;')
+            existing.append(col)
+    for col in existing:
+        if col not in df.columns:
+            df[col] = None
+    values = [c for c in existing if c not in ('symbol', 'date')]
+    changed = " OR ".join(f't."{c}" IS DISTINCT FROM n."{c}"' for c in values) or "false"
+    conn.register("new_data", df[existing])
+    try:
+        conn.execute("""
+            CREATE OR REPLACE TEMP TABLE staged_ohlcv AS
+            SELECT * REPLACE (CAST(date AS DATE) AS date) FROM new_data
+            QUALIFY row_number() OVER (PARTITION BY symbol, CAST(date AS DATE)) = 1
+        """)
+        conn.execute(f"""
+            DELETE FROM {table} t USING staged_ohlcv n
+            WHERE t.symbol = n.symbol AND t.date = n.date AND ({changed})
+        """)
+        written = conn.execute(f"""
+            INSERT INTO {table}
+            SELECT n.* FROM staged_ohlcv n
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {table} t WHERE t.symbol = n.symbol AND t.date = n.date
+            )
+        """).fetchone()[0]
+        conn.execute("DROP TABLE staged_ohlcv")
+    finally:
+        conn.unregister("new_data")
+    return written
+
+# ===== WATERMARKS =====
+# ohlcv_watermarks (in the loader's own .duckdb file for both backends)
+# keeps one row per symbol: stored date range, row count and the outcome of
+# its latest fetch. The writer updates it in the same transaction as each
+# batch, the loaders read it once to plan their fetches, and the backend's
+# OHLCV status reads it instead of scanning the data. ``empty_streak`` /
+# ``next_check`` back off symbols that keep returning no data (suspended
+# or delisted).
+def init_watermarks(conn, db_path, dataset):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ohlcv_watermarks (
+            symbol VARCHAR PRIMARY KEY,
+            first_date DATE,
+            last_date DATE,
+            row_count BIGINT,
+            last_fetch_at TIMESTAMP,
+            status VARCHAR
+        )
+    """)
+    conn.execute("ALTER TABLE ohlcv_watermarks ADD COLUMN IF NOT EXISTS empty_streak INTEGER DEFAULT 0")
+    conn.execute("ALTER TABLE ohlcv_watermarks ADD COLUMN IF NOT EXISTS next_check DATE")
+    if conn.execute("SELECT count(*) FROM ohlcv_watermarks").fetchone()[0]:
+        return
+    # First run with watermarks: seed them from whatever is already stored
+    table = table_name(dataset)
+    columns = "ohlcv_watermarks (symbol, first_date, last_date, row_count)"
+    summary = f"SELECT symbol, MIN(date), MAX(date), COUNT(*) FROM {table} GROUP BY symbol"
+    if storage.use_parquet():
+        with storage.connect(db_path, dataset) as src:
+            seed = src.execute(summary).fetchall()
+        if seed:
+            conn.executemany(f"INSERT INTO {columns} VALUES (?, ?, ?, ?)", seed)
+    elif table in conn.execute("SHOW TABLES").fetchdf()['name'].tolist():
+        conn.execute(f"INSERT INTO {columns} {summary}")
+
+def load_watermarks(db_path, dataset):
+    """Plan a run: ({symbol: last stored date}, {symbol: next re-check}), read once."""
+    with duckdb.connect(str(db_path)) as conn:
+        init_watermarks(conn, db_path, dataset)
+        rows = conn.execute("SELECT symbol, last_date, next_check FROM ohlcv_watermarks").fetchall()
+    last_dates = {sym: last for sym, last, _ in rows if last is not None}
+    next_checks = {sym: check for sym, _, check in rows if check is not None}
+    return last_dates, next_checks
+
+def update_watermarks(conn, table, batch, marks):
+    """Record a batch's fetch outcomes and refresh the touched symbols' ranges."""
+    conn.register("marks", pd.DataFrame(marks, columns=['symbol', 'status']))
+    if batch is None:
+        # Typed, so the symbol comparisons below still bind on outcome-only batches
+        batch = pd.DataFrame({'symbol': pd.Series(dtype=object), 'date': pd.Series(dtype='datetime64[ns]')})
+    conn.register("new_data", batch)
+    if storage.use_parquet():
+        # Append-only files: extend the stored range and count by the new rows
+        stats = "SELECT symbol, MIN(date) AS first_date, MAX(date) AS last_date, COUNT(*) AS row_count FROM new_data GROUP BY symbol"
+        row_count = "coalesce(ohlcv_watermarks.row_count, 0) + coalesce(excluded.row_count, 0)"
+    else:
+        # Upserts may replace rows: recount the touched symbols exactly
+        stats = f"""
+            SELECT symbol, MIN(date) AS first_date, MAX(date) AS last_date, COUNT(*) AS row_count
+            FROM {table} WHERE symbol IN (SELECT DISTINCT symbol FROM new_data) GROUP BY symbol
+        """
+        row_count = "coalesce(excluded.row_count, ohlcv_watermarks.row_count)"
+    # An empty fetch doubles the wait before the next one; data resets it.
+    # Other outcomes (up-to-date, deferred, failed) leave the backoff alone.
+    try:
+        conn.execute(f"""
+            INSERT INTO ohlcv_watermarks
+                (symbol, first_date, last_date, row_count, last_fetch_at, status, empty_streak, next_check)
+            SELECT m.symbol, CAST(s.first_date AS DATE), CAST(s.last_date AS DATE), s.row_count, $now, m.status,
+                   CASE WHEN m.status = 'skipped' THEN 1 ELSE 0 END,
+                   CASE WHEN m.status = 'skipped' THEN CAST($today AS DATE) + 1 END
+            FROM marks m LEFT JOIN ({stats}) s USING (symbol)
+            ON CONFLICT (symbol) DO UPDATE SET
+                first_date = least(ohlcv_watermarks.first_date, excluded.first_date),
+                last_date = greatest(ohlcv_watermarks.last_date, excluded.last_date),
+                row_count = {row_count},
+                last_fetch_at = excluded.last_fetch_at,
+                status = excluded.status,
+                empty_streak = CASE excluded.status
+                    WHEN 'skipped' THEN coalesce(ohlcv_watermarks.empty_streak, 0) + 1
+                    WHEN 'success' THEN 0
+                    ELSE ohlcv_watermarks.empty_streak END,
+                next_check = CASE excluded.status
+                    WHEN 'skipped' THEN CAST($today AS DATE)
+                        + CAST(least($max_days, pow(2, coalesce(ohlcv_watermarks.empty_streak, 0))) AS INTEGER)
+                    WHEN 'success' THEN NULL
+                    ELSE ohlcv_watermarks.next_check END
+        """, {"now": datetime.utcnow(), "today": date.today(), "max_days": RECHECK_MAX_DAYS})
+    finally:
+        conn.unregister("marks")
+        conn.unregister("new_data")
+
+# ===== CORPORATE ACTIONS =====
+# Yahoo returns every bar already adjusted for the splits that follow it,
+# so a split makes all stored history stale. Fetched frames are stored raw
+# instead (``unadjust_splits``), the dividends / splits they report go to
+# ``corporate_actions`` and ``adjustment_factors`` holds, per symbol, one
+# row per span between two ex-dates with the cumulative price and volume
+# factors for bars in it. A new action only recomputes that symbol's
+# factors (``refresh_factors``, in the writer's transaction), and the
+# adjusted series is a join of raw bars and factors (``storage.ADJUSTED_VIEWS``),
+# which every price reader queries. With Parquet the factors table is also
+# written out as one file (``storage.write_factors``) after each change;
+# readers may see a batch's new bars a moment before its new factors.
+#
+# Bars stored before this existed keep Yahoo's adjustment: the actions
+# seeded from them are marked ``prices_adjusted`` and their splits are not
+# applied again.
+
+def _bars_source(dataset):
+    """SQL relation with the dataset's stored bars, for the writer's connection."""
+    return storage.parquet_source(dataset) if storage.use_parquet() else table_name(dataset)
+
+def unadjust_splits(df: pd.DataFrame) -> pd.DataFrame:
+    """Undo the split adjustment of one symbol's fetched frame (prepared, sorted by date).
+
+    Each bar is scaled by the ratios of the splits reported after it in the
+    same frame; dividends are per-share amounts and are scaled like prices.
+    ``adj_close`` only loses its split part, so it stays the raw close
+    adjusted for the dividends known at fetch time.
+    """
+    if 'stock_splits' not in df.columns:
+        return df
+    ratios = df['stock_splits'].where(df['stock_splits'] > 0, 1.0).astype(float)
+    # Product of the ratios strictly after each bar
+    later = ratios[::-1].cumprod()[::-1] / ratios
+    if (later == 1).all():
+        return df
+    df = df.copy()
+    for col in ('open', 'high', 'low', 'close', 'adj_close', 'dividends'):
+        if col in df.columns:
+            df[col] = df[col] * later
+    if 'volume' in df.columns:
+        df['volume'] = df['volume'] / later
+    return df
+
+def create_adjusted_view(con, dataset):
+    """(Re)create the dataset's adjusted view in its DuckDB file; returns its name.
+
+    Returns None while the table lacks price columns (created by
+    ``init_db`` but not yet written).
+    """
+    table = table_name(dataset)
+    if not set(storage.ADJUSTED_COLUMNS) <= set(get_table_columns(con, table)):
+        return None
+    return storage.create_adjusted_view(con, dataset, table, "adjustment_factors")
+
+def publish_factors(conn, dataset):
+    """Parquet backend: replace the factors file readers join with."""
+    if storage.use_parquet():
+        storage.write_factors(conn, dataset, "adjustment_factors")
+
+def refresh_factors(conn, dataset, symbols):
+    """Recompute ``adjustment_factors`` of the symbols in relation ``symbols`` (a ``symbol`` column)."""
+    conn.execute(f"DELETE FROM adjustment_factors WHERE symbol IN (SELECT symbol FROM {symbols})")
+    # Dividend factors use the close of the last bar before the ex-date
+    conn.execute(f"""
+        INSERT INTO adjustment_factors
+        WITH acts AS (
+            SELECT a.symbol, a.date,
+                   CASE WHEN a.split_ratio > 0 AND NOT a.prices_adjusted THEN 1 / a.split_ratio ELSE 1 END AS split_f,
+                   CASE WHEN a.dividend > 0 AND b.close > a.dividend THEN 1 - a.dividend / b.close ELSE 1 END AS div_f
+            FROM (SELECT * FROM corporate_actions WHERE symbol IN (SELECT symbol FROM {symbols})) a
+            ASOF LEFT JOIN (
+                SELECT symbol, CAST(date AS DATE) AS date, close FROM {_bars_source(dataset)}
+                WHERE symbol IN (SELECT symbol FROM {symbols})
+            ) b ON a.symbol = b.symbol AND a.date > b.date
+        )
+        SELECT symbol,
+               coalesce(lag(date) OVER (PARTITION BY symbol ORDER BY date), DATE '1900-01-01') AS from_date,
+               date AS to_date,
+               exp(sum(ln(split_f * div_f)) OVER later) AS price_factor,
+               exp(-sum(ln(split_f)) OVER later) AS volume_factor
+        FROM acts
+        WINDOW later AS (PARTITION BY symbol ORDER BY date DESC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+    """)
+
+def init_adjustments(db_path, dataset):
+    """Create the corporate action tables (seeded from stored bars) and the adjusted view."""
+    with duckdb.connect(str(db_path)) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS corporate_actions (
+                symbol VARCHAR,
+                date DATE,
+                dividend DOUBLE,
+                split_ratio DOUBLE,
+                prices_adjusted BOOLEAN,
+                recorded_at TIMESTAMP,
+                PRIMARY KEY (symbol, date)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS adjustment_factors (
+                symbol VARCHAR,
+                from_date DATE,
+                to_date DATE,
+                price_factor DOUBLE,
+                volume_factor DOUBLE
+            )
+        """)
+        if not storage.use_parquet():
+            create_adjusted_view(conn, dataset)
+        if conn.execute("SELECT count(*) FROM corporate_actions").fetchone()[0]:
+            if storage.use_parquet() and not storage.factors_path(dataset).exists():
+                # Factors recorded before the Parquet readers joined with them
+                publish_factors(conn, dataset)
+            return
+        # First run: record the actions already in the stored bars
+        table = table_name(dataset)
+        source = storage.connect(db_path, dataset) if storage.use_parquet() else conn
+        try:
+            columns = get_table_columns(source, table)
+            if not {'dividends', 'stock_splits'} <= set(columns):
+                return
+            seed = source.execute(f"""
+                SELECT symbol, CAST(date AS DATE), coalesce(dividends, 0), coalesce(stock_splits, 0), true, ?
+                FROM {table} WHERE dividends > 0 OR stock_splits > 0
+            """, (datetime.utcnow(),)).fetchall()
+        finally:
+            if source is not conn:
+                source.close()
+        if not seed:
+            return
+        conn.execute("BEGIN TRANSACTION")
+        conn.executemany("INSERT INTO corporate_actions VALUES (?, ?, ?, ?, ?, ?)", seed)
+        conn.execute("CREATE OR REPLACE TEMP TABLE touched AS SELECT DISTINCT symbol FROM corporate_actions")
+        refresh_factors(conn, dataset, "touched")
+        conn.execute("COMMIT")
+        publish_factors(conn, dataset)
+        print(f"[OK] Seeded {len(seed)} corporate actions from stored bars")
+
+def record_actions(conn, dataset, batch):
+    """Store the batch's dividends / splits and refresh the factors of symbols whose actions changed."""
+    if not {'dividends', 'stock_splits'} <= set(batch.columns):
+        return 0
+    actions = batch.loc[(batch['dividends'].fillna(0) > 0) | (batch['stock_splits'].fillna(0) > 0),
+                        ['symbol', 'date', 'dividends', 'stock_splits']]
+    if actions.empty:
+        return 0
+    conn.register("new_actions", actions)
+    try:
+        conn.execute("""
+            CREATE OR REPLACE TEMP TABLE touched AS
+            SELECT DISTINCT n.symbol
+            FROM (SELECT symbol, CAST(date AS DATE) AS date, dividends, stock_splits FROM new_actions) n
+            LEFT JOIN corporate_actions a USING (symbol, date)
+            WHERE a.symbol IS NULL OR a.dividend IS DISTINCT FROM n.dividends
+               OR a.split_ratio IS DISTINCT FROM n.stock_splits
+        """)
+        if not conn.execute("SELECT count(*) FROM touched").fetchone()[0]:
+            return 0
+        conn.execute("""
+            INSERT INTO corporate_actions
+            SELECT symbol, CAST(date AS DATE), coalesce(dividends, 0), coalesce(stock_splits, 0), false, ?
+            FROM new_actions
+            QUALIFY row_number() OVER (PARTITION BY symbol, CAST(date AS DATE)) = 1
+            ON CONFLICT (symbol, date) DO UPDATE SET
+                dividend = excluded.dividend,
+                split_ratio = excluded.split_ratio,
+                recorded_at = excluded.recorded_at
+        """, (datetime.utcnow(),))
+        refresh_factors(conn, dataset, "touched")
+        return conn.execute("SELECT count(*) FROM touched").fetchone()[0]
+    finally:
+        conn.unregister("new_actions")
+
+# ===== WRITER =====
+# Fetch workers only talk to the network; one writer thread owns the only
+# connection and merges their frames in batches. With
+# RUBIKVIEW_STORAGE_BACKEND=parquet (see Engine/storage.py) a batch is
+# added to the dataset as new files instead; that path is append-only, so
+# restated older bars are not rewritten.
+class OhlcvWriter:
+    """Single writer thread for fetch outcomes and fetched OHLCV frames.
+
+    ``put`` blocks once ``queue_frames`` items are waiting, so a fast API
+    cannot buffer the universe in memory. ``close()`` writes the tail, stops
+    the thread and re-raises any write error.
+    """
+
+    def __init__(self, db_path, dataset, queue_frames, batch_rows=WRITE_BATCH_ROWS):
+        self.db_path = db_path
+        self.dataset = dataset
+        self.table = table_name(dataset)
+        self.batch_rows = max(1, batch_rows)
+        self.rows_written = 0
+        self.error = None
+        self._queue = queue.Queue(maxsize=max(1, queue_frames))
+        self._thread = threading.Thread(target=self._run, name=f"{dataset}-writer", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def put(self, symbol, status, df=None):
+        if self.error is not None:
+            raise RuntimeError(f"OHLCV writer failed: {self.error}") from self.error
+        self._queue.put((symbol, status, df))
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if self.error is not None:
+            raise self.error
+        return self.rows_written
+
+    def _flush(self, conn, frames, marks):
+        batch = pd.concat(frames, ignore_index=True) if frames else None
+        written = 0
+        if batch is not None and storage.use_parquet():
+            conn.register("new_data", batch)
+            storage.append_parquet(conn, self.dataset, "new_data")
+            conn.unregister("new_data")
+            written = len(batch)
+        touched = 0
+        conn.execute("BEGIN TRANSACTION")
+        try:
+            if batch is not None and not storage.use_parquet():
+                written = upsert_dynamic(conn, self.table, batch)
+            if batch is not None:
+                touched = record_actions(conn, self.dataset, batch)
+            update_watermarks(conn, self.table, batch, marks)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if touched:
+            publish_factors(conn, self.dataset)
+        self.rows_written += written
+        if batch is not None:
+            print(f"[WRITE] {len(batch)} fetched rows merged, {written} written ({self.rows_written} total)")
+
+    def _run(self):
+        stopped = False
+        try:
+            with duckdb.connect(str(self.db_path)) as conn:
+                frames, marks, pending = [], [], 0
+                while True:
+                    item = self._queue.get()
+                    if item is None:
+                        stopped = True
+                        break
+                    symbol, status, df = item
+                    marks.append((symbol, status))
+                    if df is not None and len(df):
+                        frames.append(df)
+                        pending += len(df)
+                    if pending >= self.batch_rows or len(marks) >= WATERMARK_BATCH:
+                        self._flush(conn, frames, marks)
+                        frames, marks, pending = [], [], 0
+                if marks:
+                    self._flush(conn, frames, marks)
+        except Exception as e:
+            self.error = e
+            # Keep draining so fetch workers never block on a dead writer
+            while not stopped and self._queue.get() is not None:
+                pass
+
+# ===== FETCHERS =====
+# A fetcher takes (symbols, start, end) and returns {symbol: history frame}
+# with a Date index and yfinance's column names; symbols without data are
+# left out. It may raise to fail the whole request.
+def fetch_ticker(symbols, start, end):
+    frames = {}
+    for symbol in symbols:
+        frames[symbol] = yf.Ticker(symbol).history(
+            start=start,
+            end=end,
+            auto_adjust=False,
+            actions=True
+        )
+    return frames
+
+def fetch_download(symbols, start, end):
+    data = yf.download(
+        symbols,
+        start=start,
+        end=end,
+        auto_adjust=False,
+        actions=True,
+        group_by="ticker",
+        threads=False,
+        progress=False,
+    )
+    frames = {}
+    if data is None or data.empty:
+        return frames
+    for symbol in symbols:
+        if isinstance(data.columns, pd.MultiIndex):
+            if symbol not in data.columns.get_level_values(0):
+                continue
+            df = data[symbol]
+        else:
+            df = data
+        # The combined frame spans every ticker's dates; drop the ones this symbol lacks
+        prices = [c for c in ("Open", "High", "Low", "Close") if c in df.columns]
+        df = df.dropna(subset=prices or None, how="all")
+        if not df.empty:
+            frames[symbol] = df
+    return frames
+
+def fetch_fixture(symbols, start, end):
+    """Offline stand-in: ``<symbol>.csv`` files (yfinance columns, ``Date`` first) in FIXTURE_DIR."""
+    if not FIXTURE_DIR:
+        raise ValueError("RUBIKVIEW_OHLCV_FIXTURE_DIR is not set")
+    if FIXTURE_LATENCY:
+        time.sleep(FIXTURE_LATENCY)
+    frames = {}
+    for symbol in symbols:
+        path = Path(FIXTURE_DIR) / f"{symbol}.csv"
+        if not path.exists():
+            continue
+        df = pd.read_csv(path, index_col="Date", parse_dates=["Date"])
+        dates = df.index.tz_localize(None) if getattr(df.index, "tz", None) is not None else df.index
+        frames[symbol] = df[(dates >= pd.Timestamp(start)) & (dates < pd.Timestamp(end))]
+    return frames
+
+FETCHERS = {
+    "ticker": fetch_ticker,
+    "download": fetch_download,
+    "fixture": fetch_fixture,
+    "chart": chart_fetcher.fetch_chart,
+}
+
+class BatchSizer:
+    """Symbols per request, adapted to the error rate of finished requests.
+
+    Grows by ``step`` after a clean request and halves when the share of
+    failed or empty symbols exceeds ``max_error_rate``, within [1, maximum].
+    """
+
+    def __init__(self, initial, maximum, step=DOWNLOAD_BATCH_STEP, max_error_rate=DOWNLOAD_MAX_ERROR_RATE):
+        self.maximum = max(1, maximum)
+        self.size = min(max(1, initial), self.maximum)
+        self.step = step
+        self.max_error_rate = max_error_rate
+
+    def record(self, requested, errors):
+        if errors / requested > self.max_error_rate:
+            self.size = max(1, self.size // 2)
+        elif errors == 0:
+            self.size = min(self.maximum, self.size + self.step)
+
+# ===== PIPELINE =====
+def plan_fetches(symbols, start_date, expected_session, last_dates, next_checks):
+    """Split symbols into ({fetch_start: [symbols]}, up-to-date symbols, deferred symbols).
+
+    A symbol is up to date once it has a bar for ``expected_session`` (the
+    last trading session up to yesterday), and deferred while its
+    empty-fetch backoff (``next_checks``) has not expired.
+    """
+    groups, uptodate, deferred = {}, [], []
+    today = date.today()
+    for symbol in symbols:
+        fetch_start = start_date
+        last = last_dates.get(symbol)
+        # Only fetch missing dates (after latest date)
+        if last:
+            fetch_start = max(fetch_start, pd.to_datetime(last).date() + timedelta(days=1))
+        if fetch_start > expected_session:
+            uptodate.append(symbol)
+        elif symbol in next_checks and next_checks[symbol] > today:
+            deferred.append(symbol)
+        else:
+            groups.setdefault(fetch_start, []).append(symbol)
+    return groups, uptodate, deferred
+
+def take_batch(work, size):
+    """Pop up to ``size`` symbols of the first pending (fetch_start, symbols) group."""
+    fetch_start, symbols = work.popleft()
+    if len(symbols) > size:
+        work.appendleft((fetch_start, symbols[size:]))
+    return fetch_start, symbols[:size]
+
+def hand_off(symbol, df, writer, last=None):
+    """Pass one fetched history frame (or None) to the writer; returns the symbol's result tuple.
+
+    ``last`` is the symbol's stored last date; the append-only Parquet path
+    drops bars up to it.
+    """
+    if df is None or df.empty:
+        writer.put(symbol, "skipped")
+        return symbol, 0, None, None, "skipped"
+    df = unadjust_splits(prepare_frame(df.reset_index()).sort_values('date'))
+    df['symbol'] = symbol
+    first_dt = df['date'].min().date()
+    last_dt  = df['date'].max().date()
+    if storage.use_parquet() and last:
+        df = df[df['date'] > pd.Timestamp(last)]
+    writer.put(symbol, "success", df)
+    return symbol, len(df), first_dt, last_dt, "success"
+
+def run(db_path, dataset, symbols, start_date, end_date, expected_session, max_workers, report):
+    """Bring ``symbols`` up to date in ``dataset`` through ``end_date`` (inclusive).
+
+    ``report(symbol, status, counts)`` is called on this thread once per
+    symbol, with the running ``counts`` (success, failed, skipped, uptodate,
+    processed). Returns the final counts, with ``rows_written`` added.
+    """
+    counts = dict(success=0, failed=0, skipped=0, uptodate=0, processed=0)
+    init_adjustments(db_path, dataset)
+    last_dates, next_checks = load_watermarks(db_path, dataset)
+    fetcher = FETCHERS[FETCH_MODE]
+    fetch_end = end_date + timedelta(days=1)
+
+    def tally(sym, count, first_dt, last_dt, status_flag):
+        counts['processed'] += 1
+        if status_flag == "success":
+            counts['success'] += 1
+            status = f"+{count} rows ({first_dt}->{last_dt})"
+        else:
+            counts['skipped'] += 1
+            status = "skipped"
+        report(sym, status, counts)
+
+    def fail(sym, error, writer):
+        counts['failed'] += 1
+        writer.put(sym, "failed")
+        report(sym, f"FAILED: {error}", counts)
+
+    def fetch_and_insert(batch, fetch_start, writer):
+        """Fetch symbols sharing ``fetch_start`` in one request and hand each frame to the writer."""
+        frames = fetcher(batch, fetch_start, fetch_end)
+        return [hand_off(sym, frames.get(sym), writer, last_dates.get(sym)) for sym in batch]
+
+    groups, uptodate_syms, deferred_syms = plan_fetches(
+        symbols, start_date, expected_session, last_dates, next_checks
+    )
+    # Pending (fetch_start, symbols) groups; failed multi-ticker requests are split and re-queued
+    work = deque(groups.items())
+    sizer = BatchSizer(DOWNLOAD_BATCH, DOWNLOAD_BATCH_MAX) if FETCH_MODE != "ticker" else BatchSizer(1, 1)
+    print(f"Fetcher: {FETCH_MODE}, {sum(map(len, groups.values()))} symbols to fetch in {len(groups)} date ranges")
+    # The writer is closed (and its tail written) once every fetch has finished
+    with OhlcvWriter(db_path, dataset, queue_frames=max_workers * 4) as writer:
+        for sym in uptodate_syms:
+            writer.put(sym, "uptodate")
+            counts['processed'] += 1
+            counts['uptodate'] += 1
+            report(sym, "up-to-date", counts)
+        for sym in deferred_syms:
+            writer.put(sym, "deferred")
+            counts['processed'] += 1
+            counts['skipped'] += 1
+            report(sym, f"deferred (no data lately; next check {next_checks[sym]})", counts)
+        if FETCH_MODE == "chart":
+            # One event loop streams every symbol; results are handed off as they land
+            def on_result(sym, df, error):
+                if error is not None:
+                    fail(sym, error, writer)
+                else:
+                    tally(*hand_off(sym, df, writer, last_dates.get(sym)))
+
+            jobs = [(sym, fetch_start, fetch_end) for fetch_start, syms in groups.items() for sym in syms]
+            limiter = chart_fetcher.fetch_all(jobs, on_result)
+            print(f"Fetch concurrency: peak {limiter.peak:.1f}, final {limiter.limit:.1f}")
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as exe:
+                in_flight = {}
+                while work or in_flight:
+                    while work and len(in_flight) < max_workers:
+                        fetch_start, batch = take_batch(work, sizer.size)
+                        in_flight[exe.submit(fetch_and_insert, batch, fetch_start, writer)] = (fetch_start, batch)
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        fetch_start, batch = in_flight.pop(future)
+                        try:
+                            results = future.result()
+                        except Exception as e:
+                            sizer.record(len(batch), len(batch))
+                            if len(batch) > 1:
+                                # Retry as two smaller requests before failing any symbol
+                                half = len(batch) // 2
+                                work.appendleft((fetch_start, batch[half:]))
+                                work.appendleft((fetch_start, batch[:half]))
+                                continue
+                            fail(batch[0], e, writer)
+                            continue
+                        sizer.record(len(batch), sum(1 for r in results if r[-1] != "success"))
+                        for result in results:
+                            tally(*result)
+    if not storage.use_parquet():
+        with duckdb.connect(str(db_path)) as conn:
+            # The first write of a new table adds the price columns the view needs
+            create_adjusted_view(conn, dataset)
+    counts['rows_written'] = writer.rows_written
+    return counts
@@ -0,0 +1,87 @@
+"""
+NSE/BSE trading calendar derived from the index OHLCV.
+
+A session is any date with a bar for the reference index
+(RUBIKVIEW_CALENDAR_INDEX, default ^NSEI) in index_ohlcv; weekdays inside
+that history without a bar are exchange holidays. Past the last loaded
+index bar every weekday is assumed to be a session.
+
+The index loader holds index.duckdb for writing while it runs, so after
+each run it also saves the sessions to a plain text snapshot next to it
+(``save_snapshot``); a loader that finds the database locked reads the
+snapshot instead and the two loaders can run side by side.
+
+Needs Engine/ on sys.path (for ``storage``), as the loaders set up.
+"""
+import bisect
+import os
+from datetime import date, timedelta
+from pathlib import Path
+
+import duckdb
+
+import storage
+
+CALENDAR_INDEX = os.getenv("RUBIKVIEW_CALENDAR_INDEX", "^NSEI")
+
+
+def snapshot_path(index_db, symbol=CALENDAR_INDEX):
+    name = symbol.strip("^").lower()
+    return Path(index_db).with_name(f"sessions_{name}.txt")
+
+
+def _read_sessions(index_db, symbol):
+    with storage.connect(index_db, "index_ohlcv") as con:
+        rows = con.execute(
+            "SELECT DISTINCT CAST(date AS DATE) FROM index_ohlcv WHERE symbol = ? ORDER BY 1",
+            (symbol,),
+        ).fetchall()
+    return [r[0] for r in rows]
+
+
+def load_sessions(index_db, symbol=CALENDAR_INDEX):
+    """Sorted session dates of ``symbol``; empty when the index has not been loaded."""
+    try:
+        return _read_sessions(index_db, symbol)
+    except duckdb.Error as e:
+        # e.g. the index loader holds index.duckdb for writing
+        snapshot = snapshot_path(index_db, symbol)
+        if snapshot.exists():
+            print(f"[INFO] Trading calendar read from {snapshot.name} (index database busy)")
+            return [date.fromisoformat(line) for line in snapshot.read_text().split()]
+        print(f"[WARN] Trading calendar unavailable ({e}); treating every weekday as a session")
+        return []
+
+
+def save_snapshot(index_db, symbol=CALENDAR_INDEX):
+    """Write the sessions of ``symbol`` to the snapshot file, replacing it atomically."""
+    sessions = _read_sessions(index_db, symbol)
+    if not sessions:
+        return
+    target = snapshot_path(index_db, symbol)
+    tmp = target.with_suffix(".tmp")
+    tmp.write_text("".join(f"{day.isoformat()}\n" for day in sessions))
+    os.replace(tmp, target)
+
+
+def holidays(sessions):
+    """Weekdays without a session between the first and last known session."""
+    if not sessions:
+        return []
+    known = set(sessions)
+    day, out = sessions[0], []
+    while day < sessions[-1]:
+        if day.weekday() < 5 and day not in known:
+            out.append(day)
+        day += timedelta(days=1)
+    return out
+
+
+def last_session(as_of, sessions):
+    """Latest trading session on or before ``as_of``."""
+    if sessions and sessions[0] <= as_of <= sessions[-1]:
+        return sessions[bisect.bisect_right(sessions, as_of) - 1]
+    day = as_of
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
@@ -1,8 +1,7 @@
 import os
-import duckdb
+import sys
 import pandas as pd
-import yfinance as yf
-from datetime import datetime, date, timedelta
+from datetime import date, timedelta
 from pathlib import Path
 
 # Find project root automatically
@@ -16,145 +15,123 @@ def find_project_root():
 
 PROJECT_ROOT = find_project_root()
 
+# Storage backend (duckdb / parquet) is shared with the Engine
+sys.path.insert(0, str(PROJECT_ROOT / "Engine"))
+import storage  # noqa: E402
+import ohlcv_ingest  # noqa: E402
+import trading_calendar  # noqa: E402
+import progress  # noqa: E402
+
 # Database path
 DB_PATH = PROJECT_ROOT / "Data" / "OHCLV Data" / "index.duckdb"
+META_DIR = PROJECT_ROOT / "Data" / "Symbols Data" / "All stocks Meta Data files"
+INDEX_META_FILES = ["All Nifty Indices Meta Data.csv", "All BSE Indices Meta Data.csv"]
 
 # Configuration
 YEARS_BACK = 10
 START_DATE = date.today() - timedelta(days=YEARS_BACK * 365)
 YESTERDAY = date.today() - timedelta(days=1)
+# Indices are few; all of them are fetched at once
+MAX_WORKERS = int(os.getenv("RUBIKVIEW_INDEX_WORKERS", "16"))
 
-# Indian indices to track
+# Indian indices tracked regardless of the metadata files
 INDICES = [
     "^NSEI",  # Nifty 50
     "^NSEBANK",  # Nifty Bank
-    "^NSMIDCP",  # Nifty Midcap 100
+    "^NSMIDCP",  # Nifty Next 50
     "^CNX500",  # Nifty 500 (may not be available on Yahoo Finance)
 ]
 
-def normalize(col: str) -> str:
-    return col.strip().lower().replace(" ", "_").replace("-", "_")
-
-def get_table_columns(conn):
-    rows = conn.execute("PRAGMA table_info('index_ohlcv')").fetchall()
-    return [r[1] for r in rows]
-
-def init_db():
-    conn = duckdb.connect(str(DB_PATH))
-    conn.execute("""
-      CREATE TABLE IF NOT EXISTS index_ohlcv (
-        symbol VARCHAR,
-        date   DATE
-      );
-    """)
-    conn.close()
-
-def insert_dynamic(conn, df: pd.DataFrame):
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.get_level_values(0)
-    df = df.rename(columns=normalize)
-    df['date'] = pd.to_datetime(df['date'])
-    df['symbol'] = df['symbol']
-    existing = get_table_columns(conn)
-    # Ensure all columns in df are present in table, add if not
-    for col in df.columns:
-        if col not in existing:
-            if col in ('symbol', 'date'):
-                continue
-            conn.execute(f'ALTER TABLE index_ohlcv ADD COLUMN {col} DOUBLE;')
-            existing.append(col)
-    for col in existing:
-        if col not in df.columns:
-            df[col] = None
-    to_ins = df[existing]
-    conn.register("new_data", to_ins)
-    conn.execute(f"INSERT INTO index_ohlcv SELECT * FROM new_data;")
-    conn.unregister("new_data")
+# IndexName in the metadata files -> Yahoo Finance symbol. Names mapped to
+# None (or missing) have no known Yahoo series and are reported, not fetched.
+YAHOO_INDEX_SYMBOLS = {
+    "nifty50": "^NSEI",
+    "niftynext50": "^NSMIDCP",
+    "nifty100": "^CNX100",
+    "nifty200": "^CNX200",
+    "nifty500": "^CRSLDX",
+    "niftymidcap50": "^NSEMDCP50",
+    "niftymidcap100": "NIFTY_MIDCAP_100.NS",
+    "niftymidcap150": "NIFTYMIDCAP150.NS",
+    "niftymidcapselect": "NIFTY_MID_SELECT.NS",
+    "niftysmallcap50": "NIFTYSMLCAP50.NS",
+    "niftysmallcap100": "^CNXSC",
+    "niftysmallcap250": "NIFTYSMLCAP250.NS",
+    "niftymidsmallcap400": "NIFTYMIDSML400.NS",
+    "niftylargemidcap250": "NIFTY_LARGEMID250.NS",
+    "niftymicrocap250": "NIFTY_MICROCAP250.NS",
+    "niftytotalmarket": "NIFTY_TOTAL_MKT.NS",
+    "nifty500Multicap502525": "NIFTY500_MULTICAP.NS",
+    "nifty500LargeMidSmallEqualCapWeighted": None,
+    "BSE SENSEX": "^BSESN",
+    "BSE SENSEX 50": "SNSX50.BO",
+    "BSE SENSEX NEXT 30": None,
+    "BSE SENSEX Next 50": "SNXT50.BO",
+    "BSE SENSEX SIXTY": None,
+    "BSE 100": "BSE-100.BO",
+    "BSE 200": "BSE-200.BO",
+    "BSE MidCap": "BSE-MIDCAP.BO",
+    "BSE SmallCap": "BSE-SMLCAP.BO",
+    "BSE LargeCap": "BSE-LRG.BO",
+    "BSE Bharat 22 Index": "BSE-BHRT22.BO",
+    "BSE India 150": None,
+    "BSE 100 LargeCap TMC Index": None,
+    "BSE 150 MidCap Index": "BSE-150MC.BO",
+    "BSE 250 LargeMidCap Index": "BSE-250LMC.BO",
+    "BSE 250 SmallCap Index": "BSE-250SC.BO",
+    "BSE 400 MidSmallCap Index": "BSE-400MS.BO",
+    "BSE MidCap Select Index": "BSE-MIDSEL.BO",
+    "BSE SmallCap Select Index": "BSE-SMLSEL.BO",
+}
 
-def fetch_and_insert(symbol):
-    fetch_start = START_DATE
-    fetch_end = YESTERDAY + timedelta(days=1)
-    conn_r = duckdb.connect(str(DB_PATH))
-    # Find latest date present in DB for symbol, if any
-    last = conn_r.execute("SELECT MAX(date) FROM index_ohlcv WHERE symbol=?", (symbol,)).fetchone()[0]
-    conn_r.close()
-    # Only fetch missing dates (after latest date)
-    if last:
-        last_dt = pd.to_datetime(last).date()
-        if last_dt >= YESTERDAY:
-            return symbol, 0, None, None, "uptodate"
-        fetch_start = max(fetch_start, last_dt + timedelta(days=1))
-    if fetch_start > YESTERDAY:
-        return symbol, 0, None, None, "uptodate"
-    
-    try:
-        df = yf.Ticker(symbol).history(
-            start=fetch_start,
-            end=fetch_end,
-            auto_adjust=False,
-            actions=True
-        )
-        if df.empty:
-            return symbol, 0, None, None, "skipped"
-        df = df.reset_index()
-        df['symbol'] = symbol
-        conn_w = duckdb.connect(str(DB_PATH))
-        # For each row, if already present for (symbol, date), check if values match
-        for _, row in df.iterrows():
-            row_date = pd.to_datetime(row['Date']).date()
-            db_row = conn_w.execute(
-                "SELECT * FROM index_ohlcv WHERE symbol=? AND date=?",
-                (symbol, row_date)
-            ).fetchdf()
-            # Normalize columns for comparison
-            values_are_different = True
-            if not db_row.empty:
-                db_row_sorted = db_row[df.columns.intersection(db_row.columns)]
-                df_row_sorted = pd.DataFrame([row])[db_row.columns.intersection(df.columns)]
-                values_are_different = not db_row_sorted.equals(df_row_sorted)
-            if values_are_different:
-                # Remove any old for that date and insert new
-                conn_w.execute("DELETE FROM index_ohlcv WHERE symbol=? AND date=?", (symbol, row_date))
-                insert_dynamic(conn_w, pd.DataFrame([row]))
-        conn_w.close()
-        first_dt = df['Date'].min().date()
-        last_dt = df['Date'].max().date()
-        return symbol, len(df), first_dt, last_dt, "success"
-    except Exception as e:
-        return symbol, 0, None, None, f"FAILED: {e}"
+def load_indices():
+    """INDICES plus the Yahoo symbol of every index named in the metadata files."""
+    symbols, unmapped = list(INDICES), set()
+    for name in INDEX_META_FILES:
+        path = META_DIR / name
+        if not path.exists():
+            print(f"[WARN] {path.name} not found; skipping")
+            continue
+        meta = pd.read_csv(path, usecols=["IndexName"])
+        for index_name in meta["IndexName"].dropna().astype(str).str.strip().unique():
+            # The BSE file suffixes every name with "index"
+            key = index_name[:-len("index")] if index_name.endswith("index") else index_name
+            symbol = YAHOO_INDEX_SYMBOLS.get(key)
+            if symbol:
+                symbols.append(symbol)
+            else:
+                unmapped.add(index_name)
+    if unmapped:
+        print(f"[WARN] No Yahoo symbol for {len(unmapped)} indices: {', '.join(sorted(unmapped))}")
+    return list(dict.fromkeys(symbols))
 
 def main():
-    init_db()
-    indices = INDICES
+    if not storage.use_parquet():
+        ohlcv_ingest.init_db(DB_PATH, "index_ohlcv")
+    indices = load_indices()
     total = len(indices)
-    today_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    success = failed = skipped = uptodate = 0
-    processed = 0
-    
+    done = 0
+    channel = progress.ProgressChannel(total)
+
+    def report(symbol, status, counts):
+        nonlocal done
+        done += 1
+        print(f"{done}/{total} ({done / total * 100:.1f}%): {symbol} -> {status}")
+        channel.update(counts, symbol=symbol, message=status)
+
     print(f"Updating {total} indices...")
-    for idx, symbol in enumerate(indices, start=1):
-        percent = idx / total * 100
-        try:
-            _, count, first_dt, last_dt, status_flag = fetch_and_insert(symbol)
-            processed += 1
-            if status_flag == "success":
-                success += 1
-                status = f"+{count} rows ({first_dt}->{last_dt})"
-            elif status_flag == "skipped":
-                skipped += 1
-                status = "skipped"
-            elif status_flag == "uptodate":
-                uptodate += 1
-                status = "up-to-date"
-            else:
-                status = status_flag
-        except Exception as e:
-            failed += 1
-            status = f"FAILED: {e}"
-        print(f"{idx}/{total} ({percent:.1f}%): {symbol} -> {status}")
-    
+    sessions = trading_calendar.load_sessions(DB_PATH)
+    expected_session = trading_calendar.last_session(YESTERDAY, sessions)
+    counts = ohlcv_ingest.run(
+        DB_PATH, "index_ohlcv", indices, START_DATE, YESTERDAY, expected_session, MAX_WORKERS, report
+    )
+    # For loaders that start while this one still holds the database
+    trading_calendar.save_snapshot(DB_PATH)
     print(f"\n[OK] Index update complete.")
-    print(f"Success: {success}, Failed: {failed}, Skipped: {skipped}, Up-to-date: {uptodate}")
+    print(f"Success: {counts['success']}, Failed: {counts['failed']}, "
+          f"Skipped: {counts['skipped']}, Up-to-date: {counts['uptodate']}")
+    channel.update(counts, force=True)
+    channel.close("Index update complete")
 
 if __name__ == "__main__":
     main()
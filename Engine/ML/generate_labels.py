@@ -20,7 +20,7 @@ training_con = duckdb.connect(TRAINING_DB)
 
 # === Load signals and prices ===
 signal_df = signal_con.execute("SELECT * FROM signals").df()
-price_df  = ohlcv_con.execute("SELECT symbol, date, close FROM yahoo_ohlcv").df()
+price_df  = ohlcv_con.execute("SELECT symbol, date, close FROM adjusted_ohlcv").df()
 
 # === Ensure 'date' columns are datetime ===
 signal_df['date'] = pd.to_datetime(signal_df['date'])
@@ -0,0 +1,493 @@
+"""
+Cross-sectional (batch) indicator engine.
+
+Loads the whole OHLCV universe once as flat NumPy columns sorted by
+(symbol, date) and scores every active indicator for every symbol in one
+pass over the segment boundaries, instead of one DataFrame and one Python
+dispatch per symbol. Produces the same ``*_signal`` / ``*_weight`` columns
+as the per-symbol path in ``indicator_runner.py``.
+
+Cumulative, rolling and normalisation steps are fully vectorised across
+segments. Recursive TA-Lib filters (EMA, Wilder smoothing, SAR...) are run
+on contiguous NumPy slices of each segment, which keeps them in C without
+any pandas overhead.
+"""
+import numpy as np
+import pandas as pd
+import talib
+
+import storage
+from indicators import NORM_WINDOW
+
+
+class Universe:
+    """Flat (symbol, date)-sorted OHLCV arrays plus segment boundaries."""
+
+    def __init__(self, symbol, date, open_, high, low, close, volume):
+        self.symbol = symbol
+        self.date = date
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        n = len(symbol)
+        if n:
+            is_start = np.empty(n, dtype=bool)
+            is_start[0] = True
+            is_start[1:] = symbol[1:] != symbol[:-1]
+            self.starts = np.flatnonzero(is_start)
+        else:
+            self.starts = np.empty(0, dtype=np.int64)
+        self.ends = np.append(self.starts[1:], n).astype(np.int64)
+        self.lengths = self.ends - self.starts
+        self.last = self.ends - 1
+        # Position of each bar inside its own symbol's history (0-based)
+        self.pos = np.arange(n) - np.repeat(self.starts, self.lengths)
+        # Intermediate series shared by the kernels, keyed (primitive, *params)
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def symbols(self):
+        return self.symbol[self.starts]
+
+    @property
+    def last_dates(self):
+        return self.date[self.last]
+
+    def subset(self, keep):
+        """Return a new Universe holding only the segments where ``keep`` is True."""
+        keep = np.asarray(keep, dtype=bool)
+        rows = np.repeat(keep, self.lengths)
+        return Universe(
+            self.symbol[rows], self.date[rows], self.open[rows], self.high[rows],
+            self.low[rows], self.close[rows], self.volume[rows],
+        )
+
+
+def _as_float(arr):
+    if isinstance(arr, np.ma.MaskedArray):
+        arr = arr.filled(np.nan)
+    return np.ascontiguousarray(arr, dtype=np.float64)
+
+
+def load_universe(db_path, symbols=None, history_bars=None):
+    """Read adjusted_ohlcv in one query, sorted by (symbol, date).
+
+    ``history_bars`` keeps only each symbol's most recent bars, matching the
+    per-symbol runner's bounded history.
+    """
+    query = "SELECT symbol, date, open, high, low, close, volume FROM adjusted_ohlcv"
+    params = []
+    if symbols is not None:
+        query += " WHERE list_contains(?, symbol)"
+        params.append(list(symbols))
+    if history_bars is not None:
+        query += " QUALIFY row_number() OVER (PARTITION BY symbol ORDER BY date DESC) <= ?"
+        params.append(int(history_bars))
+    query += " ORDER BY symbol, date"
+    with storage.connect(db_path) as con:
+        data = con.execute(query, params).fetchnumpy()
+    return Universe(
+        np.asarray(data["symbol"], dtype=object),
+        np.asarray(data["date"]),
+        _as_float(data["open"]),
+        _as_float(data["high"]),
+        _as_float(data["low"]),
+        _as_float(data["close"]),
+        _as_float(data["volume"]),
+    )
+
+
+# ===== Segment primitives =====
+
+def _per_segment(u, fn, *cols):
+    """Run ``fn`` on each segment's slices and stitch the outputs back together.
+
+    ``fn`` may return one array or a tuple of arrays (e.g. MACD).
+    """
+    outs = None
+    for s, e in zip(u.starts, u.ends):
+        res = fn(*(c[s:e] for c in cols))
+        if not isinstance(res, tuple):
+            res = (res,)
+        if outs is None:
+            outs = [np.full(len(u.pos), np.nan) for _ in res]
+        for out, r in zip(outs, res):
+            out[s:e] = r
+    if outs is None:
+        return np.empty(0)
+    return outs[0] if len(outs) == 1 else tuple(outs)
+
+
+def _seg_cumsum(u, x):
+    """Per-segment cumulative sum with pandas semantics (NaNs skipped, kept as NaN)."""
+    nan = np.isnan(x)
+    cs = np.cumsum(np.where(nan, 0.0, x))
+    base = np.zeros(len(u))
+    base[1:] = cs[u.starts[1:] - 1]
+    cs = cs - np.repeat(base, u.lengths)
+    cs[nan] = np.nan
+    return cs
+
+
+def _seg_nanmax(u, x):
+    """Per-segment ``np.nanmax`` (NaN for all-NaN segments)."""
+    if not len(u):
+        return np.empty(0)
+    return np.fmax.reduceat(x, u.starts)
+
+
+def _norm_max(u, x):
+    """Per-segment nanmax over the normalisation window (``indicators.NORM_WINDOW``)."""
+    if NORM_WINDOW > 0:
+        x = np.where(u.pos >= np.repeat(u.lengths, u.lengths) - NORM_WINDOW, x, np.nan)
+    return _seg_nanmax(u, x)
+
+
+def _window_at(u, x, window, lag=0):
+    """Gather the trailing ``window`` values ending ``lag`` bars before each segment's last bar.
+
+    Returns an (n_symbols, window) matrix and a validity mask; windows that
+    would cross into the previous symbol are marked invalid.
+    """
+    end = u.last - lag
+    valid = (end - window + 1) >= u.starts
+    idx = end[:, None] + np.arange(-window + 1, 1)[None, :]
+    idx = np.clip(idx, 0, max(len(x) - 1, 0))
+    return x[idx], valid
+
+
+def _rolling_at(u, x, window, reducer, lag=0):
+    """``x.rolling(window).<reducer>()`` evaluated at ``last - lag`` for every segment."""
+    vals, valid = _window_at(u, x, window, lag)
+    out = reducer(vals, axis=1)
+    out[~valid] = np.nan
+    return out
+
+
+def _seg_rolling_mean(u, x, window):
+    """Full per-segment rolling mean series (NaN until ``window`` bars are available)."""
+    out = np.full(len(x), np.nan)
+    if len(x) >= window:
+        means = np.lib.stride_tricks.sliding_window_view(x, window).mean(axis=1)
+        out[window - 1:] = means
+    out[u.pos < window - 1] = np.nan
+    return out
+
+
+def _seg_scan(u, step, init, *cols):
+    """Run a first-order recursion across all segments at once.
+
+    Bar ``t`` of every segment is advanced together, so the Python loop runs
+    max(segment length) times rather than once per bar of every symbol.
+    ``step(prev, *cols_at_t)`` returns the new value; ``init(*cols_at_0)``
+    seeds the first bar.
+    """
+    out = np.full(len(u.pos), np.nan)
+    if not len(u):
+        return out
+    idx = u.starts.copy()
+    out[idx] = init(*(c[idx] for c in cols))
+    for t in range(1, int(u.lengths.max())):
+        alive = u.lengths > t
+        idx = u.starts[alive] + t
+        out[idx] = step(out[idx - 1], *(c[idx] for c in cols))
+    return out
+
+
+def _vnorm(val, lo, hi):
+    return np.clip(200 * (val - lo) / (hi - lo) - 100, -100, 100)
+
+
+def _band_score(val, lo_thr, hi_thr):
+    """Vectorised version of the RSI/MFI/StochRSI threshold scoring."""
+    out = np.zeros_like(val)
+    low = val <= lo_thr
+    high = val >= hi_thr
+    out[low] = _vnorm(val[low], 0, lo_thr)
+    out[high] = _vnorm(val[high], hi_thr, 100)
+    return out
+
+
+def _ratio_score(val, vmax, lo=-100, hi=100):
+    """clip(val / vmax * 100), falling back to 0 when vmax is 0 or NaN."""
+    out = np.clip(val / vmax * 100, lo, hi)
+    out[(vmax == 0) | np.isnan(vmax)] = 0
+    return out
+
+
+def _diff_score(u, diff):
+    return _ratio_score(diff[u.last], _norm_max(u, np.abs(diff)))
+
+
+def _cached(u, key, compute):
+    if key not in u.cache:
+        u.cache[key] = compute()
+    return u.cache[key]
+
+
+def _batch_rsi_series(u, period):
+    return _cached(u, ("rsi", period), lambda: _per_segment(u, lambda c: talib.RSI(c, timeperiod=period), u.close))
+
+
+def _batch_atr_series(u, period):
+    return _cached(u, ("atr", period), lambda: _per_segment(
+        u, lambda h, l, c: talib.ATR(h, l, c, timeperiod=period), u.high, u.low, u.close
+    ))
+
+
+def _batch_typical_price(u):
+    return _cached(u, ("typical",), lambda: (u.high + u.low + u.close) / 3)
+
+
+# ===== Batch kernels (one score per symbol) =====
+
+def batch_rsi(u, period):
+    val = _batch_rsi_series(u, period)[u.last]
+    return _band_score(val, 30, 70)
+
+
+def batch_mfi(u, period):
+    s = _per_segment(
+        u, lambda h, l, c, v: talib.MFI(h, l, c, v, timeperiod=period),
+        u.high, u.low, u.close, u.volume,
+    )
+    return _band_score(s[u.last], 20, 80)
+
+
+def batch_cci(u, period):
+    s = _per_segment(u, lambda h, l, c: talib.CCI(h, l, c, timeperiod=period), u.high, u.low, u.close)
+    return np.clip(s[u.last], -100, 100)
+
+
+def batch_stochrsi(u, rsi_period, k_period, d_period):
+    rsi = _batch_rsi_series(u, rsi_period)
+    lo = _rolling_at(u, rsi, k_period, np.min)
+    hi = _rolling_at(u, rsi, k_period, np.max)
+    val = (rsi[u.last] - lo) / (hi - lo) * 100
+    return _band_score(val, 20, 80)
+
+
+def batch_roc(u, period):
+    s = _per_segment(u, lambda c: talib.ROC(c, timeperiod=period), u.close)
+    return np.clip(s[u.last], -100, 100)
+
+
+def batch_macd(u, fastperiod, slowperiod, signalperiod):
+    macd, macdsignal, _ = _per_segment(
+        u, lambda c: talib.MACD(c, fastperiod, slowperiod, signalperiod), u.close
+    )
+    return _diff_score(u, macd - macdsignal)
+
+
+def batch_ema_crossover(u, short_period, long_period):
+    short = _per_segment(u, lambda c: talib.EMA(c, timeperiod=short_period), u.close)
+    long_ = _per_segment(u, lambda c: talib.EMA(c, timeperiod=long_period), u.close)
+    return _diff_score(u, short - long_)
+
+
+def batch_sma_crossover(u, short_period, long_period):
+    short = _per_segment(u, lambda c: talib.SMA(c, timeperiod=short_period), u.close)
+    long_ = _per_segment(u, lambda c: talib.SMA(c, timeperiod=long_period), u.close)
+    return _diff_score(u, short - long_)
+
+
+def batch_atr(u, period):
+    atr = _batch_atr_series(u, period)
+    return _ratio_score(atr[u.last], _norm_max(u, atr), 0, 100)
+
+
+def batch_williams_r(u, period):
+    s = _per_segment(u, lambda h, l, c: talib.WILLR(h, l, c, timeperiod=period), u.high, u.low, u.close)
+    return np.clip(s[u.last], -100, 0)
+
+
+def batch_adx(u, period):
+    s = _per_segment(u, lambda h, l, c: talib.ADX(h, l, c, timeperiod=period), u.high, u.low, u.close)
+    return np.clip(s[u.last], 0, 100)
+
+
+def batch_vwap(u):
+    pv = _batch_typical_price(u) * u.volume
+    vwap = _seg_cumsum(u, pv) / _seg_cumsum(u, u.volume)
+    return _diff_score(u, u.close - vwap)
+
+
+def _seg_supertrend(u, close, basic_upper, basic_lower):
+    """Cross-sectional form of ``indicators._supertrend_loop`` (same band carry-forward rules)."""
+    st = np.full(len(close), np.nan)
+    k = len(u)
+    if not k:
+        return st
+    started = np.zeros(k, dtype=bool)
+    up = np.zeros(k)
+    lo = np.zeros(k)
+    d = np.full(k, -1.0)
+    for t in range(int(u.lengths.max())):
+        rows = np.flatnonzero(u.lengths > t)
+        idx = u.starts[rows] + t
+        bu, bl, c = basic_upper[idx], basic_lower[idx], close[idx]
+        prev_close = close[np.maximum(idx - 1, 0)]
+        valid = ~(np.isnan(bu) | np.isnan(bl))
+        fresh = valid & ~started[rows]
+        cont = valid & started[rows]
+        r_up, r_lo = up[rows], lo[rows]
+        r_up = np.where(fresh | (cont & ((bu < r_up) | (prev_close > r_up))), bu, r_up)
+        r_lo = np.where(fresh | (cont & ((bl > r_lo) | (prev_close < r_lo))), bl, r_lo)
+        r_d = np.where(fresh, -1.0, d[rows])
+        flip_up = (r_d == -1.0) & (c > r_up)
+        flip_down = (r_d == 1.0) & (c < r_lo)
+        r_d = np.where(flip_up, 1.0, np.where(flip_down, -1.0, r_d))
+        line = np.where(r_d == 1.0, r_lo, r_up)
+        st[idx[valid]] = line[valid]
+        started[rows] = valid
+        up[rows], lo[rows], d[rows] = r_up, r_lo, r_d
+    return st
+
+
+def batch_supertrend(u, period=10, multiplier=3):
+    hl2 = (u.high + u.low) / 2
+    atr = _batch_atr_series(u, period)
+    st = _seg_supertrend(u, u.close, hl2 + multiplier * atr, hl2 - multiplier * atr)
+    return _diff_score(u, u.close - st)
+
+
+def batch_parabolic_sar(u, af=0.02, max_af=0.2, init_af=0.02):
+    s = _per_segment(u, lambda h, l: talib.SAR(h, l, acceleration=af, maximum=max_af), u.high, u.low)
+    return np.clip(s[u.last], -100, 100)
+
+
+def _mid_at(u, window, lag):
+    return (_rolling_at(u, u.high, window, np.max, lag) + _rolling_at(u, u.low, window, np.min, lag)) / 2
+
+
+def batch_ichimoku(u, conv=9, base=26, span=52):
+    tenkan = _mid_at(u, conv, base)
+    kijun = _mid_at(u, base, base)
+    span_a = (tenkan + kijun) / 2
+    span_b = _mid_at(u, span, base)
+    close = u.close[u.last]
+    above = (close > span_a) & (close > span_b)
+    below = (close < span_a) & (close < span_b)
+    return np.where(above, 100.0, np.where(below, -100.0, 0.0))
+
+
+def batch_bollinger(u, period, num_std):
+    upper, _, lower = _per_segment(
+        u, lambda c: talib.BBANDS(c, timeperiod=period, nbdevup=num_std, nbdevdn=num_std, matype=0), u.close
+    )
+    up, lo = upper[u.last], lower[u.last]
+    val = u.close[u.last]
+    mid = (up + lo) / 2
+    pct = np.clip((val - mid) / (up - lo) * 100, -100, 100)
+    return np.where(val < lo, -100.0, np.where(val > up, 100.0, pct))
+
+
+def batch_donchian(u, period):
+    upper = _rolling_at(u, u.high, period, np.max)
+    lower = _rolling_at(u, u.low, period, np.min)
+    pct = (u.high[u.last] - lower) / (upper - lower) * 200 - 100
+    return np.clip(pct, -100, 100)
+
+
+def batch_keltner(u, period):
+    alpha = 2.0 / (period + 1)
+    tp = _batch_typical_price(u)
+    ema = _seg_scan(
+        u,
+        lambda prev, x: np.where(np.isnan(x), prev, alpha * x + (1 - alpha) * prev),
+        lambda x: x,
+        tp,
+    )
+    atr = _batch_atr_series(u, period)
+    upper = (ema + 2 * atr)[u.last]
+    lower = (ema - 2 * atr)[u.last]
+    pct = (u.close[u.last] - lower) / (upper - lower) * 200 - 100
+    return np.clip(pct, -100, 100)
+
+
+def _change_score(u, series):
+    """Score the last one-bar change of a cumulative series against its largest change."""
+    diff = np.full(len(series), np.nan)
+    diff[1:] = series[1:] - series[:-1]
+    diff[u.pos == 0] = np.nan
+    out = _ratio_score(diff[u.last], _norm_max(u, np.abs(diff)))
+    # The per-symbol version needs two bars (iloc[-2]) and reports NaN otherwise
+    out[u.lengths < 2] = np.nan
+    return out
+
+
+def batch_obv(u):
+    dc = np.full(len(u.close), np.nan)
+    dc[1:] = u.close[1:] - u.close[:-1]
+    signed = np.where(dc > 0, u.volume, np.where(dc < 0, -u.volume, 0.0))
+    signed[u.starts] = u.volume[u.starts]
+    return _change_score(u, _seg_cumsum(u, signed))
+
+
+def batch_vma(u, period):
+    ma = _seg_rolling_mean(u, u.volume, period)
+    curr = u.volume[u.last]
+    avg = ma[u.last]
+    vmax = _norm_max(u, ma)
+    out = np.clip((curr - avg) / vmax * 100, -100, 100)
+    out[np.isnan(avg) | (vmax == 0) | np.isnan(curr)] = 0
+    return out
+
+
+def batch_adl(u):
+    rng = u.high - u.low
+    mfv = np.where(rng > 0, ((u.close - u.low) - (u.high - u.close)) / np.where(rng > 0, rng, 1.0) * u.volume, 0.0)
+    return _change_score(u, _seg_cumsum(u, mfv))
+
+
+# Registry name -> batch kernel; params arrive already parsed by the runner's plan
+BATCH_KERNELS = {
+    "RSI": batch_rsi,
+    "MFI": batch_mfi,
+    "CCI": batch_cci,
+    "StochRSI": batch_stochrsi,
+    "ROC": batch_roc,
+    "MACD": batch_macd,
+    "EMA Crossover": batch_ema_crossover,
+    "SMA Crossover": batch_sma_crossover,
+    "ATR": batch_atr,
+    "Williams %R": batch_williams_r,
+    "ADX": batch_adx,
+    "VWAP": batch_vwap,
+    "SuperTrend": batch_supertrend,
+    "Parabolic SAR": batch_parabolic_sar,
+    "Ichimoku": batch_ichimoku,
+    "Bollinger Bands": batch_bollinger,
+    "Donchian Channel": batch_donchian,
+    "Keltner Channel": batch_keltner,
+    "VMA": batch_vma,
+    "OBV": batch_obv,
+    "ADL": batch_adl,
+}
+
+
+def compute_signals(u, indicators):
+    """Score every indicator for every symbol in ``u``.
+
+    ``indicators`` are the compiled plan items (``name``, parsed ``params``,
+    ``weight``, ``column``; see ``indicator_runner.compile_plan``). Returns one
+    row per symbol with the same columns the per-symbol runner produces.
+    """
+    out = {"symbol": u.symbols, "date": pd.to_datetime(u.last_dates)}
+    n = len(u)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for ind in indicators:
+            signal = np.full(n, np.nan)
+            if not ind["error"]:
+                try:
+                    signal = np.asarray(BATCH_KERNELS[ind["name"]](u, *ind["params"]), dtype=float)
+                except Exception as e:
+                    print(f"[WARN] {ind['name']} failed in batch mode: {e}")
+            out[f"{ind['column']}_signal"] = signal
+            out[f"{ind['column']}_weight"] = np.full(n, ind["weight"], dtype=float)
+    return pd.DataFrame(out)
@@ -4,10 +4,16 @@ import numpy as np
 import os
 import sqlite3
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait
 from indicators import *
+from indicator_state import incremental_since, is_streamable, load_states, score_incremental
+from ohlcv_reader import iter_symbol_frames
+import storage
+from signal_writer import SignalWriter, CHUNK_ROWS, SIGNALS_TABLE, init_signals_storage
+from progress import ProgressChannel
 import threading
 import datetime
+import multiprocessing
 
 # Excel integration is optional when running from backend jobs
 USE_EXCEL = os.getenv("RUBIKVIEW_DISABLE_EXCEL") != "1"
@@ -20,6 +26,17 @@ else:
 # completes more quickly when triggered from the Admin console.
 FAST_MODE = os.getenv("RUBIKVIEW_FAST_MODE") == "1"
 
+# Execution mode for the signal job:
+#   "threads" - per-symbol workers on a thread pool (default)
+#   "batch"   - load the whole universe once and score it cross-sectionally
+#   "process" - shard symbols across a process pool (RUBIKVIEW_WORKERS, default: all cores)
+RUNNER_MODE = os.getenv("RUBIKVIEW_RUNNER_MODE", "threads").strip().lower()
+
+# Incremental mode: keep per-(symbol, indicator, params) streaming state in
+# signals.duckdb and only feed the bars appended since the last run
+# (threads / process modes; unsupported indicators still use full history).
+INCREMENTAL = os.getenv("RUBIKVIEW_INCREMENTAL") == "1"
+
 # === Dynamic Path Setup ===
 def find_project_root():
     """Find project root by looking for Data or backend folder"""
@@ -51,9 +68,13 @@ def update_excel_summary(done, total, messages, dash_sheet):
     progress_str = (f"{processed_symbols / total * 100:.2f}%" if total else "N/A")
     progress_count_str = f"{done}/{total}"
 
-    with duckdb.connect(str(SIGNALS_DB), read_only=True) as con:
-        table_list = con.execute("SHOW TABLES").fetchdf()['name'].tolist()
+    try:
+        with duckdb.connect(str(SIGNALS_DB), read_only=True) as con:
+            table_list = con.execute("SHOW TABLES").fetchdf()['name'].tolist()
         table_name = ', '.join(table_list) if table_list else "N/A"
+    except duckdb.Error:
+        # The signal writer holds the file open for writing during the run
+        table_name = "signals"
 
     headers = [
         "Table", "Progress %", "Progress Count", "Success", "Failed", "Skipped",
@@ -74,6 +95,17 @@ def update_excel_summary(done, total, messages, dash_sheet):
     dash_sheet.range("H18").value = headers
     dash_sheet.range("H19").value = row
 
+def message_outcome(msg):
+    """Progress outcome of a per-symbol message ("SYM | processed", ...)."""
+    status = msg.split(" | ", 1)[-1]
+    if status.startswith("processed"):
+        return "success"
+    if status.startswith("error"):
+        return "failed"
+    if status.startswith("skipped"):
+        return "skipped"
+    return "uptodate"
+
 def update_excel_progress(done, total, messages):
     # When launched from the backend job runner, skip Excel updates
     if not USE_EXCEL or xw is None:
@@ -87,6 +119,294 @@ def update_excel_progress(done, total, messages):
     except Exception as e:
         print(f"Excel update error: {e}")
 
+PRICE_COLUMNS = {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}
+# Lookback: bars loaded per symbol.
+#   RUBIKVIEW_LOOKBACK_BARS=N  - fixed window of the last N bars (raised to at
+#                                least the longest warm-up + NORM_WINDOW)
+#   unset / 0                  - longest indicator warm-up x RUBIKVIEW_HISTORY_SAFETY
+#                                + NORM_WINDOW; recursive indicators (EMA, Wilder)
+#                                need several warm-ups to converge
+# With both at 0 the full history is loaded. Incremental state keeps its
+# running maxima from the first build, so it only matches a fresh run
+# bar-for-bar on full history. NORM_WINDOW (RUBIKVIEW_NORM_WINDOW, see
+# indicators.py) fixes the bars the ratio scores normalise over.
+# Incremental runs resume streamable indicators from their stored state and
+# read only the bars since then; the other indicators get a window sized
+# by their own longest warm-up (plain_history_bars) instead.
+LOOKBACK_BARS = int(os.getenv("RUBIKVIEW_LOOKBACK_BARS", "0"))
+HISTORY_SAFETY = int(os.getenv("RUBIKVIEW_HISTORY_SAFETY", "10"))
+
+def compile_plan(active_inds):
+    """Compile the active indicator rows against the registry, once per job.
+
+    Returns a plain dict (picklable for the process pool):
+      items        -- one dict per indicator: name, parsed params, weight,
+                      column prefix and any config error
+      columns      -- OHLCV columns the active kernels read
+      history_bars -- bars to load per symbol (None = full history)
+      plain_history_bars -- bars the non-streamable items need when the
+                      streamable ones resume from stored state
+    """
+    items = []
+    columns = set()
+    warmups = []
+    plain_warmups = []
+    for _, ind in active_inds.iterrows():
+        name = ind['Indicator_Name']
+        mweight = float(ind['Manual_Weight']) if not pd.isnull(ind['Manual_Weight']) else 1.0
+        use_ai = str(ind['Use_AI_Weight']).upper() == "Y"
+        aiweight = float(ind['AI_Latest_Weight']) if not pd.isnull(ind['AI_Latest_Weight']) else mweight
+        raw = [ind[c] if not pd.isnull(ind[c]) else None for c in ('Parameter_1', 'Parameter_2', 'Parameter_3')]
+        item = {
+            'name': name,
+            'params': None,
+            'weight': aiweight if use_ai else mweight,
+            'column': name.lower().replace(" ", "_").replace("%", "pct"),
+            'error': None,
+        }
+        definition = INDICATORS.get(name)
+        if definition is None:
+            item['error'] = "unknown indicator"
+        else:
+            try:
+                item['params'] = definition.parse_params(raw)
+                columns.update(definition.inputs)
+                warmups.append(definition.warmup(*item['params']))
+                if not is_streamable(item):
+                    plain_warmups.append(warmups[-1])
+            except Exception as e:
+                item['error'] = f"bad parameters: {e}"
+        if item['error']:
+            print(f"[WARN] {name}: {item['error']} -> signal will be NaN")
+        items.append(item)
+    if INCREMENTAL:
+        # Streaming state is advanced from full bars
+        columns.update(('high', 'low', 'close', 'volume'))
+    max_warmup = max(warmups) if warmups else 0
+    history_bars = None
+    if LOOKBACK_BARS > 0:
+        history_bars = max(LOOKBACK_BARS, max_warmup + NORM_WINDOW)
+        if history_bars > LOOKBACK_BARS:
+            print(f"[WARN] Lookback raised to {history_bars} bars to cover warm-up + normalisation window")
+    elif HISTORY_SAFETY > 0 and warmups:
+        history_bars = max_warmup * HISTORY_SAFETY + NORM_WINDOW
+    plain_history_bars = history_bars
+    if LOOKBACK_BARS <= 0 and history_bars is not None:
+        plain_history_bars = max(plain_warmups) * HISTORY_SAFETY + NORM_WINDOW if plain_warmups else 0
+    return {
+        'items': items,
+        'columns': [c for c in ('open', 'high', 'low', 'close', 'volume') if c in columns],
+        'history_bars': history_bars,
+        'plain_history_bars': plain_history_bars,
+    }
+
+def score_frame(df, specs):
+    """Score every compiled plan item on one symbol's history; failures become NaN.
+
+    Kernels share one series cache per symbol, so e.g. ATR(14) is computed once
+    for ATR, SuperTrend and Keltner.
+    """
+    signals = []
+    cache = {}
+    for spec in specs:
+        try:
+            signal = float(INDICATORS[spec['name']].kernel(df, *spec['params'], cache=cache))
+        except Exception:
+            signal = np.nan
+        signals.append(signal)
+    return signals
+
+def load_symbol_bars(con, sym, plan, since=None):
+    """One symbol's bars: the last ``history_bars`` rows, or everything from ``since`` (inclusive)."""
+    cols = ", ".join(['date'] + plan['columns'])
+    if since is not None:
+        query = f"SELECT {cols} FROM adjusted_ohlcv WHERE symbol=? AND date >= ? ORDER BY date"
+        return con.execute(query, (sym, since)).fetchdf()
+    if plan['history_bars'] is None:
+        query = f"SELECT {cols} FROM adjusted_ohlcv WHERE symbol=? ORDER BY date"
+        return con.execute(query, (sym,)).fetchdf()
+    query = (
+        f"SELECT * FROM (SELECT {cols} FROM adjusted_ohlcv WHERE symbol=? ORDER BY date DESC LIMIT ?) "
+        "ORDER BY date"
+    )
+    return con.execute(query, (sym, plan['history_bars'])).fetchdf()
+
+def score_symbol(con, sym, df, plan, sym_states=None, since=None):
+    """Score one symbol. Returns the signals (plan order) and any state rows to persist."""
+    df = df.rename(columns=PRICE_COLUMNS)
+    specs = plan['items']
+    if not INCREMENTAL:
+        return score_frame(df, specs), []
+    if since is None:
+        load_full = lambda: df
+    else:
+        load_full = lambda: load_symbol_bars(con, sym, plan).rename(columns=PRICE_COLUMNS)
+    plain_bars = plan['plain_history_bars']
+
+    def load_plain():
+        # Same window whether or not the streamable specs resumed; the bars
+        # already read usually cover it
+        if plain_bars is None:
+            return load_full()
+        if len(df) >= plain_bars or since is None:
+            return df.iloc[max(0, len(df) - plain_bars):].reset_index(drop=True)
+        return load_symbol_bars(con, sym, dict(plan, history_bars=plain_bars)).rename(columns=PRICE_COLUMNS)
+
+    return score_incremental(sym, specs, df, sym_states, load_full, score_frame, load_plain)
+
+def diff_pending(symbols):
+    """Split symbols into (pending, up_to_date) with one set-based query.
+
+    A symbol is up to date when the signals storage (``signals`` or, in the
+    long layout, ``signal_values``) already has a row for its latest OHLCV
+    date. The signals DB is attached read-only to the OHLCV connection, so
+    workers never open it just to check. With the Parquet backend both
+    sides are views on the same in-memory connection.
+    """
+    if not symbols:
+        return [], []
+    with storage.connect(OHLCV_DB) as con:
+        if storage.use_parquet():
+            signals_table = storage.create_view(con, "signals")
+        else:
+            sig_path = str(SIGNALS_DB).replace("'", "''")
+            con.execute(f"ATTACH '{sig_path}' AS sig (READ_ONLY)")
+            signals_table = f"sig.{SIGNALS_TABLE}"
+        done = set(con.execute(
+            f"""
+            SELECT o.symbol
+            FROM (
+                SELECT symbol, max(date) AS last_date
+                FROM yahoo_ohlcv
+                WHERE list_contains(?, symbol)
+                GROUP BY symbol
+            ) o
+            WHERE EXISTS (
+                SELECT 1 FROM {signals_table} s WHERE s.symbol = o.symbol AND s.date = o.last_date
+            )
+            """,
+            (list(symbols),),
+        ).fetchdf()['symbol'])
+    pending = [sym for sym in symbols if sym not in done]
+    up_to_date = [sym for sym in symbols if sym in done]
+    return pending, up_to_date
+
+# === Process pool workers (RUNNER_MODE=process) ===
+# Each worker process keeps one read-only OHLCV connection for its whole
+# lifetime and returns NumPy batches instead of per-symbol dicts.
+_worker_cons = {}
+
+def _init_pool_worker():
+    _worker_cons['ohlcv'] = storage.connect(OHLCV_DB)
+
+def process_shard(shard, plan, states=None):
+    """Score a list of symbols inside a pool worker.
+
+    Returns a dict of arrays: ``symbol``, ``date``, ``signals`` (one row per
+    processed symbol, one column per spec) plus the per-symbol messages and
+    any incremental state rows.
+    """
+    ohlcv_con = _worker_cons['ohlcv']
+    states = states or {}
+    specs = plan['items']
+    syms, dates, rows, messages, state_rows = [], [], [], [], []
+
+    def handle(sym, df, since):
+        if df is None or df.empty:
+            messages.append(f"{sym} | skipped (no data)")
+            return
+        last_date = df['date'].iloc[-1]
+        signals, new_states = score_symbol(ohlcv_con, sym, df, plan, states.get(sym), since)
+        rows.append(signals)
+        state_rows.extend(new_states)
+        syms.append(sym)
+        dates.append(last_date)
+        messages.append(f"{sym} | processed")
+
+    since_by_sym = {sym: incremental_since(specs, states.get(sym)) if INCREMENTAL else None for sym in shard}
+    fresh = [sym for sym in shard if since_by_sym[sym] is None]
+    streamed = set()
+    # One ordered scan for the shard's fresh windows
+    for sym, df in iter_symbol_frames(ohlcv_con, fresh, plan):
+        streamed.add(sym)
+        try:
+            handle(sym, df, None)
+        except Exception as e:
+            messages.append(f"{sym} | error: {str(e)}")
+    for sym in shard:
+        if sym in streamed:
+            continue
+        try:
+            since = since_by_sym[sym]
+            df = None if since is None else load_symbol_bars(ohlcv_con, sym, plan, since)
+            handle(sym, df, since)
+        except Exception as e:
+            messages.append(f"{sym} | error: {str(e)}")
+    return {
+        'symbol': np.array(syms, dtype=object),
+        'date': np.array(dates, dtype='datetime64[ns]'),
+        'signals': np.array(rows, dtype=np.float64).reshape(len(rows), len(specs)),
+        'messages': messages,
+        'states': state_rows,
+    }
+
+def shard_frame(batch, specs):
+    """Turn a worker's NumPy batch into signal rows (same columns as the thread path)."""
+    out = {'symbol': batch['symbol'], 'date': pd.to_datetime(batch['date'])}
+    for i, spec in enumerate(specs):
+        out[f"{spec['column']}_signal"] = batch['signals'][:, i]
+        out[f"{spec['column']}_weight"] = np.full(len(batch['symbol']), spec['weight'], dtype=float)
+    return pd.DataFrame(out)
+
+def run_process_pool(symbols, plan, writer, states=None, progress=None):
+    """Shard symbols across a process pool sized to the host (RUNNER_MODE=process).
+
+    Finished shards are handed to ``writer``; returns the per-symbol messages.
+    """
+    n_workers = int(os.getenv("RUBIKVIEW_WORKERS", "0")) or os.cpu_count() or 1
+    # Several small shards per worker keeps the pool balanced when some symbols
+    # have much longer histories than others.
+    n_shards = max(1, min(len(symbols), n_workers * 4))
+    shards = [symbols[i::n_shards] for i in range(n_shards)]
+    print(f"Runner mode: process ({n_workers} workers, {n_shards} shards)")
+    states = states or {}
+    messages = []
+    # Spawned, not forked: the signal writer thread already holds DuckDB state
+    # that a forked child would inherit mid-lock (spawn is also the Windows default).
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=ctx, initializer=_init_pool_worker) as executor:
+        futures = [
+            executor.submit(process_shard, shard, plan, {s: states[s] for s in shard if s in states})
+            for shard in shards
+        ]
+        for fut in as_completed(futures):
+            batch = fut.result()
+            for msg in batch['messages']:
+                messages.append(msg)
+                print(f"[{len(messages)}/{len(symbols)}] {msg}")
+                if progress:
+                    progress.record(message_outcome(msg), msg.split(" | ", 1)[0], msg)
+            # Each shard goes to the writer as soon as it lands
+            writer.put_frame(shard_frame(batch, plan['items']), batch['states'])
+            update_excel_progress(len(messages), len(symbols), messages)
+    return messages
+
+def run_batch(symbols, plan, writer):
+    """Score the whole universe in one cross-sectional pass (RUNNER_MODE=batch)."""
+    from batch_engine import load_universe, compute_signals
+
+    if not symbols:
+        return []
+    universe = load_universe(OHLCV_DB, symbols, plan['history_bars'])
+    print(f"Loaded {len(universe.pos)} bars for {len(universe)} symbols")
+    if not len(universe):
+        return []
+
+    df_signals = compute_signals(universe, plan['items'])
+    for start in range(0, len(df_signals), CHUNK_ROWS):
+        writer.put_frame(df_signals.iloc[start:start + CHUNK_ROWS])
+    return [f"{sym} | processed" for sym in df_signals['symbol']]
+
 def main():
     # Clear dashboard summary area at start (DO NOT clear K18 or summary table separately)
     if USE_EXCEL and xw is not None:
@@ -143,7 +463,7 @@ def main():
         print(f"FAST_MODE enabled -> limiting indicators to first {len(active_inds)} active rows")
 
     # Get symbols from OHLCV DB
-    with duckdb.connect(str(OHLCV_DB), read_only=True) as con:
+    with storage.connect(OHLCV_DB) as con:
         symbols = con.execute("SELECT DISTINCT symbol FROM yahoo_ohlcv").fetchdf()['symbol'].tolist()
     print(f"Symbols: {len(symbols)}")
     if FAST_MODE and len(symbols) > 500:
@@ -152,101 +472,56 @@ def main():
         symbols = symbols[:500]
         print(f"FAST_MODE enabled -> limiting symbols to first {len(symbols)}")
 
-    # Prep signals DB
-    with duckdb.connect(str(SIGNALS_DB)) as con:
-        con.execute("""
-            CREATE TABLE IF NOT EXISTS signals (
-                symbol VARCHAR,
-                date DATE
-            )
-        """)
-
-    # Indicator calculation map (unchanged)
-    def calculate_indicator(name, df, p1, p2, p3):
-        if name == "RSI":
-            return calculate_rsi(df['Close'], int(p1))
-        elif name == "MFI":
-            return calculate_mfi(df['High'], df['Low'], df['Close'], df['Volume'], int(p1))
-        elif name == "CCI":
-            return calculate_cci(df['High'], df['Low'], df['Close'], int(p1))
-        elif name == "StochRSI":
-            return calculate_stochrsi(df['Close'], int(p1), int(p2), int(p3))
-        elif name == "ROC":
-            return calculate_roc(df['Close'], int(p1))
-        elif name == "MACD":
-            return calculate_macd(df['Close'], int(p1), int(p2), int(p3))
-        elif name == "EMA Crossover":
-            return calculate_ema_crossover(df['Close'], int(p1), int(p2))
-        elif name == "SMA Crossover":
-            return calculate_sma_crossover(df['Close'], int(p1), int(p2))
-        elif name == "ATR":
-            return calculate_atr(df['High'], df['Low'], df['Close'], int(p1))
-        elif name == "Williams %R":
-            return calculate_williams_r(df['High'], df['Low'], df['Close'], int(p1))
-        elif name == "ADX":
-            return calculate_adx(df['High'], df['Low'], df['Close'], int(p1))
-        elif name == "VWAP":
-            return calculate_vwap(df)
-        elif name == "SuperTrend":
-            return calculate_supertrend(df, int(p1), float(p2))
-        elif name == "Parabolic SAR":
-            return calculate_parabolic_sar(df['High'], df['Low'], float(p1), float(p2), float(p3))
-        elif name == "Ichimoku":
-            return calculate_ichimoku(df, int(p1), int(p2), int(p3))
-        elif name == "Bollinger Bands":
-            return calculate_bollinger(df['Close'], int(p1), float(p2))
-        elif name == "Donchian Channel":
-            return calculate_donchian(df['High'], df['Low'], int(p1))
-        elif name == "Keltner Channel":
-            return calculate_keltner(df, int(p1))
-        elif name == "VMA":
-            return calculate_vma(df['Volume'], int(p1)) 
-        elif name == "OBV":
-            return calculate_obv(df['Close'], df['Volume'])
-        elif name == "ADL":
-            return calculate_adl(df['High'], df['Low'], df['Close'], df['Volume'])
-        else:
-            return np.nan
-
     # Main per-symbol worker
-    def process_symbol(sym):
+    # Each worker thread reuses one cursor on the job's shared OHLCV connection
+    thread_cons = threading.local()
+
+    def thread_con():
+        if not hasattr(thread_cons, 'con'):
+            thread_cons.con = ohlcv_con.cursor()
+        return thread_cons.con
+
+    def process_symbol(sym, df=None):
         try:
-            with duckdb.connect(str(OHLCV_DB), read_only=True) as con:
-                df = con.execute(
-                    "SELECT date, open, high, low, close, adj_close, volume FROM yahoo_ohlcv WHERE symbol=? ORDER BY date",
-                    (sym,)
-                ).fetchdf()
-            if df.empty:
-                return None, f"{sym} | skipped (no data)"
+            since = since_by_sym[sym]
+            con = thread_con()
+            if since is not None:
+                df = load_symbol_bars(con, sym, plan, since)
+            if df is None or df.empty:
+                return None, f"{sym} | skipped (no data)", []
             last_date = df['date'].iloc[-1]
-            with duckdb.connect(str(SIGNALS_DB)) as con:
-                already = con.execute("SELECT COUNT(*) FROM signals WHERE symbol=? AND date=?", (sym, last_date)).fetchone()[0]
-            if already:
-                return None, f"{sym} | up-to-date"
-            df = df.rename(columns={'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'})
+            signals, new_states = score_symbol(con, sym, df, plan, states.get(sym), since)
             row = {'symbol': sym, 'date': last_date}
-            for _, ind in active_inds.iterrows():
-                name = ind['Indicator_Name']
-                p1 = ind['Parameter_1'] if not pd.isnull(ind['Parameter_1']) else None
-                p2 = ind['Parameter_2'] if not pd.isnull(ind['Parameter_2']) else None
-                p3 = ind['Parameter_3'] if not pd.isnull(ind['Parameter_3']) else None
-                mweight = float(ind['Manual_Weight']) if not pd.isnull(ind['Manual_Weight']) else 1.0
-                use_ai  = str(ind['Use_AI_Weight']).upper() == "Y"
-                aiweight = float(ind['AI_Latest_Weight']) if not pd.isnull(ind['AI_Latest_Weight']) else mweight
-                weight = aiweight if use_ai else mweight
-                try:
-                    signal = calculate_indicator(name, df, p1, p2, p3)
-                except Exception as ee:
-                    signal = np.nan
-                icol = name.lower().replace(" ", "_").replace("%", "pct")
-                row[f"{icol}_signal"] = signal   # store as float, not int!
-                row[f"{icol}_weight"] = weight
-            return row, f"{sym} | processed"
+            for spec, signal in zip(specs, signals):
+                row[f"{spec['column']}_signal"] = signal   # store as float, not int!
+                row[f"{spec['column']}_weight"] = spec['weight']
+            return row, f"{sym} | processed", new_states
         except Exception as e:
-            return None, f"{sym} | error: {str(e)}"
+            return None, f"{sym} | error: {str(e)}", []
+
+    plan = compile_plan(active_inds)
+    specs = plan['items']
+    print(f"Plan: columns={plan['columns']}, history_bars={plan['history_bars'] or 'full'}, "
+          f"norm_window={NORM_WINDOW or 'all loaded bars'}")
+
+    # Prep signals DB (schema changes happen here, never in the write path)
+    init_signals_storage(SIGNALS_DB, specs)
+
+    # Schedule only symbols whose latest bar has no signals row yet
+    all_symbols = symbols
+    symbols, up_to_date = diff_pending(all_symbols)
+    print(f"Pending: {len(symbols)} symbols ({len(up_to_date)} already up-to-date)")
+
+    # Counters for the job runner (see progress.py); up-to-date symbols count as done
+    progress = ProgressChannel(len(all_symbols))
+    progress.update(counts={"uptodate": len(up_to_date)}, force=True)
+
+    states = {}
+    if INCREMENTAL and RUNNER_MODE != "batch" and symbols:
+        states = load_states(SIGNALS_DB, symbols)
+        print(f"Incremental mode: loaded stored state for {len(states)} symbols")
 
     # FAST PARALLEL EXECUTION
-    results = []
     messages = []
     N_THREADS = 20
     UPDATE_FREQ = 10  # update summary in Excel every 10 symbols
@@ -255,22 +530,65 @@ def main():
         # often improves effective throughput for mixed IO/CPU work.
         N_THREADS = 12
         UPDATE_FREQ = 25
+    # Symbols submitted to the thread pool but not yet collected
+    MAX_IN_FLIGHT = N_THREADS * 2
 
-    with ThreadPoolExecutor(max_workers=N_THREADS) as executor:
-        futures = {executor.submit(process_symbol, sym): sym for sym in symbols}
-        done = 0
-        for fut in as_completed(futures):
-            row, msg = fut.result()
-            done += 1
-            print(f"[{done}/{len(symbols)}] {msg}")
-            if row is not None:
-                results.append(row)
-            messages.append(msg)
-            if done % UPDATE_FREQ == 0 or done == len(symbols):
-                update_excel_progress(done, len(symbols), messages)
+    # Results stream to a single writer thread that commits every CHUNK_ROWS
+    # rows, so a crashed run resumes from the last committed chunk.
+    writer = SignalWriter(SIGNALS_DB, specs)
+    with writer:
+        if RUNNER_MODE == "batch":
+            print("Runner mode: batch (cross-sectional)")
+            messages = run_batch(symbols, plan, writer)
+            for done, msg in enumerate(messages, start=1):
+                print(f"[{done}/{len(symbols)}] {msg}")
+                progress.record(message_outcome(msg), msg.split(" | ", 1)[0], msg)
+        elif RUNNER_MODE == "process":
+            messages = run_process_pool(symbols, plan, writer, states, progress)
+        else:
+            since_by_sym = {sym: incremental_since(specs, states.get(sym)) if INCREMENTAL else None for sym in symbols}
+            with storage.connect(OHLCV_DB) as ohlcv_con, \
+                    ThreadPoolExecutor(max_workers=N_THREADS) as executor:
+                # Fresh windows stream out of one ordered scan and are scored as they
+                # arrive; symbols resuming from stored state read their own tail.
+                fresh = [sym for sym in symbols if since_by_sym[sym] is None]
+
+                def work():
+                    streamed = set()
+                    for sym, df in iter_symbol_frames(ohlcv_con, fresh, plan):
+                        streamed.add(sym)
+                        yield sym, df
+                    for sym in symbols:
+                        if sym not in streamed:
+                            yield sym, None
+
+                def collect(finished):
+                    nonlocal done
+                    for fut in finished:
+                        sym = futures.pop(fut)
+                        row, msg, new_states = fut.result()
+                        done += 1
+                        print(f"[{done}/{len(symbols)}] {msg}")
+                        progress.record(message_outcome(msg), sym, msg)
+                        if row is not None:
+                            writer.put_row(row, new_states)
+                        messages.append(msg)
+                        if done % UPDATE_FREQ == 0 or done == len(symbols):
+                            update_excel_progress(done, len(symbols), messages)
+
+                # Submit in a sliding window so at most MAX_IN_FLIGHT frames are
+                # held at once; the scan pauses while the workers catch up.
+                futures = {}
+                done = 0
+                for sym, df in work():
+                    futures[executor.submit(process_symbol, sym, df)] = sym
+                    if len(futures) >= MAX_IN_FLIGHT:
+                        collect(wait(futures, return_when=FIRST_COMPLETED)[0])
+                collect(as_completed(list(futures)))
 
     print("[OK] Done.")
-    update_excel_progress(len(symbols), len(symbols), messages)   # Final update
+    messages = [f"{sym} | up-to-date" for sym in up_to_date] + messages
+    update_excel_progress(len(all_symbols), len(all_symbols), messages)   # Final update
 
     # FORCE EXCEL RECALC (optional, helps show correct numbers immediately)
     try:
@@ -280,25 +598,13 @@ def main():
     except Exception:
         pass
 
-    # INSERT TO SIGNALS DB
-    if results:
-        df_signals = pd.DataFrame(results)
-        with duckdb.connect(str(SIGNALS_DB)) as con:
-            dbcols = [c[1] for c in con.execute("PRAGMA table_info('signals')").fetchall()]
-            for c in df_signals.columns:
-                if c not in dbcols:
-                    if c.endswith("_weight"):
-                        con.execute(f"ALTER TABLE signals ADD COLUMN {c} DOUBLE")
-                    elif c.endswith("_signal"):
-                        con.execute(f"ALTER TABLE signals ADD COLUMN {c} DOUBLE")
-                    else:
-                        con.execute(f"ALTER TABLE signals ADD COLUMN {c} VARCHAR")
-            con.register("batch", df_signals)
-            con.execute("INSERT INTO signals SELECT * FROM batch")
-            con.unregister("batch")
-        print("[OK] All signals saved to signals.duckdb.")
+    if writer.rows_written:
+        target = "Parquet signals dataset" if storage.use_parquet() else "signals.duckdb"
+        summary = f"[OK] {writer.rows_written} signal rows saved to {target}."
     else:
-        print("[WARN] No new signals to insert.")
+        summary = "[WARN] No new signals to insert."
+    print(summary)
+    progress.close(summary)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,564 @@
+"""
+Streaming indicator state for incremental signal runs.
+
+Recursive indicators (Wilder RSI/ATR, EMAs, MACD) and cumulative ones
+(OBV, ADL, VWAP) only need a handful of accumulators to produce the next
+value. This module keeps those accumulators per (symbol, indicator, params)
+in the ``indicator_state`` table of signals.duckdb so a nightly run can
+advance them by just the bars appended since the last run instead of
+recomputing six years of history.
+
+The update rules follow TA-Lib's own seeding (SMA seed for EMA/ATR, summed
+gains/losses for RSI, MACD's aligned fast/slow start), so a state built
+from scratch reproduces the full-history ``calculate_*`` scores. A state
+built from scratch is seeded from the vectorised TA-Lib / NumPy series in
+one call (``seed``); only the bars appended since then go through
+``update`` one at a time.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+
+import duckdb
+import numpy as np
+import pandas as pd
+import talib
+
+from indicators import NORM_WINDOW, _norm
+
+
+def _is_zero(v):
+    # Same tolerance TA-Lib uses (TA_IS_ZERO)
+    return -0.00000000000001 < v < 0.00000000000001
+
+
+def _clip(v, lo, hi):
+    return max(lo, min(hi, v))
+
+
+def _ratio_score(val, vmax, lo=-100, hi=100):
+    if vmax is None or vmax == 0 or np.isnan(vmax):
+        return 0
+    if val is None:
+        return np.nan
+    return _clip(val / vmax * 100, lo, hi)
+
+
+def _track_max(state, key, value):
+    """Running ``np.nanmax`` over a derived series."""
+    if value is None or np.isnan(value):
+        return
+    value = abs(value)
+    if state[key] is None or value > state[key]:
+        state[key] = value
+
+
+def _abs_max(values):
+    """``_track_max`` over a whole series: largest absolute non-NaN value, or None."""
+    values = np.abs(np.asarray(values, dtype=np.float64))
+    values = values[~np.isnan(values)]
+    return float(values.max()) if len(values) else None
+
+
+def _last(values):
+    """Last value of a series, or None while it is still undefined (empty or NaN)."""
+    if not len(values) or np.isnan(values[-1]):
+        return None
+    return float(values[-1])
+
+
+def _ema_init():
+    return {'n': 0, 'sum': 0.0, 'value': None}
+
+
+def _ema_seed(x, period):
+    """EMA state after ``_ema_update`` over all of ``x``, plus TA-Lib's EMA series."""
+    if len(x) < period:
+        # Python's sum adds left to right, like the per-bar seed
+        return {'n': len(x), 'sum': sum(x.tolist(), 0.0), 'value': None}, np.full(len(x), np.nan)
+    ema = talib.EMA(x, timeperiod=period)
+    return {'n': period, 'sum': sum(x[:period].tolist(), 0.0), 'value': float(ema[-1])}, ema
+
+
+def _ema_update(st, x, period):
+    """TA-Lib EMA: SMA of the first ``period`` inputs, then the k = 2/(n+1) recursion."""
+    if st['value'] is None:
+        st['sum'] += x
+        st['n'] += 1
+        if st['n'] == period:
+            st['value'] = st['sum'] / period
+    else:
+        st['value'] = ((x - st['value']) * (2.0 / (period + 1))) + st['value']
+    return st['value']
+
+
+class StreamingIndicator:
+    """Base class: a JSON-serialisable ``state`` dict advanced one bar at a time."""
+
+    # Scored against a running max over the whole history
+    ratio_scaled = True
+
+    def __init__(self, params, state=None):
+        self.params = params
+        self.state = state if state is not None else self.initial_state()
+
+    def initial_state(self):
+        return {}
+
+    def update(self, high, low, close, volume):
+        raise NotImplementedError
+
+    def seed(self, high, low, close, volume):
+        """Build the state from scratch over whole float64 arrays.
+
+        Subclasses compute it from the vectorised series; this fallback
+        feeds the bars one at a time.
+        """
+        for h, l, c, v in zip(high, low, close, volume):
+            self.update(float(h), float(l), float(c), float(v))
+
+    def score(self):
+        raise NotImplementedError
+
+
+class RSIState(StreamingIndicator):
+    ratio_scaled = False
+
+    def initial_state(self):
+        return {'prev': None, 'n': 0, 'gain': 0.0, 'loss': 0.0, 'value': None}
+
+    def update(self, high, low, close, volume):
+        st, period = self.state, self.params[0]
+        if st['prev'] is None:
+            st['prev'] = close
+            return
+        diff = close - st['prev']
+        st['prev'] = close
+        if st['value'] is None:
+            if diff < 0:
+                st['loss'] -= diff
+            else:
+                st['gain'] += diff
+            st['n'] += 1
+            if st['n'] < period:
+                return
+            st['gain'] /= period
+            st['loss'] /= period
+        else:
+            st['loss'] *= (period - 1)
+            st['gain'] *= (period - 1)
+            if diff < 0:
+                st['loss'] -= diff
+            else:
+                st['gain'] += diff
+            st['loss'] /= period
+            st['gain'] /= period
+        total = st['gain'] + st['loss']
+        st['value'] = 100 * (st['gain'] / total) if not _is_zero(total) else 0.0
+
+    def seed(self, high, low, close, volume):
+        st, period = self.state, self.params[0]
+        if not len(close):
+            return
+        st['prev'] = float(close[-1])
+        diff = np.diff(close)
+        gains = np.where(diff < 0, 0.0, diff)
+        losses = np.where(diff < 0, -diff, 0.0)
+        if len(diff) < period:
+            st['n'], st['gain'], st['loss'] = len(diff), sum(gains.tolist(), 0.0), sum(losses.tolist(), 0.0)
+            return
+        st['n'] = period
+        # Wilder smoothing after the summed seed is an EMA with alpha = 1 / period
+        smooth = lambda x: pd.Series(np.r_[sum(x[:period].tolist(), 0.0) / period, x[period:]]).ewm(
+            alpha=1.0 / period, adjust=False).mean().iloc[-1]
+        st['gain'], st['loss'] = float(smooth(gains)), float(smooth(losses))
+        total = st['gain'] + st['loss']
+        st['value'] = 100 * (st['gain'] / total) if not _is_zero(total) else 0.0
+
+    def score(self):
+        val = self.state['value']
+        if val is None or np.isnan(val):
+            return 0
+        if val <= 30:
+            return _norm(val, 0, 30)
+        if val >= 70:
+            return _norm(val, 70, 100)
+        return 0
+
+
+class EMACrossoverState(StreamingIndicator):
+    def initial_state(self):
+        return {'short': _ema_init(), 'long': _ema_init(), 'diff': None, 'max': None}
+
+    def update(self, high, low, close, volume):
+        st = self.state
+        short = _ema_update(st['short'], close, self.params[0])
+        long_ = _ema_update(st['long'], close, self.params[1])
+        if short is not None and long_ is not None:
+            st['diff'] = short - long_
+            _track_max(st, 'max', st['diff'])
+
+    def seed(self, high, low, close, volume):
+        st = self.state
+        st['short'], short = _ema_seed(close, self.params[0])
+        st['long'], long_ = _ema_seed(close, self.params[1])
+        diff = short - long_
+        st['diff'], st['max'] = _last(diff), _abs_max(diff)
+
+    def score(self):
+        return _ratio_score(self.state['diff'], self.state['max'])
+
+
+class MACDState(StreamingIndicator):
+    """TA-Lib MACD: both EMAs are seeded so their first values land on the same bar."""
+
+    def initial_state(self):
+        return {'bar': 0, 'fast': _ema_init(), 'slow': _ema_init(), 'signal': _ema_init(),
+                'diff': None, 'max': None}
+
+    def update(self, high, low, close, volume):
+        st = self.state
+        fast, slow, signal = self.params
+        if slow < fast:
+            fast, slow = slow, fast
+        slow_val = _ema_update(st['slow'], close, slow)
+        fast_val = None
+        # The fast EMA's SMA seed covers the last `fast` bars of the slow seed
+        if st['bar'] >= slow - fast:
+            fast_val = _ema_update(st['fast'], close, fast)
+        st['bar'] += 1
+        if slow_val is None or fast_val is None:
+            return
+        macd = fast_val - slow_val
+        sig = _ema_update(st['signal'], macd, signal)
+        if sig is not None:
+            st['diff'] = macd - sig
+            _track_max(st, 'max', st['diff'])
+
+    def seed(self, high, low, close, volume):
+        st = self.state
+        fast, slow, signal = self.params
+        if slow < fast:
+            fast, slow = slow, fast
+        st['bar'] = len(close)
+        st['slow'], slow_ema = _ema_seed(close, slow)
+        st['fast'], fast_ema = _ema_seed(close[slow - fast:], fast)
+        # Both EMAs are defined from bar slow - 1 on
+        macd = fast_ema[fast - 1:] - slow_ema[slow - 1:]
+        st['signal'], sig = _ema_seed(np.ascontiguousarray(macd), signal)
+        diff = macd - sig
+        st['diff'], st['max'] = _last(diff), _abs_max(diff)
+
+    def score(self):
+        return _ratio_score(self.state['diff'], self.state['max'])
+
+
+class ATRState(StreamingIndicator):
+    def initial_state(self):
+        return {'prev_close': None, 'n': 0, 'sum': 0.0, 'value': None, 'max': None}
+
+    def update(self, high, low, close, volume):
+        st, period = self.state, self.params[0]
+        prev_close = st['prev_close']
+        st['prev_close'] = close
+        if prev_close is None:
+            return
+        tr = high - low
+        tr = max(tr, abs(prev_close - high), abs(prev_close - low))
+        if st['value'] is None:
+            st['sum'] += tr
+            st['n'] += 1
+            if st['n'] == period:
+                st['value'] = st['sum'] / period
+        else:
+            st['value'] = (st['value'] * (period - 1) + tr) / period
+        if st['value'] is not None:
+            _track_max(st, 'max', st['value'])
+
+    def seed(self, high, low, close, volume):
+        st, period = self.state, self.params[0]
+        if not len(close):
+            return
+        st['prev_close'] = float(close[-1])
+        prev = close[:-1]
+        tr = np.maximum(high[1:] - low[1:], np.maximum(np.abs(prev - high[1:]), np.abs(prev - low[1:])))
+        if len(tr) < period:
+            st['n'], st['sum'] = len(tr), sum(tr.tolist(), 0.0)
+            return
+        atr = talib.ATR(high, low, close, timeperiod=period)
+        st['n'], st['sum'] = period, sum(tr[:period].tolist(), 0.0)
+        st['value'], st['max'] = _last(atr), _abs_max(atr)
+
+    def score(self):
+        return _ratio_score(self.state['value'], self.state['max'], 0, 100)
+
+
+class _ChangeState(StreamingIndicator):
+    """Cumulative series scored by its last one-bar change vs the largest change."""
+
+    def initial_state(self):
+        return {'bars': 0, 'value': None, 'diff': None, 'max': None}
+
+    def next_value(self, high, low, close, volume):
+        raise NotImplementedError
+
+    def series(self, high, low, close, volume):
+        """The whole cumulative series, as ``next_value`` would produce it."""
+        raise NotImplementedError
+
+    def update(self, high, low, close, volume):
+        st = self.state
+        value = self.next_value(high, low, close, volume)
+        if st['value'] is not None:
+            st['diff'] = value - st['value']
+            _track_max(st, 'max', st['diff'])
+        st['value'] = value
+        st['bars'] += 1
+
+    def seed(self, high, low, close, volume):
+        st = self.state
+        if not len(close):
+            return
+        values = self.series(high, low, close, volume)
+        diff = np.diff(values)
+        st['bars'], st['value'] = len(values), float(values[-1])
+        st['diff'] = float(diff[-1]) if len(diff) else None
+        st['max'] = _abs_max(diff)
+
+    def score(self):
+        # The per-symbol version reads iloc[-2] and fails (NaN) with one bar
+        if self.state['bars'] < 2:
+            return np.nan
+        return _ratio_score(self.state['diff'], self.state['max'])
+
+
+class OBVState(_ChangeState):
+    def initial_state(self):
+        st = super().initial_state()
+        st['prev_close'] = None
+        return st
+
+    def next_value(self, high, low, close, volume):
+        st = self.state
+        obv = volume if st['value'] is None else st['value']
+        if st['prev_close'] is not None:
+            if close > st['prev_close']:
+                obv += volume
+            elif close < st['prev_close']:
+                obv -= volume
+        st['prev_close'] = close
+        return obv
+
+    def series(self, high, low, close, volume):
+        self.state['prev_close'] = float(close[-1])
+        return talib.OBV(close, volume)
+
+
+class ADLState(_ChangeState):
+    def next_value(self, high, low, close, volume):
+        ad = 0.0 if self.state['value'] is None else self.state['value']
+        rng = high - low
+        if rng > 0.0:
+            ad += (((close - low) - (high - close)) / rng) * volume
+        return ad
+
+    def series(self, high, low, close, volume):
+        return talib.AD(high, low, close, volume)
+
+
+class VWAPState(StreamingIndicator):
+    def initial_state(self):
+        return {'cum_pv': 0.0, 'cum_vol': 0.0, 'dist': None, 'max': None}
+
+    def update(self, high, low, close, volume):
+        st = self.state
+        st['cum_pv'] += (high + low + close) / 3 * volume
+        st['cum_vol'] += volume
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vwap = np.float64(st['cum_pv']) / st['cum_vol']
+        st['dist'] = float(close - vwap)
+        _track_max(st, 'max', st['dist'])
+
+    def seed(self, high, low, close, volume):
+        st = self.state
+        if not len(close):
+            return
+        # Running sums in bar order, exactly as update() accumulates them
+        cum_pv = np.cumsum((high + low + close) / 3 * volume)
+        cum_vol = np.cumsum(volume)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dist = close - cum_pv / cum_vol
+        st['cum_pv'], st['cum_vol'] = float(cum_pv[-1]), float(cum_vol[-1])
+        st['dist'], st['max'] = float(dist[-1]), _abs_max(dist)
+
+    def score(self):
+        return _ratio_score(self.state['dist'], self.state['max'])
+
+
+# Keyed by registry name; params come pre-parsed from the compiled plan
+STREAMING_INDICATORS = {
+    "RSI": RSIState,
+    "EMA Crossover": EMACrossoverState,
+    "MACD": MACDState,
+    "ATR": ATRState,
+    "OBV": OBVState,
+    "ADL": ADLState,
+    "VWAP": VWAPState,
+}
+
+
+def is_streamable(spec):
+    if spec['name'] not in STREAMING_INDICATORS or spec['params'] is None:
+        return False
+    # A running max cannot honour a trailing normalisation window
+    return not (NORM_WINDOW > 0 and STREAMING_INDICATORS[spec['name']].ratio_scaled)
+
+
+def params_hash(spec):
+    payload = json.dumps([spec['name'], list(spec['params'])])
+    return hashlib.md5(payload.encode()).hexdigest()[:16]
+
+
+def _columns(df):
+    return [np.ascontiguousarray(df[c].to_numpy(float)) for c in ('High', 'Low', 'Close', 'Volume')]
+
+
+def _feed(indicator, df):
+    """Advance a resumed state by the (few) bars after its last date."""
+    for h, l, c, v in zip(*_columns(df)):
+        indicator.update(float(h), float(l), float(c), float(v))
+
+
+# ===== Persistence (signals.duckdb) =====
+
+def init_state_table(con):
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS indicator_state (
+            symbol VARCHAR,
+            indicator VARCHAR,
+            params_hash VARCHAR,
+            last_date DATE,
+            last_close DOUBLE,
+            state VARCHAR,
+            updated_at TIMESTAMP
+        )
+    """)
+
+
+def load_states(db_path, symbols=None):
+    """Read all stored states once: {symbol: {indicator: row}}."""
+    with duckdb.connect(str(db_path)) as con:
+        init_state_table(con)
+        df = con.execute(
+            "SELECT symbol, indicator, params_hash, last_date, last_close, state FROM indicator_state"
+        ).fetchdf()
+    if symbols is not None:
+        df = df[df['symbol'].isin(set(symbols))]
+    states = {}
+    for row in df.to_dict('records'):
+        states.setdefault(row['symbol'], {})[row['indicator']] = row
+    return states
+
+
+def write_states(con, rows):
+    """Replace the stored state of every (symbol, indicator) in ``rows`` on an open connection."""
+    if not rows:
+        return
+    df = pd.DataFrame(rows, columns=[
+        'symbol', 'indicator', 'params_hash', 'last_date', 'last_close', 'state', 'updated_at'
+    ])
+    con.register("new_state", df)
+    con.execute("""
+        DELETE FROM indicator_state
+        USING new_state n
+        WHERE indicator_state.symbol = n.symbol AND indicator_state.indicator = n.indicator
+    """)
+    con.execute("INSERT INTO indicator_state SELECT * FROM new_state")
+    con.unregister("new_state")
+
+
+def save_states(db_path, rows):
+    """Replace the stored state of every (symbol, indicator) in ``rows``."""
+    if not rows:
+        return
+    with duckdb.connect(str(db_path)) as con:
+        init_state_table(con)
+        write_states(con, rows)
+
+
+# ===== Incremental scoring =====
+
+def incremental_since(specs, sym_states):
+    """Earliest stored date the streamable specs resume from, or None when they need a window load.
+
+    Only streamable specs count: the others are scored on their own warm-up
+    window (``load_plain`` in ``score_incremental``), so they never force a
+    full load.
+    """
+    if not sym_states:
+        return None
+    dates = []
+    for spec in specs:
+        if not is_streamable(spec):
+            continue
+        row = sym_states.get(spec['name'])
+        if row is None or row['params_hash'] != params_hash(spec):
+            return None
+        dates.append(pd.Timestamp(row['last_date']))
+    return min(dates) if dates else None
+
+
+def _resume(spec, row, df):
+    """Rebuild the stored indicator and return the bars after its last date, or None if stale."""
+    if row is None or row['params_hash'] != params_hash(spec):
+        return None
+    at = df.index[df['date'] == pd.Timestamp(row['last_date'])]
+    # A missing or changed close on the stored date means history was back-adjusted
+    if not len(at) or not np.isclose(df.at[at[-1], 'Close'], row['last_close']):
+        return None
+    cls = STREAMING_INDICATORS[spec['name']]
+    return cls(spec['params'], json.loads(row['state'])), df.loc[at[-1] + 1:]
+
+
+def score_incremental(sym, specs, df, sym_states, load_full, score_frame, load_plain=None):
+    """Score all specs for one symbol, advancing stored state where possible.
+
+    ``df`` may be a tail of the history (see ``incremental_since``);
+    ``load_full()`` is only called when some state has to be rebuilt, and
+    ``load_plain()`` (default: ``load_full``) returns the bars the
+    non-streaming indicators are scored on. Returns the signals (in spec
+    order) and the new state rows to persist.
+    """
+    sym_states = sym_states or {}
+    full = [None]
+
+    def full_df():
+        if full[0] is None:
+            full[0] = load_full()
+        return full[0]
+
+    df = df.reset_index(drop=True)
+    last = df.iloc[-1]
+    # Naive UTC, like the rest of the TIMESTAMP columns
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    signals, new_rows = [], []
+    plain = [s for s in specs if not is_streamable(s)]
+    plain_scores = iter(score_frame((load_plain or full_df)(), plain)) if plain else iter(())
+    for spec in specs:
+        if not is_streamable(spec):
+            signals.append(next(plain_scores))
+            continue
+        try:
+            resumed = _resume(spec, sym_states.get(spec['name']), df)
+            if resumed is None:
+                indicator = STREAMING_INDICATORS[spec['name']](spec['params'])
+                indicator.seed(*_columns(full_df()))
+            else:
+                indicator, bars = resumed
+                _feed(indicator, bars)
+            signals.append(float(indicator.score()))
+            new_rows.append((sym, spec['name'], params_hash(spec), last['date'], float(last['Close']),
+                             json.dumps(indicator.state), now))
+        except Exception:
+            signals.append(np.nan)
+    return signals, new_rows
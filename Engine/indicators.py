@@ -1,15 +1,60 @@
+import os
 import talib
 import numpy as np
 import pandas as pd
 
+# Numba is optional: when installed, the recursive kernels below are compiled.
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - depends on environment
+    njit = None
+
+# Normalisation window: ratio-scaled scores divide by the largest value seen
+# over the last NORM_WINDOW bars (0 = every bar loaded for the symbol).
+NORM_WINDOW = int(os.getenv("RUBIKVIEW_NORM_WINDOW", "0"))
+
+def _window_max(x):
+    """``np.nanmax`` over the normalisation window (the trailing NORM_WINDOW bars)."""
+    x = np.asarray(x, dtype=np.float64)
+    if NORM_WINDOW > 0:
+        x = x[-NORM_WINDOW:]
+    if not len(x):
+        return np.nan
+    return np.nanmax(x)
+
 def _norm(val, lo, hi):
     """Normalize val between lo (=-100) and hi (=+100)"""
     if np.isnan(val):
         return 0
     return max(-100, min(100, 200 * (val - lo) / (hi - lo) - 100))
 
-def calculate_rsi(close, period):
-    s = talib.RSI(close, timeperiod=period)
+def _cached(cache, key, compute):
+    """Memoise an intermediate series in ``cache`` (a per-symbol dict) under ``key``.
+
+    Keys are ``(primitive, *params)`` tuples such as ``('atr', 14)``, so every
+    kernel scoring the same symbol shares one ATR(14) / RSI(14) / rolling max.
+    With ``cache=None`` the series is simply computed.
+    """
+    if cache is None:
+        return compute()
+    if key not in cache:
+        cache[key] = compute()
+    return cache[key]
+
+def _rsi(close, period, cache):
+    return _cached(cache, ('rsi', period), lambda: talib.RSI(close, timeperiod=period))
+
+def _atr(high, low, close, period, cache):
+    return _cached(cache, ('atr', period), lambda: talib.ATR(high, low, close, timeperiod=period))
+
+def _rolling(series, col, window, how, cache):
+    return _cached(cache, ('rolling_' + how, col, window), lambda: getattr(series.rolling(window=window), how)())
+
+def _typical_price(high, low, close, cache):
+    return _cached(cache, ('typical',), lambda: (high + low + close) / 3)
+
+def calculate_rsi(close, period, cache=None):
+    s = _rsi(close, period, cache)
     # RSI <30: strong buy (+100), RSI>70: strong sell (-100)
     val = s.iloc[-1]
     if np.isnan(val): return 0
@@ -38,8 +83,8 @@ def calculate_cci(high, low, close, period):
     val = s.iloc[-1]
     return np.clip(val, -100, 100)  # already bounded
 
-def calculate_stochrsi(close, rsi_period, k_period, d_period):
-    rsi = talib.RSI(close, timeperiod=rsi_period)
+def calculate_stochrsi(close, rsi_period, k_period, d_period, cache=None):
+    rsi = _rsi(close, rsi_period, cache)
     k = ((rsi - rsi.rolling(k_period).min()) /
          (rsi.rolling(k_period).max() - rsi.rolling(k_period).min())) * 100
     val = k.iloc[-1]
@@ -60,7 +105,7 @@ def calculate_macd(close, fastperiod, slowperiod, signalperiod):
     macd, macdsignal, _ = talib.MACD(close, fastperiod, slowperiod, signalperiod)
     # MACD minus Signal: scale to -100/+100
     v = macd.iloc[-1] - macdsignal.iloc[-1]
-    vmax = np.nanmax(np.abs(macd - macdsignal))
+    vmax = _window_max(np.abs(macd - macdsignal))
     if vmax == 0 or np.isnan(vmax): return 0
     return np.clip((v / vmax) * 100, -100, 100)
 
@@ -68,7 +113,7 @@ def calculate_ema_crossover(close, short_period, long_period):
     ema_short = talib.EMA(close, timeperiod=short_period)
     ema_long = talib.EMA(close, timeperiod=long_period)
     diff = ema_short.iloc[-1] - ema_long.iloc[-1]
-    vmax = np.nanmax(np.abs(ema_short - ema_long))
+    vmax = _window_max(np.abs(ema_short - ema_long))
     if vmax == 0 or np.isnan(vmax): return 0
     return np.clip((diff / vmax) * 100, -100, 100)
 
@@ -76,13 +121,14 @@ def calculate_sma_crossover(close, short_period, long_period):
     sma_short = talib.SMA(close, timeperiod=short_period)
     sma_long = talib.SMA(close, timeperiod=long_period)
     diff = sma_short.iloc[-1] - sma_long.iloc[-1]
-    vmax = np.nanmax(np.abs(sma_short - sma_long))
+    vmax = _window_max(np.abs(sma_short - sma_long))
     if vmax == 0 or np.isnan(vmax): return 0
     return np.clip((diff / vmax) * 100, -100, 100)
 
-def calculate_atr(high, low, close, period):
-    val = talib.ATR(high, low, close, timeperiod=period).iloc[-1]
-    vmax = np.nanmax(talib.ATR(high, low, close, timeperiod=period))
+def calculate_atr(high, low, close, period, cache=None):
+    atr = _atr(high, low, close, period, cache)
+    val = atr.iloc[-1]
+    vmax = _window_max(atr)
     if vmax == 0 or np.isnan(vmax): return 0
     return np.clip((val / vmax) * 100, 0, 100)
 
@@ -95,43 +141,109 @@ def calculate_adx(high, low, close, period):
     # 0 (weak trend), 100 (strong trend)
     return np.clip(val, 0, 100)
 
-def calculate_vwap(df):
-    pv = (df['High'] + df['Low'] + df['Close']) / 3 * df['Volume']
+def calculate_vwap(df, cache=None):
+    pv = _typical_price(df['High'], df['Low'], df['Close'], cache) * df['Volume']
     cum_pv = pv.cumsum()
     cum_vol = df['Volume'].cumsum()
     vwap = cum_pv / cum_vol
     val = df['Close'].iloc[-1] - vwap.iloc[-1]
-    vmax = np.nanmax(np.abs(df['Close'] - vwap))
+    vmax = _window_max(np.abs(df['Close'] - vwap))
     if vmax == 0 or np.isnan(vmax): return 0
     return np.clip((val / vmax) * 100, -100, 100)
 
-def calculate_supertrend(df, period=10, multiplier=3):
-    hl2 = (df['High'] + df['Low']) / 2
-    atr = talib.ATR(df['High'], df['Low'], df['Close'], timeperiod=period)
-    upperband = hl2 + (multiplier * atr)
-    lowerband = hl2 - (multiplier * atr)
-    st = pd.Series(index=df.index, dtype='float64')
-    st.iloc[0] = upperband.iloc[0]
-    for i in range(1, len(df)):
-        st.iloc[i] = lowerband.iloc[i] if df['Close'].iloc[i] > st.iloc[i-1] else upperband.iloc[i]
-    diff = df['Close'].iloc[-1] - st.iloc[-1]
-    vmax = np.nanmax(np.abs(df['Close'] - st))
+def _supertrend_loop(close, basic_upper, basic_lower):
+    """SuperTrend recursion with band carry-forward.
+
+    The final upper band only moves down (and the lower band only up) unless
+    price closed through it on the previous bar; the trend flips when the
+    close crosses the active band. Bars without an ATR yet are NaN and
+    restart the recursion.
+    """
+    n = len(close)
+    st = np.full(n, np.nan)
+    final_upper = np.full(n, np.nan)
+    final_lower = np.full(n, np.nan)
+    trend = np.zeros(n)
+    started = False
+    up = 0.0
+    lo = 0.0
+    d = -1.0
+    for i in range(n):
+        bu = basic_upper[i]
+        bl = basic_lower[i]
+        if np.isnan(bu) or np.isnan(bl):
+            started = False
+            continue
+        if not started:
+            up = bu
+            lo = bl
+            d = -1.0
+            started = True
+        else:
+            prev_close = close[i - 1]
+            if bu < up or prev_close > up:
+                up = bu
+            if bl > lo or prev_close < lo:
+                lo = bl
+        if d == -1.0 and close[i] > up:
+            d = 1.0
+        elif d == 1.0 and close[i] < lo:
+            d = -1.0
+        final_upper[i] = up
+        final_lower[i] = lo
+        trend[i] = d
+        st[i] = lo if d == 1.0 else up
+    return st, final_upper, final_lower, trend
+
+if njit is not None:
+    _supertrend_loop = njit(cache=True)(_supertrend_loop)
+
+def supertrend(high, low, close, period=10, multiplier=3, atr=None):
+    """Full SuperTrend series for charts and scoring.
+
+    Returns a DataFrame (same index as ``close``) with the active
+    ``supertrend`` line, the carried-forward ``upper``/``lower`` bands and
+    ``trend`` (+1 up, -1 down, 0 during warm-up). ``atr`` may be passed in
+    when the caller already has ATR(period).
+    """
+    h = np.asarray(high, dtype=np.float64)
+    l = np.asarray(low, dtype=np.float64)
+    c = np.ascontiguousarray(close, dtype=np.float64)
+    if atr is None:
+        atr = talib.ATR(h, l, c, timeperiod=period)
+    atr = np.asarray(atr, dtype=np.float64)
+    hl2 = (h + l) / 2
+    st, upper, lower, trend = _supertrend_loop(c, hl2 + multiplier * atr, hl2 - multiplier * atr)
+    index = close.index if isinstance(close, pd.Series) else None
+    return pd.DataFrame({'supertrend': st, 'upper': upper, 'lower': lower, 'trend': trend}, index=index)
+
+def supertrend_score(close, st):
+    """Distance of the last close from the SuperTrend line, scaled by the largest distance seen."""
+    dist = np.asarray(close, dtype=np.float64) - np.asarray(st, dtype=np.float64)
+    diff = dist[-1]
+    vmax = _window_max(np.abs(dist))
     if vmax == 0 or np.isnan(vmax): return 0
     return np.clip((diff / vmax) * 100, -100, 100)
 
+def calculate_supertrend(df, period=10, multiplier=3, cache=None):
+    atr = _atr(df['High'], df['Low'], df['Close'], period, cache) if cache is not None else None
+    st = supertrend(df['High'], df['Low'], df['Close'], period, multiplier, atr)
+    return supertrend_score(df['Close'], st['supertrend'])
+
 def calculate_parabolic_sar(high, low, af=0.02, max_af=0.2, init_af=0.02):
     psar = talib.SAR(high, low, acceleration=af, maximum=max_af)
     return np.clip(psar.iloc[-1], -100, 100)
 
-def calculate_ichimoku(df, conv=9, base=26, span=52):
-    high9 = df['High'].rolling(window=conv).max()
-    low9 = df['Low'].rolling(window=conv).min()
+def calculate_ichimoku(df, conv=9, base=26, span=52, cache=None):
+    high9 = _rolling(df['High'], 'High', conv, 'max', cache)
+    low9 = _rolling(df['Low'], 'Low', conv, 'min', cache)
     tenkan_sen = (high9 + low9) / 2
-    high26 = df['High'].rolling(window=base).max()
-    low26 = df['Low'].rolling(window=base).min()
+    high26 = _rolling(df['High'], 'High', base, 'max', cache)
+    low26 = _rolling(df['Low'], 'Low', base, 'min', cache)
     kijun_sen = (high26 + low26) / 2
     senkou_span_a = ((tenkan_sen + kijun_sen) / 2).shift(base)
-    senkou_span_b = ((df['High'].rolling(window=span).max() + df['Low'].rolling(window=span).min()) / 2).shift(base)
+    senkou_span_b = ((_rolling(df['High'], 'High', span, 'max', cache) +
+                      _rolling(df['Low'], 'Low', span, 'min', cache)) / 2).shift(base)
     close = df['Close'].iloc[-1]
     # Compare with span A & B
     above = close > senkou_span_a.iloc[-1] and close > senkou_span_b.iloc[-1]
@@ -150,17 +262,17 @@ def calculate_bollinger(close, period, num_std):
         pct = (val - mid) / (upper.iloc[-1] - lower.iloc[-1]) * 100
         return np.clip(pct, -100, 100)
 
-def calculate_donchian(high, low, period):
-    upper = high.rolling(window=period).max()
-    lower = low.rolling(window=period).min()
+def calculate_donchian(high, low, period, cache=None):
+    upper = _rolling(high, 'High', period, 'max', cache)
+    lower = _rolling(low, 'Low', period, 'min', cache)
     val = high.iloc[-1]
     pct = (val - lower.iloc[-1]) / (upper.iloc[-1] - lower.iloc[-1]) * 200 - 100
     return np.clip(pct, -100, 100)
 
-def calculate_keltner(df, period):
-    typical_price = (df['High'] + df['Low'] + df['Close']) / 3
+def calculate_keltner(df, period, cache=None):
+    typical_price = _typical_price(df['High'], df['Low'], df['Close'], cache)
     ema = typical_price.ewm(span=period, adjust=False).mean()
-    atr = talib.ATR(df['High'], df['Low'], df['Close'], timeperiod=period)
+    atr = _atr(df['High'], df['Low'], df['Close'], period, cache)
     upper = ema + 2 * atr
     lower = ema - 2 * atr
     val = df['Close'].iloc[-1]
@@ -170,7 +282,7 @@ def calculate_keltner(df, period):
 def calculate_obv(close, volume):
     obv = talib.OBV(close, volume)
     v = obv.iloc[-1] - obv.iloc[-2]
-    vmax = np.nanmax(np.abs(obv.diff()))
+    vmax = _window_max(np.abs(obv.diff()))
     if vmax == 0 or np.isnan(vmax): return 0
     return np.clip((v / vmax) * 100, -100, 100)
 
@@ -179,7 +291,7 @@ def calculate_vma(volume, period):
     ma = pd.Series(volume).rolling(window=period).mean()
     curr = volume.iloc[-1]
     avg = ma.iloc[-1]
-    vmax = ma.max()
+    vmax = _window_max(ma)
     if np.isnan(avg) or vmax == 0 or np.isnan(curr):
         return 0
     vma_score = (curr - avg) / vmax * 100
@@ -190,7 +302,116 @@ def calculate_adl(high, low, close, volume):
     adl = talib.AD(high, low, close, volume)
     # Change from previous day as a signal
     val = adl.iloc[-1] - adl.iloc[-2]
-    vmax = np.nanmax(np.abs(adl.diff()))
+    vmax = _window_max(np.abs(adl.diff()))
     if vmax == 0 or np.isnan(vmax): return 0
     return np.clip((val / vmax) * 100, -100, 100)
 
+
+# ===== Indicator registry =====
+# Declarative description of every indicator the runner can compute. The
+# runner compiles the active config against this once per job (see
+# indicator_runner.compile_plan) instead of dispatching on names per symbol.
+
+class IndicatorDef:
+    """Kernel plus the metadata needed to plan a run.
+
+    kernel  -- ``kernel(df, *params, cache=None)`` returning the -100..100
+               score; ``cache`` is the per-symbol dict shared by all kernels
+    inputs  -- OHLCV columns the kernel reads (lower-case table names)
+    params  -- ``(name, type, default)`` per config slot Parameter_1..3;
+               a default of None makes the slot required
+    warmup  -- ``warmup(*params)`` bars needed before the last value is defined
+    """
+
+    def __init__(self, kernel, inputs, params=(), warmup=None):
+        self.kernel = kernel
+        self.inputs = tuple(inputs)
+        self.params = tuple(params)
+        self.warmup = warmup or (lambda *p: 1)
+
+    def parse_params(self, raw):
+        """Convert raw config values (Parameter_1..3) into typed kernel arguments."""
+        parsed = []
+        for (name, typ, default), value in zip(self.params, raw):
+            if value is None:
+                if default is None:
+                    raise ValueError(f"missing parameter '{name}'")
+                value = default
+            parsed.append(typ(value))
+        return tuple(parsed)
+
+
+HLC = ('high', 'low', 'close')
+HLCV = ('high', 'low', 'close', 'volume')
+
+INDICATORS = {
+    "RSI": IndicatorDef(
+        lambda df, p, cache=None: calculate_rsi(df['Close'], p, cache),
+        ('close',), [('period', int, None)], lambda p: p + 1),
+    "MFI": IndicatorDef(
+        lambda df, p, cache=None: calculate_mfi(df['High'], df['Low'], df['Close'], df['Volume'], p),
+        HLCV, [('period', int, None)], lambda p: p + 1),
+    "CCI": IndicatorDef(
+        lambda df, p, cache=None: calculate_cci(df['High'], df['Low'], df['Close'], p),
+        HLC, [('period', int, None)], lambda p: p),
+    "StochRSI": IndicatorDef(
+        lambda df, rp, kp, dp, cache=None: calculate_stochrsi(df['Close'], rp, kp, dp, cache),
+        ('close',), [('rsi_period', int, None), ('k_period', int, None), ('d_period', int, None)],
+        lambda rp, kp, dp: rp + kp),
+    "ROC": IndicatorDef(
+        lambda df, p, cache=None: calculate_roc(df['Close'], p),
+        ('close',), [('period', int, None)], lambda p: p + 1),
+    "MACD": IndicatorDef(
+        lambda df, f, s, sig, cache=None: calculate_macd(df['Close'], f, s, sig),
+        ('close',), [('fastperiod', int, None), ('slowperiod', int, None), ('signalperiod', int, None)],
+        lambda f, s, sig: max(f, s) + sig - 1),
+    "EMA Crossover": IndicatorDef(
+        lambda df, s, l, cache=None: calculate_ema_crossover(df['Close'], s, l),
+        ('close',), [('short_period', int, None), ('long_period', int, None)],
+        lambda s, l: max(s, l)),
+    "SMA Crossover": IndicatorDef(
+        lambda df, s, l, cache=None: calculate_sma_crossover(df['Close'], s, l),
+        ('close',), [('short_period', int, None), ('long_period', int, None)],
+        lambda s, l: max(s, l)),
+    "ATR": IndicatorDef(
+        lambda df, p, cache=None: calculate_atr(df['High'], df['Low'], df['Close'], p, cache),
+        HLC, [('period', int, None)], lambda p: p + 1),
+    "Williams %R": IndicatorDef(
+        lambda df, p, cache=None: calculate_williams_r(df['High'], df['Low'], df['Close'], p),
+        HLC, [('period', int, None)], lambda p: p),
+    "ADX": IndicatorDef(
+        lambda df, p, cache=None: calculate_adx(df['High'], df['Low'], df['Close'], p),
+        HLC, [('period', int, None)], lambda p: 2 * p),
+    "VWAP": IndicatorDef(
+        lambda df, cache=None: calculate_vwap(df, cache),
+        HLCV),
+    "SuperTrend": IndicatorDef(
+        lambda df, p, m, cache=None: calculate_supertrend(df, p, m, cache),
+        HLC, [('period', int, 10), ('multiplier', float, 3)], lambda p, m: p + 1),
+    "Parabolic SAR": IndicatorDef(
+        lambda df, af, max_af, init_af, cache=None: calculate_parabolic_sar(df['High'], df['Low'], af, max_af, init_af),
+        ('high', 'low'), [('af', float, 0.02), ('max_af', float, 0.2), ('init_af', float, 0.02)],
+        lambda *p: 2),
+    "Ichimoku": IndicatorDef(
+        lambda df, conv, base, span, cache=None: calculate_ichimoku(df, conv, base, span, cache),
+        HLC, [('conv', int, 9), ('base', int, 26), ('span', int, 52)],
+        lambda conv, base, span: max(conv, base, span) + base),
+    "Bollinger Bands": IndicatorDef(
+        lambda df, p, k, cache=None: calculate_bollinger(df['Close'], p, k),
+        ('close',), [('period', int, None), ('num_std', float, None)], lambda p, k: p),
+    "Donchian Channel": IndicatorDef(
+        lambda df, p, cache=None: calculate_donchian(df['High'], df['Low'], p, cache),
+        ('high', 'low'), [('period', int, None)], lambda p: p),
+    "Keltner Channel": IndicatorDef(
+        lambda df, p, cache=None: calculate_keltner(df, p, cache),
+        HLC, [('period', int, None)], lambda p: p + 1),
+    "VMA": IndicatorDef(
+        lambda df, p, cache=None: calculate_vma(df['Volume'], p),
+        ('volume',), [('period', int, None)], lambda p: p),
+    "OBV": IndicatorDef(
+        lambda df, cache=None: calculate_obv(df['Close'], df['Volume']),
+        ('close', 'volume'), warmup=lambda: 2),
+    "ADL": IndicatorDef(
+        lambda df, cache=None: calculate_adl(df['High'], df['Low'], df['Close'], df['Volume']),
+        HLCV, warmup=lambda: 2),
+}
@@ -0,0 +1,87 @@
+"""
+Streaming OHLCV reader for the signal runner.
+
+One query over adjusted_ohlcv, ordered by (symbol, date), is walked as Arrow
+record batches; each symbol's rows are cut out of the batches as zero-copy
+slices and only converted to a DataFrame once the symbol is complete. This
+replaces one connection + one planned query per symbol with a single scan,
+so the read side is bound by I/O rather than per-query overhead.
+
+pyarrow is optional: without it the same query is fetched with ``fetchdf``
+and split with a groupby.
+"""
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - depends on environment
+    pa = None
+
+# Rows per Arrow record batch pulled from DuckDB
+BATCH_ROWS = 1_000_000
+
+
+def window_query(symbols, plan):
+    """SQL + params for the plan's columns of ``symbols``, last ``history_bars`` rows each."""
+    cols = ", ".join(['symbol', 'date'] + plan['columns'])
+    query = f"SELECT {cols} FROM adjusted_ohlcv WHERE list_contains(?, symbol)"
+    params = [list(symbols)]
+    if plan['history_bars'] is not None:
+        query += " QUALIFY row_number() OVER (PARTITION BY symbol ORDER BY date DESC) <= ?"
+        params.append(plan['history_bars'])
+    query += " ORDER BY symbol, date"
+    return query, params
+
+
+def _to_frame(pieces):
+    table = pa.Table.from_batches(pieces).drop_columns(['symbol'])
+    return table.to_pandas(date_as_object=False)
+
+
+def _iter_arrow(con, query, params, batch_rows):
+    reader = con.execute(query, params).fetch_record_batch(batch_rows)
+    current, pieces = None, []
+    for batch in reader:
+        n = batch.num_rows
+        if not n:
+            continue
+        col = batch.column(0)
+        # Row offsets where the symbol changes inside this batch
+        cuts = []
+        if n > 1:
+            changed = pc.not_equal(col.slice(1), col.slice(0, n - 1))
+            cuts = (np.flatnonzero(changed.to_numpy(zero_copy_only=False)) + 1).tolist()
+        for start, end in zip([0] + cuts, cuts + [n]):
+            sym = col[start].as_py()
+            piece = batch.slice(start, end - start)
+            # Only the first run of a batch can continue the previous batch's symbol
+            if sym == current:
+                pieces.append(piece)
+                continue
+            if pieces:
+                yield current, _to_frame(pieces)
+            current, pieces = sym, [piece]
+    if pieces:
+        yield current, _to_frame(pieces)
+
+
+def _iter_pandas(con, query, params):
+    df = con.execute(query, params).fetchdf()
+    for sym, group in df.groupby('symbol', sort=False):
+        yield sym, group.drop(columns='symbol').reset_index(drop=True)
+
+
+def iter_symbol_frames(con, symbols, plan, batch_rows=BATCH_ROWS):
+    """Yield ``(symbol, DataFrame)`` for every symbol with bars, in symbol order.
+
+    Frames hold ``date`` plus the plan's OHLCV columns (lower-case), sorted by
+    date. Symbols without any bars are simply not yielded.
+    """
+    if not symbols:
+        return
+    query, params = window_query(symbols, plan)
+    if pa is None:
+        yield from _iter_pandas(con, query, params)
+    else:
+        yield from _iter_arrow(con, query, params, batch_rows)
@@ -0,0 +1,105 @@
+"""
+Machine-readable progress channel from the Engine / Data scripts to the
+backend job runner.
+
+The runner passes RUBIKVIEW_PROGRESS_FD to the script it starts:
+  <fd number> - write end of a pipe the runner reads (POSIX, via pass_fds)
+  stdout      - no side fd available (Windows): events go to stdout as
+                lines starting with PROGRESS_MARKER, which the runner
+                takes out of the job log
+  unset       - script run by hand: nothing is emitted
+
+Each event is one JSON object per line holding cumulative counters, not
+one per symbol, so the runner only keeps the latest snapshot:
+  {"event": "progress" | "done", "total": N, "done": n,
+   "counts": {"success": .., "failed": .., "skipped": .., "uptodate": ..},
+   "symbol": "...", "message": "...", "ts": <unix time>}
+Snapshots are throttled to one per ``interval`` seconds; the final one is
+always sent.
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+PROGRESS_ENV = "RUBIKVIEW_PROGRESS_FD"
+PROGRESS_MARKER = "@@progress "
+# Seconds between two emitted snapshots
+PROGRESS_INTERVAL = float(os.getenv("RUBIKVIEW_PROGRESS_INTERVAL", "0.25"))
+OUTCOMES = ("success", "failed", "skipped", "uptodate")
+
+
+class ProgressChannel:
+    """Cumulative counters of one run, emitted as throttled JSON snapshots."""
+
+    def __init__(self, total=0, interval=PROGRESS_INTERVAL):
+        self.total = total
+        self.interval = interval
+        self.counts = dict.fromkeys(OUTCOMES, 0)
+        # Last symbol / message seen, carried by every snapshot
+        self.symbol = None
+        self.message = None
+        self._last_emit = 0.0
+        self._lock = threading.Lock()
+        self._out = None
+        self._marker = ""
+        target = os.getenv(PROGRESS_ENV)
+        try:
+            if target == "stdout":
+                self._out, self._marker = sys.stdout, PROGRESS_MARKER
+            elif target:
+                self._out = os.fdopen(int(target), "w", buffering=1, encoding="utf-8")
+        except (OSError, ValueError):
+            self._out = None
+
+    def record(self, outcome, symbol=None, message=None):
+        """Count one symbol's ``outcome`` (one of OUTCOMES)."""
+        with self._lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+        self.update(symbol=symbol, message=message)
+
+    def update(self, counts=None, total=None, symbol=None, message=None, force=False):
+        """Replace counters (when given) and emit a snapshot if ``interval`` has passed."""
+        with self._lock:
+            if counts is not None:
+                self.counts.update({k: counts.get(k, 0) for k in OUTCOMES})
+            if total is not None:
+                self.total = total
+            if symbol is not None:
+                self.symbol = symbol
+            if message is not None:
+                self.message = message
+            now = time.time()
+            if not force and now - self._last_emit < self.interval:
+                return
+            self._last_emit = now
+            self._emit("progress", now)
+
+    def close(self, message=None):
+        with self._lock:
+            if message is not None:
+                self.message = message
+            self._emit("done", time.time())
+            if self._out is not None and self._out is not sys.stdout:
+                self._out.close()
+            self._out = None
+
+    def _emit(self, event, ts):
+        if self._out is None:
+            return
+        payload = {
+            "event": event,
+            "total": self.total,
+            "done": sum(self.counts.values()),
+            "counts": dict(self.counts),
+            "symbol": self.symbol,
+            "message": self.message,
+            "ts": ts,
+        }
+        try:
+            self._out.write(self._marker + json.dumps(payload) + "\n")
+            self._out.flush()
+        except (OSError, ValueError):
+            # Runner went away; keep the script running without progress
+            self._out = None
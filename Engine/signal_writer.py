@@ -0,0 +1,311 @@
+"""
+Streaming writer for signal rows.
+
+The runner used to keep every result in memory and insert them all at the
+end, so memory grew with the universe and a crash near the end lost the
+whole run. ``SignalWriter`` owns the only write connection to
+signals.duckdb on a dedicated thread: producers hand it rows or frames as
+they finish, and it commits them in fixed-size chunks (signal rows and
+their incremental state in one transaction).
+
+A restarted job resumes from what was committed: the runner's up-front
+diff (``indicator_runner.diff_pending``) skips symbols whose latest bar
+already has a signals row.
+
+Storage layouts (RUBIKVIEW_SIGNALS_LAYOUT):
+  wide - one ``signals`` table with ``<indicator>_signal`` / ``_weight``
+         columns, extended with ALTER TABLE when an indicator first appears
+  long - ``signal_values(symbol, date, indicator_id, params_hash, signal,
+         weight)``, appended in date order so DuckDB's per-row-group zone
+         maps prune by date. ``signals`` becomes a pivot view over it, so
+         readers keep their wide columns; adding or removing indicators only
+         replaces the view and never rewrites data.
+
+With RUBIKVIEW_STORAGE_BACKEND=parquet (see storage.py) each chunk of wide
+rows is added to the ``signals`` Parquet dataset as new files instead; the
+incremental state stays in signals.duckdb.
+"""
+import os
+import queue
+import threading
+
+import duckdb
+import pandas as pd
+
+import storage
+from indicator_state import init_state_table, params_hash, write_states
+
+# Signal rows per committed chunk
+CHUNK_ROWS = int(os.getenv("RUBIKVIEW_WRITE_CHUNK", "500"))
+SIGNALS_LAYOUT = os.getenv("RUBIKVIEW_SIGNALS_LAYOUT", "wide").strip().lower()
+# Table holding one row per (symbol, date) in the active layout
+SIGNALS_TABLE = "signal_values" if SIGNALS_LAYOUT == "long" else "signals"
+# Chunks' worth of work producers may queue ahead of the writer
+QUEUE_CHUNKS = 4
+
+
+# ===== Schema =====
+
+def _relation_type(con, name):
+    row = con.execute(
+        "SELECT table_type FROM information_schema.tables WHERE table_schema = 'main' AND table_name = ?",
+        (name,),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _refresh_signals_view(con):
+    """(Re)build the wide ``signals`` view from the registered indicator ids."""
+    ids = [r[0] for r in con.execute("SELECT indicator_id FROM signal_indicators ORDER BY first_seen, indicator_id").fetchall()]
+    cols = []
+    for ind in ids:
+        quoted = ind.replace("'", "''")
+        cols.append(f"max(signal) FILTER (WHERE indicator_id = '{quoted}') AS \"{ind}_signal\"")
+        cols.append(f"max(weight) FILTER (WHERE indicator_id = '{quoted}') AS \"{ind}_weight\"")
+    select = ", ".join(["symbol", "date"] + cols)
+    con.execute(f"CREATE OR REPLACE VIEW signals AS SELECT {select} FROM signal_values GROUP BY symbol, date")
+
+
+def _migrate_wide(con):
+    """Unpivot an existing wide ``signals`` table into signal_values (kept as ``signals_wide``)."""
+    cols = [c[1] for c in con.execute("PRAGMA table_info('signals')").fetchall()]
+    ids = [c[:-len("_signal")] for c in cols if c.endswith("_signal")]
+    for ind in ids:
+        weight = f'"{ind}_weight"' if f"{ind}_weight" in cols else "NULL"
+        con.execute(
+            f"""
+            INSERT INTO signal_values
+            SELECT symbol, date, ?, NULL, "{ind}_signal", {weight}
+            FROM signals ORDER BY date, symbol
+            """,
+            (ind,),
+        )
+        con.execute("INSERT INTO signal_indicators VALUES (?, now()) ON CONFLICT DO NOTHING", (ind,))
+    con.execute("ALTER TABLE signals RENAME TO signals_wide")
+    print(f"[OK] Migrated wide signals table ({len(ids)} indicators) to signal_values; original kept as signals_wide")
+
+
+def init_signals_storage(db_path, items):
+    """Create the signals storage for the active layout before any rows are written.
+
+    In the long layout this is also where schema changes happen: new
+    indicator ids from the plan ``items`` are registered and the ``signals``
+    view is rebuilt, once per job, outside the write path.
+    """
+    with duckdb.connect(str(db_path)) as con:
+        if storage.use_parquet():
+            # Rows go to the Parquet dataset; only the state table lives here
+            init_state_table(con)
+            return
+        if SIGNALS_LAYOUT != "long":
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS signals (
+                    symbol VARCHAR,
+                    date DATE
+                )
+            """)
+            return
+        con.execute("""
+            CREATE TABLE IF NOT EXISTS signal_values (
+                symbol VARCHAR,
+                date DATE,
+                indicator_id VARCHAR,
+                params_hash VARCHAR,
+                signal DOUBLE,
+                weight DOUBLE
+            )
+        """)
+        con.execute("""
+            CREATE TABLE IF NOT EXISTS signal_indicators (
+                indicator_id VARCHAR PRIMARY KEY,
+                first_seen TIMESTAMP
+            )
+        """)
+        if _relation_type(con, "signals") == "BASE TABLE":
+            _migrate_wide(con)
+        known = {r[0] for r in con.execute("SELECT indicator_id FROM signal_indicators").fetchall()}
+        new_ids = [item['column'] for item in items if item['column'] not in known]
+        for ind in dict.fromkeys(new_ids):
+            con.execute("INSERT INTO signal_indicators VALUES (?, now())", (ind,))
+        if new_ids or _relation_type(con, "signals") is None:
+            _refresh_signals_view(con)
+
+
+# ===== Row writers =====
+
+def write_signal_values(con, df_signals, items):
+    """Unpivot wide signal rows into signal_values, in (date, indicator, symbol) order."""
+    n = len(df_signals)
+    if not n:
+        return
+    parts = []
+    for item in items:
+        parts.append(pd.DataFrame({
+            'symbol': df_signals['symbol'].to_numpy(),
+            'date': pd.to_datetime(df_signals['date']).to_numpy(),
+            'indicator_id': item['column'],
+            'params_hash': params_hash(item) if item['params'] is not None else None,
+            'signal': df_signals[f"{item['column']}_signal"].to_numpy(dtype=float),
+            'weight': df_signals[f"{item['column']}_weight"].to_numpy(dtype=float),
+        }))
+    long_df = pd.concat(parts, ignore_index=True)
+    con.register("long_batch", long_df)
+    con.execute("""
+        INSERT INTO signal_values (symbol, date, indicator_id, params_hash, signal, weight)
+        SELECT symbol, CAST(date AS DATE), indicator_id, params_hash, signal, weight
+        FROM long_batch
+        ORDER BY date, indicator_id, symbol
+    """)
+    con.unregister("long_batch")
+
+
+def write_signals(con, df_signals):
+    """Append signal rows, adding any new indicator columns first."""
+    dbcols = [c[1] for c in con.execute("PRAGMA table_info('signals')").fetchall()]
+    for c in df_signals.columns:
+        if c not in dbcols:
+            if c.endswith("_weight"):
+                con.execute(f"ALTER TABLE signals ADD COLUMN {c} DOUBLE")
+            elif c.endswith("_signal"):
+                con.execute(f"ALTER TABLE signals ADD COLUMN {c} DOUBLE")
+            else:
+                con.execute(f"ALTER TABLE signals ADD COLUMN {c} VARCHAR")
+            dbcols.append(c)
+    # Align by name so the insert does not depend on the frame's column order
+    df_signals = df_signals.reindex(columns=dbcols)
+    con.register("batch", df_signals)
+    con.execute("INSERT INTO signals SELECT * FROM batch")
+    con.unregister("batch")
+
+
+class SignalWriter:
+    """Single writer thread that commits signal rows in chunks of ``chunk_rows``.
+
+    ``put_row`` takes one signal row dict (thread mode), ``put_frame`` a
+    DataFrame of rows (process / batch modes); both take the state rows to
+    persist with them. ``close()`` flushes the tail, stops the thread and
+    re-raises any write error. ``items`` (the plan items) are needed for
+    the long layout.
+    """
+
+    def __init__(self, db_path, items=None, chunk_rows=CHUNK_ROWS):
+        self.db_path = db_path
+        self.items = items or []
+        self.chunk_rows = max(1, chunk_rows)
+        self.rows_written = 0
+        self.error = None
+        self._queue = queue.Queue()
+        # Rows queued ahead of the writer, bounded so a slow disk applies
+        # back-pressure instead of buffering the universe
+        self.max_queued_rows = self.chunk_rows * QUEUE_CHUNKS
+        self._queued_rows = 0
+        self._space = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="signal-writer", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def put_row(self, row, state_rows=()):
+        self._put(('row', row, list(state_rows)), 1)
+
+    def put_frame(self, frame, state_rows=()):
+        """Queue ``frame`` in pieces of at most ``chunk_rows`` rows.
+
+        A whole shard never sits in the queue as one item; the state rows
+        travel with the last piece, so they are never committed ahead of
+        their signal rows.
+        """
+        n = len(frame)
+        if not n:
+            if state_rows:
+                self._put(('frame', frame, list(state_rows)), 0)
+            return
+        for start in range(0, n, self.chunk_rows):
+            last = start + self.chunk_rows >= n
+            piece = frame.iloc[start:start + self.chunk_rows]
+            self._put(('frame', piece, list(state_rows) if last else []), len(piece))
+
+    def _put(self, item, rows):
+        with self._space:
+            # An item larger than the bound still goes through on an empty queue
+            while (self.error is None and self._queued_rows
+                   and self._queued_rows + rows > self.max_queued_rows):
+                self._space.wait()
+            if self.error is not None:
+                raise RuntimeError(f"signal writer failed: {self.error}") from self.error
+            self._queued_rows += rows
+        self._queue.put(item)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if self.error is not None:
+            raise self.error
+        return self.rows_written
+
+    def _flush(self, con, rows, frames, state_rows):
+        if rows:
+            frames.append(pd.DataFrame(rows))
+        chunk = pd.concat(frames, ignore_index=True)
+        if storage.use_parquet():
+            # Files land first; a crash before the state commit only costs a
+            # full recompute of those symbols' state next run.
+            con.register("batch", chunk)
+            storage.append_parquet(con, "signals", "batch")
+            con.unregister("batch")
+        con.execute("BEGIN TRANSACTION")
+        try:
+            if not storage.use_parquet():
+                if SIGNALS_LAYOUT == "long":
+                    write_signal_values(con, chunk, self.items)
+                else:
+                    write_signals(con, chunk)
+            write_states(con, state_rows)
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        self.rows_written += len(chunk)
+        print(f"[WRITE] committed {len(chunk)} signal rows ({self.rows_written} total)")
+
+    def _run(self):
+        stopped = False
+        try:
+            with duckdb.connect(str(self.db_path)) as con:
+                init_state_table(con)
+                rows, frames, state_rows, pending = [], [], [], 0
+                while True:
+                    item = self._queue.get()
+                    if item is None:
+                        stopped = True
+                        break
+                    kind, payload, states = item
+                    with self._space:
+                        self._queued_rows -= 1 if kind == 'row' else len(payload)
+                        self._space.notify_all()
+                    if kind == 'row':
+                        rows.append(payload)
+                        pending += 1
+                    else:
+                        frames.append(payload)
+                        pending += len(payload)
+                    state_rows.extend(states)
+                    if pending >= self.chunk_rows:
+                        self._flush(con, rows, frames, state_rows)
+                        rows, frames, state_rows, pending = [], [], [], 0
+                if rows or frames:
+                    self._flush(con, rows, frames, state_rows)
+        except Exception as e:
+            with self._space:
+                self.error = e
+                # Wake producers waiting for space so they see the error
+                self._space.notify_all()
+            # Keep draining so producers never block on a dead writer; once the
+            # stop sentinel was taken (tail flush failed) there is nothing left
+            while not stopped and self._queue.get() is not None:
+                pass
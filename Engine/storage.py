@@ -0,0 +1,257 @@
+"""
+Storage backend selection for market data and signals.
+
+RUBIKVIEW_STORAGE_BACKEND:
+  duckdb  - (default) yahoo_ohlcv in stocks.duckdb, index_ohlcv in
+            index.duckdb, signals in signals.duckdb
+  parquet - the same tables as Hive-partitioned Parquet datasets under
+            Data/Parquet/<dataset>/, partitioned by RUBIKVIEW_PARQUET_PARTITION:
+              month    - year=YYYY/month=M (default)
+              exchange - exchange=NS|BO|OTHER (from the symbol suffix)
+
+Parquet writers only ever add files: each write is staged outside the
+dataset and its files are moved into place with an atomic rename, so
+readers never block on (or see half of) the nightly writer and finished
+partitions stay immutable and cacheable. Readers get ordinary views named
+like the DuckDB tables (``yahoo_ohlcv``, ``index_ohlcv``, ``signals``) over
+``read_parquet``, so existing SQL keeps working.
+
+Stored bars are not split-adjusted (see Data/OHCLV Data/ohlcv_ingest.py);
+price readers query the adjusted views instead (``adjusted_ohlcv``,
+``adjusted_index_ohlcv``), which join the bars with the per-symbol
+adjustment factors the loaders keep. With Parquet the factors are a
+single file per dataset under Data/Parquet/_factors/, replaced as a whole.
+
+Run ``python storage.py export`` once to copy the current DuckDB tables
+into the Parquet layout.
+"""
+import os
+import shutil
+import sys
+import uuid
+from pathlib import Path
+
+import duckdb
+
+STORAGE_BACKEND = os.getenv("RUBIKVIEW_STORAGE_BACKEND", "duckdb").strip().lower()
+PARQUET_PARTITION = os.getenv("RUBIKVIEW_PARQUET_PARTITION", "month").strip().lower()
+
+# Dataset name -> (view name, columns of an empty view before any file exists)
+DATASETS = {
+    "ohlcv": ("yahoo_ohlcv", [("symbol", "VARCHAR"), ("date", "DATE"), ("open", "DOUBLE"),
+                              ("high", "DOUBLE"), ("low", "DOUBLE"), ("close", "DOUBLE"),
+                              ("adj_close", "DOUBLE"), ("volume", "DOUBLE")]),
+    "index_ohlcv": ("index_ohlcv", [("symbol", "VARCHAR"), ("date", "DATE"), ("open", "DOUBLE"),
+                                    ("high", "DOUBLE"), ("low", "DOUBLE"), ("close", "DOUBLE"),
+                                    ("volume", "DOUBLE")]),
+    "signals": ("signals", [("symbol", "VARCHAR"), ("date", "DATE")]),
+}
+
+# Dataset -> view of its split- and dividend-adjusted bars
+ADJUSTED_VIEWS = {"ohlcv": "adjusted_ohlcv", "index_ohlcv": "adjusted_index_ohlcv"}
+ADJUSTED_COLUMNS = ("open", "high", "low", "close", "volume")
+
+PARTITIONS = {
+    "month": {"year": "year(date)", "month": "month(date)"},
+    "exchange": {
+        "exchange": "CASE WHEN symbol LIKE '%.NS' THEN 'NS' WHEN symbol LIKE '%.BO' THEN 'BO' ELSE 'OTHER' END",
+    },
+}
+
+
+def use_parquet():
+    return STORAGE_BACKEND == "parquet"
+
+
+def find_project_root():
+    """Find project root by looking for Data or backend folder"""
+    curr = Path(__file__).resolve()
+    for parent in [curr.parent] + list(curr.parents):
+        if (parent / "Data").exists() and (parent / "backend").exists():
+            return parent
+    raise FileNotFoundError(f"Could not find project root (Data/backend folders) in any parent directory of {curr}")
+
+
+PARQUET_ROOT = Path(os.getenv("RUBIKVIEW_PARQUET_ROOT") or find_project_root() / "Data" / "Parquet")
+
+
+def _sql_path(path):
+    return str(path).replace("\\", "/").replace("'", "''")
+
+
+def _partition_columns():
+    if PARQUET_PARTITION not in PARTITIONS:
+        raise ValueError(f"Unknown RUBIKVIEW_PARQUET_PARTITION '{PARQUET_PARTITION}' (use: {', '.join(PARTITIONS)})")
+    return PARTITIONS[PARQUET_PARTITION]
+
+
+def dataset_dir(dataset, root=None):
+    return Path(root or PARQUET_ROOT) / dataset
+
+
+def parquet_source(dataset, root=None):
+    """SQL for reading a dataset, without the Hive partition columns."""
+    path = _sql_path(dataset_dir(dataset, root) / "**" / "*.parquet")
+    hidden = ", ".join(_partition_columns())
+    return (
+        f"(SELECT * EXCLUDE ({hidden}) FROM read_parquet('{path}', "
+        f"hive_partitioning = true, union_by_name = true))"
+    )
+
+
+def create_view(con, dataset, root=None):
+    """Create (or replace) the view that reads ``dataset`` on ``con``; returns its name.
+
+    Plain (not TEMP) views, so cursors of an in-memory connection share them.
+    """
+    name, empty_columns = DATASETS[dataset]
+    if any(dataset_dir(dataset, root).rglob("*.parquet")):
+        con.execute(f"CREATE OR REPLACE VIEW {name} AS SELECT * FROM {parquet_source(dataset, root)}")
+    else:
+        cols = ", ".join(f"NULL::{typ} AS {col}" for col, typ in empty_columns)
+        con.execute(f"CREATE OR REPLACE VIEW {name} AS SELECT {cols} WHERE false")
+    return name
+
+
+def factors_path(dataset, root=None):
+    return Path(root or PARQUET_ROOT) / "_factors" / f"{dataset}.parquet"
+
+
+def create_adjusted_view(con, dataset, bars, factors=None):
+    """(Re)create the adjusted series view of ``dataset`` over relation ``bars``; returns its name.
+
+    ``factors`` is a relation shaped like ``adjustment_factors``; without
+    one the view passes the bars through (no corporate actions recorded).
+    """
+    name = ADJUSTED_VIEWS[dataset]
+    if factors is None:
+        con.execute(f"CREATE OR REPLACE VIEW {name} AS SELECT symbol, date, {', '.join(ADJUSTED_COLUMNS)} FROM {bars}")
+        return name
+    con.execute(f"""
+        CREATE OR REPLACE VIEW {name} AS
+        SELECT b.symbol, b.date,
+               b.open * coalesce(f.price_factor, 1) AS open,
+               b.high * coalesce(f.price_factor, 1) AS high,
+               b.low * coalesce(f.price_factor, 1) AS low,
+               b.close * coalesce(f.price_factor, 1) AS close,
+               b.volume * coalesce(f.volume_factor, 1) AS volume
+        FROM {bars} b
+        LEFT JOIN {factors} f
+          ON f.symbol = b.symbol AND b.date >= f.from_date AND b.date < f.to_date
+    """)
+    return name
+
+
+def write_factors(con, dataset, relation, root=None):
+    """Replace the dataset's factors file with the rows of ``relation`` in one atomic rename."""
+    root = Path(root or PARQUET_ROOT)
+    target = factors_path(dataset, root)
+    staging = root / "_staging" / f"{dataset}-factors-{uuid.uuid4().hex}.parquet"
+    staging.parent.mkdir(parents=True, exist_ok=True)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    con.execute(f"COPY (SELECT * FROM {relation} ORDER BY symbol, from_date) TO '{_sql_path(staging)}' (FORMAT PARQUET)")
+    os.replace(staging, target)
+
+
+def _needs_passthrough(con, dataset):
+    """A DuckDB file with the dataset's price bars but no adjusted view yet."""
+    table = DATASETS[dataset][0]
+    relations = set(con.execute(
+        "SELECT table_name FROM information_schema.tables WHERE table_schema = 'main'"
+    ).fetchdf()['table_name'])
+    if ADJUSTED_VIEWS[dataset] in relations or table not in relations:
+        return False
+    columns = {r[1] for r in con.execute(f"PRAGMA table_info('{table}')").fetchall()}
+    return set(ADJUSTED_COLUMNS) <= columns
+
+
+def _attached(db_path, dataset):
+    """In-memory connection over a read-only attach of ``db_path``, with a pass-through adjusted view.
+
+    For DuckDB files the loaders have not yet given an adjusted view: their
+    bars still carry Yahoo's adjustment. Plain views on the in-memory
+    database, so cursors of the connection see them too.
+    """
+    table = DATASETS[dataset][0]
+    con = duckdb.connect()
+    con.execute(f"ATTACH '{_sql_path(db_path)}' AS stored (READ_ONLY)")
+    con.execute(f"CREATE VIEW {table} AS SELECT * FROM stored.main.{table}")
+    create_adjusted_view(con, dataset, table)
+    return con
+
+
+def connect(db_path, dataset="ohlcv"):
+    """Read-only connection on which the dataset's table and adjusted view resolve for either backend."""
+    if not use_parquet():
+        con = duckdb.connect(str(db_path), read_only=True)
+        if dataset not in ADJUSTED_VIEWS or not _needs_passthrough(con, dataset):
+            return con
+        con.close()
+        return _attached(db_path, dataset)
+    con = duckdb.connect()
+    name = create_view(con, dataset)
+    if dataset in ADJUSTED_VIEWS:
+        factors = factors_path(dataset)
+        source = f"read_parquet('{_sql_path(factors)}')" if factors.exists() else None
+        create_adjusted_view(con, dataset, name, source)
+    return con
+
+
+def append_parquet(con, dataset, relation, root=None):
+    """Add the rows of ``relation`` (a table, view or registered frame on ``con``) to ``dataset``.
+
+    Files are written to a private staging directory first and then renamed
+    into the dataset's partition directories, one atomic rename per file.
+    Returns the number of files added.
+    """
+    parts = _partition_columns()
+    root = Path(root or PARQUET_ROOT)
+    staging = root / "_staging" / f"{dataset}-{uuid.uuid4().hex}"
+    staging.parent.mkdir(parents=True, exist_ok=True)
+    # Frames from pandas carry timestamps; the datasets store plain dates
+    select = ", ".join(["* REPLACE (CAST(date AS DATE) AS date)"] + [f"{expr} AS {col}" for col, expr in parts.items()])
+    con.execute(f"""
+        COPY (SELECT {select} FROM {relation} ORDER BY symbol, date)
+        TO '{_sql_path(staging)}'
+        (FORMAT PARQUET, PARTITION_BY ({', '.join(parts)}), FILENAME_PATTERN 'part-{{uuid}}')
+    """)
+    added = 0
+    target = dataset_dir(dataset, root)
+    for f in staging.rglob("*.parquet"):
+        dest = target / f.relative_to(staging)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(f, dest)
+        added += 1
+    shutil.rmtree(staging, ignore_errors=True)
+    return added
+
+
+def export_duckdb(root=None):
+    """One-off copy of the DuckDB tables into the Parquet layout."""
+    project = find_project_root()
+    sources = [
+        ("ohlcv", project / "Data" / "OHCLV Data" / "stocks.duckdb", "yahoo_ohlcv"),
+        ("index_ohlcv", project / "Data" / "OHCLV Data" / "index.duckdb", "index_ohlcv"),
+        ("signals", project / "Data" / "Signals Data" / "signals.duckdb", "signals"),
+    ]
+    for dataset, db_path, table in sources:
+        if not db_path.exists():
+            print(f"[SKIP] {db_path.name}: not found")
+            continue
+        if any(dataset_dir(dataset, root).rglob("*.parquet")):
+            print(f"[SKIP] {dataset}: Parquet dataset already has files")
+            continue
+        with duckdb.connect(str(db_path), read_only=True) as con:
+            tables = con.execute("SHOW TABLES").fetchdf()['name'].tolist()
+            if table not in tables:
+                print(f"[SKIP] {db_path.name}: no {table} table")
+                continue
+            files = append_parquet(con, dataset, table, root)
+        print(f"[OK] {table} -> {dataset_dir(dataset, root)} ({files} files)")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["export"]:
+        export_duckdb()
+    else:
+        print("usage: python storage.py export")
@@ -0,0 +1,143 @@
+"""
+Fixtures for the Engine tests.
+
+Engine modules import each other flat (``import storage``) and resolve
+their database paths from the project root, so end-to-end runs happen in a
+throwaway copy of the project: ``Data/`` and ``backend/`` mark the root,
+``Engine/`` is copied in and its scripts are run as subprocesses.
+"""
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+ENGINE_DIR = Path(__file__).resolve().parents[1]
+LOADER_DIR = ENGINE_DIR.parent / "Data" / "OHCLV Data"
+# Scripts imported in-process must not reach for Excel
+os.environ.setdefault("RUBIKVIEW_DISABLE_EXCEL", "1")
+for path in (ENGINE_DIR, LOADER_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+# (name, parameter_1, parameter_2, parameter_3) rows for indicator_configs
+DEFAULT_INDICATORS = [
+    ("RSI", 14, None, None),
+    ("MACD", 12, 26, 9),
+    ("EMA Crossover", 10, 30, None),
+    ("ATR", 14, None, None),
+    ("OBV", None, None, None),
+    ("Bollinger Bands", 20, 2, None),
+    ("SuperTrend", 10, 3, None),
+]
+# One row per registry indicator, for parity checks across the whole registry
+ALL_INDICATORS = DEFAULT_INDICATORS + [
+    ("MFI", 14, None, None),
+    ("CCI", 20, None, None),
+    ("StochRSI", 14, 14, 3),
+    ("ROC", 12, None, None),
+    ("SMA Crossover", 20, 50, None),
+    ("Williams %R", 14, None, None),
+    ("ADX", 14, None, None),
+    ("VWAP", None, None, None),
+    ("Parabolic SAR", None, None, None),
+    ("Ichimoku", None, None, None),
+    ("Donchian Channel", 20, None, None),
+    ("Keltner Channel", 20, None, None),
+    ("VMA", 20, None, None),
+    ("ADL", None, None, None),
+]
+
+
+def make_bars(symbols, n_bars, seed=0, start="2020-01-01"):
+    """Random-walk daily OHLCV for ``symbols`` over ``n_bars`` business days."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, periods=n_bars)
+    frames = []
+    for sym in symbols:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_bars)))
+        spread = np.abs(rng.normal(0, 0.01, n_bars)) * close
+        frames.append(pd.DataFrame({
+            "symbol": sym,
+            "date": dates.date,
+            "open": close + rng.normal(0, 0.5, n_bars),
+            "high": close + spread,
+            "low": close - spread,
+            "close": close,
+            "volume": rng.integers(1_000, 100_000, n_bars).astype(float),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_ohlcv(db_path, bars):
+    with duckdb.connect(str(db_path)) as con:
+        con.execute("""
+            CREATE TABLE IF NOT EXISTS yahoo_ohlcv (
+                symbol VARCHAR, date DATE, open DOUBLE, high DOUBLE,
+                low DOUBLE, close DOUBLE, volume DOUBLE
+            )
+        """)
+        con.register("bars", bars)
+        con.execute("INSERT INTO yahoo_ohlcv SELECT symbol, date, open, high, low, close, volume FROM bars")
+        con.unregister("bars")
+
+
+def write_indicator_config(db_path, indicators=DEFAULT_INDICATORS):
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("""
+            CREATE TABLE indicator_configs (
+                indicator_name TEXT, active INTEGER, parameter_1 REAL, parameter_2 REAL,
+                parameter_3 REAL, manual_weight REAL, use_ai_weight INTEGER, ai_latest_weight REAL
+            )
+        """)
+        conn.executemany(
+            "INSERT INTO indicator_configs VALUES (?, 1, ?, ?, ?, 1.0, 0, NULL)", indicators
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class Project:
+    def __init__(self, root):
+        self.root = root
+        self.ohlcv_db = root / "Data" / "OHCLV Data" / "stocks.duckdb"
+        self.signals_db = root / "Data" / "Signals Data" / "signals.duckdb"
+        self.config_db = root / "Data" / "rubikview_users.db"
+
+    def run_signals(self, **env):
+        """Run indicator_runner.py; extra keyword args become RUBIKVIEW_* env vars."""
+        full_env = dict(os.environ, RUBIKVIEW_DISABLE_EXCEL="1", RUBIKVIEW_WORKERS="2")
+        full_env.pop("RUBIKVIEW_PROGRESS_FD", None)
+        full_env.update({f"RUBIKVIEW_{k.upper()}": str(v) for k, v in env.items()})
+        result = subprocess.run(
+            [sys.executable, str(self.root / "Engine" / "indicator_runner.py")],
+            cwd=self.root, env=full_env, capture_output=True, text=True, timeout=300,
+        )
+        assert result.returncode == 0, result.stdout + result.stderr
+        return result.stdout
+
+    def signals(self):
+        with duckdb.connect(str(self.signals_db), read_only=True) as con:
+            df = con.execute("SELECT * FROM signals").fetchdf()
+        df = df[sorted(df.columns)]
+        return df.sort_values(["symbol", "date"]).reset_index(drop=True)
+
+
+@pytest.fixture
+def project(tmp_path):
+    """A project root with the Engine copied in and an indicator config, but no bars."""
+    for sub in ("Data/OHCLV Data", "Data/Signals Data", "backend"):
+        (tmp_path / sub).mkdir(parents=True)
+    shutil.copytree(ENGINE_DIR, tmp_path / "Engine",
+                    ignore=shutil.ignore_patterns("__pycache__", "tests", "ML"))
+    proj = Project(tmp_path)
+    write_indicator_config(proj.config_db)
+    return proj
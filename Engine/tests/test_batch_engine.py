@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicator_runner
+from batch_engine import BATCH_KERNELS, Universe, compute_signals
+from conftest import ALL_INDICATORS, make_bars
+from indicator_runner import compile_plan, score_frame
+from indicators import INDICATORS
+
+SYMBOLS = ["A.NS", "B.NS", "C.NS"]
+
+
+def test_every_registry_indicator_has_a_batch_kernel():
+    assert set(BATCH_KERNELS) == set(INDICATORS)
+    assert {row[0] for row in ALL_INDICATORS} == set(INDICATORS)
+
+
+@pytest.mark.parametrize("row", ALL_INDICATORS, ids=[row[0] for row in ALL_INDICATORS])
+def test_batch_kernel_matches_per_symbol_kernel(row, monkeypatch):
+    monkeypatch.setattr(indicator_runner, "INCREMENTAL", False)
+    name, p1, p2, p3 = row
+    plan = compile_plan(pd.DataFrame([{
+        "Indicator_Name": name, "Active": "Y", "Parameter_1": p1, "Parameter_2": p2, "Parameter_3": p3,
+        "Manual_Weight": 1.0, "Use_AI_Weight": "N", "AI_Latest_Weight": None,
+    }]))
+    assert plan["items"][0]["error"] is None
+
+    bars = make_bars(SYMBOLS, 250, seed=3).sort_values(["symbol", "date"], ignore_index=True)
+    universe = Universe(
+        bars["symbol"].to_numpy(object), bars["date"].to_numpy(),
+        *(bars[c].to_numpy(float) for c in ("open", "high", "low", "close", "volume")),
+    )
+    batch = compute_signals(universe, plan["items"])
+
+    per_symbol = [
+        score_frame(group.rename(columns=indicator_runner.PRICE_COLUMNS).reset_index(drop=True), plan["items"])[0]
+        for _, group in bars.groupby("symbol")
+    ]
+    column = f"{plan['items'][0]['column']}_signal"
+    assert not np.isnan(per_symbol).any()
+    np.testing.assert_allclose(batch[column].to_numpy(float), per_symbol, rtol=1e-6, atol=1e-6)
+
+
+def test_subsets_do_not_share_the_parent_cache(monkeypatch):
+    monkeypatch.setattr(indicator_runner, "INCREMENTAL", False)
+    plan = compile_plan(pd.DataFrame([
+        {"Indicator_Name": name, "Active": "Y", "Parameter_1": p1, "Parameter_2": p2, "Parameter_3": None,
+         "Manual_Weight": 1.0, "Use_AI_Weight": "N", "AI_Latest_Weight": None}
+        for name, p1, p2 in [("ATR", 14, None), ("SuperTrend", 14, 3), ("Keltner Channel", 14, None)]
+    ]))
+    bars = make_bars(SYMBOLS, 120, seed=4).sort_values(["symbol", "date"], ignore_index=True)
+    columns = [bars[c].to_numpy(float) for c in ("open", "high", "low", "close", "volume")]
+    universe = Universe(bars["symbol"].to_numpy(object), bars["date"].to_numpy(), *columns)
+    full = compute_signals(universe, plan["items"])
+    assert ("atr", 14) in universe.cache
+
+    subset = universe.subset([False, True, False])
+    assert subset.cache == {}
+    only_b = compute_signals(subset, plan["items"])
+    # A stale parent series would have the wrong length and offsets
+    assert len(subset.cache[("atr", 14)]) == len(subset.close)
+    pd.testing.assert_frame_equal(only_b, full.iloc[[1]].reset_index(drop=True))
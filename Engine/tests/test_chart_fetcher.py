@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+from datetime import date, datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+import pytest
+
+import chart_fetcher
+
+DAYS = [date(2024, 3, 4), date(2024, 3, 5), date(2024, 3, 6)]
+IST = 19800
+
+
+def chart_payload(days, closes, split=None):
+    # Bars are stamped at the 09:15 IST open, as Yahoo does for NSE
+    stamps = [int(datetime(d.year, d.month, d.day, 3, 45, tzinfo=timezone.utc).timestamp()) for d in days]
+    result = {
+        "meta": {"gmtoffset": IST},
+        "timestamp": stamps,
+        "indicators": {
+            "quote": [{"open": closes, "high": closes, "low": closes, "close": closes, "volume": [1000] * len(days)}],
+            "adjclose": [{"adjclose": closes}],
+        },
+    }
+    if split:
+        day, numerator, denominator = split
+        stamp = stamps[days.index(day)]
+        result["events"] = {"splits": {str(stamp): {"date": stamp, "numerator": numerator, "denominator": denominator}}}
+    return {"chart": {"result": [result], "error": None}}
+
+
+class StubYahoo(BaseHTTPRequestHandler):
+    """Serves ``routes[symbol]``: a list of (status, headers, body) replies, the last one repeating."""
+
+    routes = {}
+    hits = {}
+
+    def do_GET(self):
+        symbol = unquote(urlparse(self.path).path.rsplit("/", 1)[-1])
+        self.hits.setdefault(symbol, []).append(time.monotonic())
+        replies = self.routes.get(symbol, [(404, {}, {"chart": {"result": None, "error": {"code": "Not Found"}}})])
+        status, headers, body = replies[min(len(self.hits[symbol]), len(replies)) - 1]
+        data = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    StubYahoo.routes, StubYahoo.hits = {}, {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubYahoo)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(chart_fetcher, "CHART_URL", f"http://127.0.0.1:{server.server_port}/v8/finance/chart")
+    monkeypatch.setattr(chart_fetcher, "FETCH_RATE", 0)
+    monkeypatch.setattr(chart_fetcher, "BACKOFF_BASE", 0.01)
+    yield StubYahoo
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(symbols):
+    results = {}
+    chart_fetcher.fetch_all(
+        [(s, DAYS[0], date(2024, 3, 7)) for s in symbols],
+        lambda sym, frame, error: results.__setitem__(sym, (frame, error)),
+    )
+    return results
+
+
+def test_success_returns_a_yfinance_shaped_frame(stub):
+    stub.routes["RELIANCE.NS"] = [(200, {}, chart_payload(DAYS, [10.0, 11.0, 5.5], split=(DAYS[2], 2, 1)))]
+    frame, error = fetch(["RELIANCE.NS"])["RELIANCE.NS"]
+
+    assert error is None
+    assert [d.date() for d in frame.index] == DAYS
+    assert list(frame["Close"]) == [10.0, 11.0, 5.5]
+    assert list(frame["Stock Splits"]) == [0.0, 0.0, 2.0]
+    assert {"Open", "High", "Low", "Adj Close", "Volume", "Dividends"} <= set(frame.columns)
+
+
+def test_429_is_retried_after_retry_after(stub):
+    stub.routes["TCS.NS"] = [
+        (429, {"Retry-After": "0.3"}, {}),
+        (200, {}, chart_payload(DAYS, [1.0, 2.0, 3.0])),
+    ]
+    frame, error = fetch(["TCS.NS"])["TCS.NS"]
+
+    assert error is None and len(frame) == 3
+    first, second = stub.hits["TCS.NS"]
+    assert second - first >= 0.3
+
+
+def test_404_means_no_data_not_an_error(stub):
+    frame, error = fetch(["GONE.NS"])["GONE.NS"]
+    assert frame is None and error is None
+    assert len(stub.hits["GONE.NS"]) == 1
+
+
+def test_malformed_payload_fails_only_its_symbol(stub):
+    stub.routes["OK.NS"] = [(200, {}, chart_payload(DAYS, [1.0, 2.0, 3.0]))]
+    stub.routes["BROKEN.NS"] = [(200, {}, "{not json")]
+    stub.routes["EMPTY.NS"] = [(200, {}, {"chart": {"result": [{"meta": {}}]}})]
+    results = fetch(["OK.NS", "BROKEN.NS", "EMPTY.NS"])
+
+    assert results["OK.NS"][1] is None and len(results["OK.NS"][0]) == 3
+    assert isinstance(results["BROKEN.NS"][1], ValueError)
+    assert results["EMPTY.NS"] == (None, None)
+
+
+def test_fetch_chart_raises_only_when_every_symbol_failed(stub):
+    stub.routes["OK.NS"] = [(200, {}, chart_payload(DAYS, [1.0, 2.0, 3.0]))]
+    stub.routes["BROKEN.NS"] = [(200, {}, "{not json")]
+
+    assert set(chart_fetcher.fetch_chart(["OK.NS", "BROKEN.NS"], DAYS[0], date(2024, 3, 7))) == {"OK.NS"}
+    with pytest.raises(ValueError):
+        chart_fetcher.fetch_chart(["BROKEN.NS"], DAYS[0], date(2024, 3, 7))
@@ -0,0 +1,111 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ALL_INDICATORS, make_bars, write_indicator_config, write_ohlcv
+
+SYMBOLS = [f"S{i:03d}.NS" for i in range(12)]
+
+
+def assert_same_signals(left, right):
+    assert list(left.columns) == list(right.columns)
+    assert left["symbol"].tolist() == right["symbol"].tolist()
+    assert (pd.to_datetime(left["date"]) == pd.to_datetime(right["date"])).all()
+    values = [c for c in left.columns if c.endswith("_signal") or c.endswith("_weight")]
+    np.testing.assert_allclose(
+        left[values].to_numpy(float), right[values].to_numpy(float), rtol=1e-6, atol=1e-6
+    )
+
+
+@pytest.fixture
+def loaded(project):
+    write_ohlcv(project.ohlcv_db, make_bars(SYMBOLS, 300))
+    return project
+
+
+def test_runner_modes_write_the_same_signals(loaded):
+    # Every registry indicator, so each batch kernel is checked end to end
+    loaded.config_db.unlink()
+    write_indicator_config(loaded.config_db, ALL_INDICATORS)
+    results = {}
+    for mode in ("threads", "batch", "process"):
+        if loaded.signals_db.exists():
+            loaded.signals_db.unlink()
+        loaded.run_signals(runner_mode=mode)
+        results[mode] = loaded.signals()
+
+    assert len(results["threads"]) == len(SYMBOLS)
+    assert results["threads"].filter(like="_signal").notna().all().all()
+    assert_same_signals(results["threads"], results["batch"])
+    assert_same_signals(results["threads"], results["process"])
+
+
+def test_rerun_skips_up_to_date_symbols(loaded):
+    loaded.run_signals()
+    out = loaded.run_signals()
+
+    assert f"Pending: 0 symbols ({len(SYMBOLS)} already up-to-date)" in out
+    assert len(loaded.signals()) == len(SYMBOLS)
+
+
+@pytest.mark.parametrize("mode", ["threads", "process"])
+def test_incremental_run_matches_full_recompute(project, tmp_path, mode):
+    bars = make_bars(SYMBOLS, 320, seed=1)
+    last_dates = sorted(bars["date"].unique())
+    head, tail = bars[bars["date"] < last_dates[-20]], bars[bars["date"] >= last_dates[-20]]
+    # Full history on both sides: incremental state only matches a fresh run then
+    full_history = dict(lookback_bars=0, history_safety=0, runner_mode=mode)
+
+    write_ohlcv(project.ohlcv_db, head)
+    project.run_signals(incremental=1, **full_history)
+    write_ohlcv(project.ohlcv_db, tail)
+    out = project.run_signals(incremental=1, **full_history)
+    assert f"loaded stored state for {len(SYMBOLS)} symbols" in out
+    incremental = project.signals()
+
+    project.signals_db.unlink()
+    project.run_signals(**full_history)
+    full = project.signals()
+
+    latest = incremental[pd.to_datetime(incremental["date"]) == pd.Timestamp(last_dates[-1])]
+    assert len(latest) == len(SYMBOLS)
+    assert_same_signals(latest.reset_index(drop=True), full)
+
+
+def test_thread_mode_caps_frames_in_flight(project, monkeypatch):
+    import indicator_runner
+
+    symbols = [f"T{i:03d}.NS" for i in range(70)]
+    write_ohlcv(project.ohlcv_db, make_bars(symbols, 60))
+    for name in ("OHLCV_DB", "SIGNALS_DB", "CONFIG_DB"):
+        monkeypatch.setattr(indicator_runner, name, getattr(project, name.lower()))
+    monkeypatch.setattr(indicator_runner, "RUNNER_MODE", "threads")
+
+    # Workers hold every symbol until released; the scan must stop at the cap
+    release = threading.Event()
+    score_symbol = indicator_runner.score_symbol
+    monkeypatch.setattr(indicator_runner, "score_symbol", lambda *a: release.wait(30) and score_symbol(*a))
+    yielded = []
+    iter_frames = indicator_runner.iter_symbol_frames
+
+    def counting(*args):
+        for item in iter_frames(*args):
+            yielded.append(item[0])
+            yield item
+
+    monkeypatch.setattr(indicator_runner, "iter_symbol_frames", counting)
+    runner = threading.Thread(target=indicator_runner.main, daemon=True)
+    runner.start()
+    deadline = time.monotonic() + 30
+    while len(yielded) < 40 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.3)
+    assert len(yielded) == 40  # 20 threads x 2
+
+    release.set()
+    runner.join(60)
+    assert not runner.is_alive()
+    assert sorted(project.signals()["symbol"]) == symbols
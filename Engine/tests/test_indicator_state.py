@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicator_runner
+import indicator_state
+from conftest import make_bars, write_ohlcv
+from indicator_runner import compile_plan, load_symbol_bars, score_symbol
+from indicator_state import STREAMING_INDICATORS, incremental_since, params_hash
+
+PARAMS = {
+    "RSI": [(14,), (2,)],
+    "EMA Crossover": [(10, 30), (30, 10)],
+    "MACD": [(12, 26, 9), (26, 12, 9), (5, 5, 3)],
+    "ATR": [(14,), (1,)],
+    "OBV": [()],
+    "ADL": [()],
+    "VWAP": [()],
+}
+CASES = [(name, params) for name, options in PARAMS.items() for params in options]
+
+
+def assert_same_state(seeded, fed, path="state"):
+    if isinstance(fed, dict):
+        assert seeded.keys() == fed.keys(), path
+        for key in fed:
+            assert_same_state(seeded[key], fed[key], f"{path}.{key}")
+    elif fed is None:
+        assert seeded is None, path
+    else:
+        assert seeded == pytest.approx(fed, rel=1e-9, abs=1e-9, nan_ok=True), path
+
+
+def arrays(n_bars, seed=0):
+    bars = make_bars(["A"], n_bars, seed=seed)
+    return [np.ascontiguousarray(bars[c].to_numpy(float)) for c in ("high", "low", "close", "volume")]
+
+
+def test_every_streaming_indicator_is_covered():
+    assert set(PARAMS) == set(STREAMING_INDICATORS)
+
+
+@pytest.mark.parametrize("n_bars", [0, 1, 3, 30, 400])
+@pytest.mark.parametrize("name,params", CASES, ids=[f"{n}{p}" for n, p in CASES])
+def test_seeded_state_matches_bar_by_bar_updates(name, params, n_bars):
+    cls = STREAMING_INDICATORS[name]
+    data = arrays(n_bars)
+    fed = cls(params)
+    for bar in zip(*data):
+        fed.update(*map(float, bar))
+    seeded = cls(params)
+    seeded.seed(*data)
+
+    assert_same_state(seeded.state, fed.state)
+    assert seeded.score() == pytest.approx(fed.score(), rel=1e-9, abs=1e-9, nan_ok=True)
+    # A seeded state keeps advancing like a fed one
+    for bar in zip(*arrays(5, seed=1)):
+        fed.update(*map(float, bar))
+        seeded.update(*map(float, bar))
+    assert_same_state(seeded.state, fed.state)
+
+
+# ===== Resuming from stored state =====
+
+def config(*rows):
+    return pd.DataFrame([
+        {"Indicator_Name": name, "Active": "Y", "Parameter_1": p1, "Parameter_2": p2, "Parameter_3": p3,
+         "Manual_Weight": 1.0, "Use_AI_Weight": "N", "AI_Latest_Weight": None}
+        for name, p1, p2, p3 in rows
+    ])
+
+
+@pytest.fixture
+def incremental(monkeypatch):
+    monkeypatch.setattr(indicator_runner, "INCREMENTAL", True)
+    monkeypatch.setattr(indicator_runner, "LOOKBACK_BARS", 0)
+    monkeypatch.setattr(indicator_runner, "HISTORY_SAFETY", 10)
+    # MACD streams; Bollinger Bands are scored from a window
+    return compile_plan(config(("MACD", 12, 26, 9), ("Bollinger Bands", 20, 2, None)))
+
+
+def stored(rows):
+    keys = ("symbol", "indicator", "params_hash", "last_date", "last_close", "state")
+    return {row[1]: dict(zip(keys, row)) for row in rows}
+
+
+def test_since_comes_from_streamable_specs_only(incremental):
+    macd, bollinger = incremental["items"]
+    rows = {"MACD": {"params_hash": params_hash(macd), "last_date": pd.Timestamp("2024-03-01")}}
+    assert incremental_since(incremental["items"], rows) == pd.Timestamp("2024-03-01")
+    # A streamable spec without usable state needs the window
+    assert incremental_since(incremental["items"], {}) is None
+    assert incremental_since(incremental["items"], {"MACD": dict(rows["MACD"], params_hash="old")}) is None
+    assert incremental_since([bollinger], rows) is None
+
+
+def test_resumed_symbol_reads_its_tail_and_the_plain_warmup_window(incremental, tmp_path, monkeypatch):
+    assert incremental["history_bars"] == 34 * 10
+    assert incremental["plain_history_bars"] == 20 * 10
+    bars = make_bars(["A"], 600)
+    write_ohlcv(tmp_path / "stocks.duckdb", bars.iloc[:-3])
+    with indicator_runner.storage.connect(tmp_path / "stocks.duckdb") as con:
+        window = load_symbol_bars(con, "A", incremental)
+        _, rows = score_symbol(con, "A", window, incremental)
+    states = stored(rows)
+    assert list(states) == ["MACD"]
+
+    write_ohlcv(tmp_path / "stocks.duckdb", bars.iloc[-3:])
+    since = incremental_since(incremental["items"], states)
+    assert since == pd.Timestamp(bars["date"].iloc[-4])
+
+    reads = []
+    original = indicator_runner.load_symbol_bars
+    monkeypatch.setattr(indicator_runner, "load_symbol_bars",
+                        lambda con, sym, plan, since=None: reads.append((since, plan["history_bars"]))
+                        or original(con, sym, plan, since))
+    with indicator_runner.storage.connect(tmp_path / "stocks.duckdb") as con:
+        tail = original(con, "A", incremental, since)
+        signals, rows = score_symbol(con, "A", tail, incremental, states, since)
+
+    assert len(tail) == 4
+    # Only the Bollinger window was read, never the full MACD history window
+    assert reads == [(None, 200)]
+    expected = indicator_runner.score_frame(
+        bars.iloc[-200:].rename(columns=indicator_runner.PRICE_COLUMNS).reset_index(drop=True),
+        incremental["items"][1:],
+    )
+    assert signals[1] == expected[0]
+    assert stored(rows)["MACD"]["last_date"] == pd.Timestamp(bars["date"].iloc[-1])
+
+    # Seeding the new state from scratch on the same bars gives the same answer
+    fresh = indicator_state.MACDState((12, 26, 9))
+    fresh.seed(*indicator_state._columns(window.rename(columns=indicator_runner.PRICE_COLUMNS)))
+    indicator_state._feed(fresh, bars.iloc[-3:].rename(columns=indicator_runner.PRICE_COLUMNS))
+    assert signals[0] == pytest.approx(fresh.score())
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import pytest
+import talib
+
+import indicators
+from conftest import make_bars
+from indicator_runner import PRICE_COLUMNS, score_frame
+from indicators import INDICATORS, _cached, calculate_supertrend, supertrend, supertrend_score
+
+# The plain loop and, when numba is installed, its compiled form
+KERNELS = {"plain": getattr(indicators._supertrend_loop, "py_func", indicators._supertrend_loop)}
+if indicators.njit is not None:
+    KERNELS["compiled"] = indicators._supertrend_loop
+
+
+def reference_supertrend(df, period, multiplier):
+    """Textbook bar-by-bar pandas SuperTrend: ATR bands that carry forward, trend flips on a close through them."""
+    hl2 = (df['High'] + df['Low']) / 2
+    atr = talib.ATR(df['High'], df['Low'], df['Close'], timeperiod=period)
+    basic_upper = hl2 + multiplier * atr
+    basic_lower = hl2 - multiplier * atr
+    final_upper = pd.Series(np.nan, index=df.index)
+    final_lower = pd.Series(np.nan, index=df.index)
+    st = pd.Series(np.nan, index=df.index)
+    trend = pd.Series(0.0, index=df.index)
+    direction = -1.0
+    for i in range(len(df)):
+        if np.isnan(atr.iloc[i]):
+            continue
+        if i == 0 or np.isnan(atr.iloc[i - 1]):
+            final_upper.iloc[i], final_lower.iloc[i], direction = basic_upper.iloc[i], basic_lower.iloc[i], -1.0
+        else:
+            prev_close = df['Close'].iloc[i - 1]
+            if basic_upper.iloc[i] < final_upper.iloc[i - 1] or prev_close > final_upper.iloc[i - 1]:
+                final_upper.iloc[i] = basic_upper.iloc[i]
+            else:
+                final_upper.iloc[i] = final_upper.iloc[i - 1]
+            if basic_lower.iloc[i] > final_lower.iloc[i - 1] or prev_close < final_lower.iloc[i - 1]:
+                final_lower.iloc[i] = basic_lower.iloc[i]
+            else:
+                final_lower.iloc[i] = final_lower.iloc[i - 1]
+        if direction == -1.0 and df['Close'].iloc[i] > final_upper.iloc[i]:
+            direction = 1.0
+        elif direction == 1.0 and df['Close'].iloc[i] < final_lower.iloc[i]:
+            direction = -1.0
+        trend.iloc[i] = direction
+        st.iloc[i] = final_lower.iloc[i] if direction == 1.0 else final_upper.iloc[i]
+    return pd.DataFrame({'supertrend': st, 'upper': final_upper, 'lower': final_lower, 'trend': trend})
+
+
+def price_frame(seed=0, n_bars=400):
+    bars = make_bars(["A"], n_bars, seed=seed)
+    return bars.rename(columns={c: c.capitalize() for c in ("open", "high", "low", "close", "volume")})
+
+
+# ===== SuperTrend =====
+
+@pytest.mark.parametrize("kernel", KERNELS.values(), ids=KERNELS.keys())
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_supertrend_matches_the_pandas_reference(kernel, seed, monkeypatch):
+    monkeypatch.setattr(indicators, "_supertrend_loop", kernel)
+    df = price_frame(seed)
+    expected = reference_supertrend(df, 10, 3)
+
+    result = supertrend(df['High'], df['Low'], df['Close'], 10, 3)
+    pd.testing.assert_frame_equal(result, expected, check_names=False)
+    # The random walks trend both ways, so flips in each direction are covered
+    flips = np.diff(result['trend'].to_numpy()[10:])
+    assert (flips > 0).any() and (flips < 0).any()
+    assert calculate_supertrend(df, 10, 3) == supertrend_score(df['Close'], expected['supertrend'])
+
+
+@pytest.mark.parametrize("kernel", KERNELS.values(), ids=KERNELS.keys())
+def test_supertrend_flips_on_a_close_through_the_band(kernel, monkeypatch):
+    monkeypatch.setattr(indicators, "_supertrend_loop", kernel)
+    close = np.r_[np.linspace(100, 130, 40), np.linspace(130, 80, 40)]
+    df = pd.DataFrame({'High': close + 1, 'Low': close - 1, 'Close': close})
+
+    trend = supertrend(df['High'], df['Low'], df['Close'], 5, 2)['trend'].to_numpy()
+    assert (trend[:5] == 0).all()
+    # Up during the rally, down after the sell-off, with exactly one flip each way
+    assert trend[39] == 1 and trend[-1] == -1
+    assert np.count_nonzero(np.diff(trend[5:])) == 2
+
+
+# ===== Shared series cache =====
+
+ATR_USERS = [
+    {"name": "ATR", "params": (14,)},
+    {"name": "SuperTrend", "params": (14, 3.0)},
+    {"name": "Keltner Channel", "params": (14,)},
+]
+
+
+def test_cached_computes_each_key_once():
+    calls = []
+    compute = lambda: calls.append(1) or len(calls)
+    cache = {}
+    assert _cached(cache, ("atr", 14), compute) == 1
+    assert _cached(cache, ("atr", 14), compute) == 1
+    assert _cached(cache, ("atr", 10), compute) == 2
+    # Without a cache every call computes
+    assert _cached(None, ("atr", 14), compute) == 3
+
+
+def test_score_frame_shares_atr_within_a_symbol_only(monkeypatch):
+    calls = []
+    atr = talib.ATR
+    monkeypatch.setattr(indicators.talib, "ATR", lambda *a, **k: calls.append(1) or atr(*a, **k))
+    frames = [price_frame(seed) for seed in (0, 1)]
+
+    scores = [score_frame(df, ATR_USERS) for df in frames]
+    # One ATR(14) per symbol, shared by all three kernels
+    assert len(calls) == 2
+
+    # Each symbol scores as if computed alone, without a cache: nothing leaks across symbols
+    for df, got in zip(frames, scores):
+        alone = [INDICATORS[s["name"]].kernel(df, *s["params"]) for s in ATR_USERS]
+        assert got == pytest.approx(alone)
+    assert scores[0] != scores[1]
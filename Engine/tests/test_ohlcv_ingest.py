@@ -0,0 +1,420 @@
+import sys
+import threading
+import types
+from datetime import date, timedelta
+
+import duckdb
+import pandas as pd
+import pytest
+
+# The loaders import yfinance at module level; these tests only use the
+# offline fixture fetcher, so a placeholder is enough where it is missing.
+sys.modules.setdefault("yfinance", types.ModuleType("yfinance"))
+
+import ohlcv_ingest  # noqa: E402
+import storage  # noqa: E402
+import trading_calendar  # noqa: E402
+import update_Index_ohlcv  # noqa: E402
+from ohlcv_ingest import BatchSizer, OhlcvWriter, plan_fetches  # noqa: E402
+
+TODAY = date.today()
+
+
+def write_fixture(directory, symbol, dates):
+    n = len(dates)
+    pd.DataFrame({
+        "Date": pd.to_datetime(dates),
+        "Open": 10.0, "High": 11.0, "Low": 9.0, "Close": [10.0 + i for i in range(n)],
+        "Volume": 1000.0, "Dividends": 0.0, "Stock Splits": 0.0,
+    }).to_csv(directory / f"{symbol}.csv", index=False)
+
+
+def watermarks(db_path):
+    with duckdb.connect(str(db_path), read_only=True) as con:
+        rows = con.execute(
+            "SELECT symbol, last_date, row_count, status, empty_streak, next_check FROM ohlcv_watermarks"
+        ).fetchall()
+    return {r[0]: r[1:] for r in rows}
+
+
+@pytest.fixture
+def loader(tmp_path, monkeypatch):
+    fixtures = tmp_path / "fixtures"
+    fixtures.mkdir()
+    monkeypatch.setattr(ohlcv_ingest, "FETCH_MODE", "fixture")
+    monkeypatch.setattr(ohlcv_ingest, "FIXTURE_DIR", str(fixtures))
+    db_path = tmp_path / "stocks.duckdb"
+    ohlcv_ingest.init_db(db_path, "ohlcv")
+
+    def run(symbols, expected_session, start=TODAY - timedelta(days=30)):
+        statuses = {}
+        counts = ohlcv_ingest.run(
+            db_path, "ohlcv", symbols, start, TODAY - timedelta(days=1), expected_session, 4,
+            lambda sym, status, counts: statuses.__setitem__(sym, status),
+        )
+        return counts, statuses
+
+    return types.SimpleNamespace(db_path=db_path, fixtures=fixtures, run=run)
+
+
+# ===== Trading calendar =====
+
+def make_index_db(path, dates):
+    with duckdb.connect(str(path)) as con:
+        con.execute("CREATE TABLE index_ohlcv (symbol VARCHAR, date DATE, close DOUBLE)")
+        con.executemany("INSERT INTO index_ohlcv VALUES ('^NSEI', ?, 1.0)", [(d,) for d in dates])
+
+
+def test_calendar_finds_holidays_and_last_session(tmp_path):
+    # Mon 2024-03-04 .. Fri 2024-03-15 with Fri 8th and Mon 11th closed
+    days = [date(2024, 3, 4) + timedelta(days=i) for i in range(12)]
+    closed = {date(2024, 3, 8), date(2024, 3, 11)}
+    make_index_db(tmp_path / "index.duckdb", [d for d in days if d.weekday() < 5 and d not in closed])
+
+    sessions = trading_calendar.load_sessions(tmp_path / "index.duckdb")
+    assert trading_calendar.holidays(sessions) == sorted(closed)
+    # Sunday the 10th and the holiday after it fall back to Thursday the 7th
+    assert trading_calendar.last_session(date(2024, 3, 11), sessions) == date(2024, 3, 7)
+    # Past the loaded history every weekday counts
+    assert trading_calendar.last_session(date(2024, 3, 23), sessions) == date(2024, 3, 22)
+
+
+def test_calendar_falls_back_to_the_snapshot_while_the_index_is_locked(tmp_path, capsys):
+    index_db = tmp_path / "index.duckdb"
+    days = [d.date() for d in pd.bdate_range("2024-03-04", "2024-03-15") if d.date() != date(2024, 3, 8)]
+    make_index_db(index_db, days)
+
+    # The index loader holds the database for writing
+    with duckdb.connect(str(index_db)):
+        assert trading_calendar.load_sessions(index_db) == []
+        assert "treating every weekday as a session" in capsys.readouterr().out
+
+    trading_calendar.save_snapshot(index_db)
+    with duckdb.connect(str(index_db)):
+        assert trading_calendar.load_sessions(index_db) == days
+        assert "read from sessions_nsei.txt" in capsys.readouterr().out
+
+
+# ===== Planning and watermarks =====
+
+def test_plan_splits_pending_uptodate_and_deferred():
+    expected = date(2024, 3, 7)
+    last_dates = {"A": date(2024, 3, 7), "B": date(2024, 3, 1), "C": date(2024, 3, 1)}
+    next_checks = {"C": TODAY + timedelta(days=2)}
+    groups, uptodate, deferred = plan_fetches(["A", "B", "C", "D"], date(2024, 1, 1), expected, last_dates, next_checks)
+
+    assert uptodate == ["A"] and deferred == ["C"]
+    assert groups == {date(2024, 3, 2): ["B"], date(2024, 1, 1): ["D"]}
+
+
+def test_run_records_watermarks_and_skips_uptodate_symbols(loader):
+    days = [d.date() for d in pd.bdate_range(TODAY - timedelta(days=20), TODAY - timedelta(days=1))]
+    write_fixture(loader.fixtures, "AAA", days)
+
+    counts, _ = loader.run(["AAA"], days[-1])
+    assert counts["success"] == 1 and counts["rows_written"] == len(days)
+    last_date, row_count, status, *_ = watermarks(loader.db_path)["AAA"]
+    assert (last_date, row_count, status) == (days[-1], len(days), "success")
+
+    counts, statuses = loader.run(["AAA"], days[-1])
+    assert counts["uptodate"] == 1 and counts["rows_written"] == 0
+    assert statuses["AAA"] == "up-to-date"
+
+
+def test_empty_symbols_back_off(loader):
+    expected = TODAY - timedelta(days=1)
+    counts, _ = loader.run(["GONE"], expected)
+    assert counts["skipped"] == 1
+    *_, status, streak, next_check = watermarks(loader.db_path)["GONE"]
+    assert (status, streak, next_check) == ("skipped", 1, TODAY + timedelta(days=1))
+
+    # Not fetched again before its re-check date
+    counts, statuses = loader.run(["GONE"], expected)
+    assert statuses["GONE"].startswith("deferred")
+    assert watermarks(loader.db_path)["GONE"][3] == 1
+
+
+# ===== Download mode =====
+
+def test_batch_sizer_grows_on_clean_requests_up_to_the_maximum():
+    sizer = BatchSizer(50, 70, step=10, max_error_rate=0.2)
+    sizer.record(50, 0)
+    assert sizer.size == 60
+    sizer.record(60, 0)
+    sizer.record(70, 0)
+    assert sizer.size == 70
+
+
+def test_batch_sizer_halves_on_errors_or_throttling():
+    sizer = BatchSizer(40, 200, step=10, max_error_rate=0.2)
+    # A few empty symbols within the tolerated rate leave the size alone
+    sizer.record(40, 5)
+    assert sizer.size == 40
+    sizer.record(40, 20)
+    assert sizer.size == 20
+    # A throttled request fails every symbol; the size never drops below one
+    for _ in range(10):
+        sizer.record(sizer.size, sizer.size)
+    assert sizer.size == 1
+
+
+def history(dates, close):
+    return pd.DataFrame({
+        "Open": close, "High": close, "Low": close, "Close": close, "Adj Close": close,
+        "Volume": 1000.0, "Dividends": 0.0, "Stock Splits": 0.0,
+    }, index=pd.DatetimeIndex(pd.to_datetime(dates), name="Date"))
+
+
+def test_download_splits_the_combined_frame_per_symbol(monkeypatch):
+    dates = pd.bdate_range("2024-03-04", periods=5)
+    a = history(dates, 10.0)
+    # B listed mid-range: its first two rows are empty in the combined frame
+    b = history(dates, 20.0)
+    b.iloc[:2] = float("nan")
+    combined = pd.concat({"A.NS": a, "B.NS": b}, axis=1)
+    calls = []
+
+    def download(symbols, **kwargs):
+        calls.append(symbols)
+        return combined
+
+    monkeypatch.setattr(ohlcv_ingest, "yf", types.SimpleNamespace(download=download))
+    frames = ohlcv_ingest.fetch_download(["A.NS", "B.NS", "MISSING.NS"], dates[0], dates[-1])
+
+    assert calls == [["A.NS", "B.NS", "MISSING.NS"]]
+    assert set(frames) == {"A.NS", "B.NS"}
+    assert len(frames["A.NS"]) == 5 and (frames["A.NS"]["Close"] == 10.0).all()
+    assert list(frames["B.NS"].index) == list(dates[2:])
+
+
+def test_download_mode_splits_failed_requests_and_skips_missing_symbols(loader, monkeypatch):
+    days = [d.date() for d in pd.bdate_range(TODAY - timedelta(days=10), TODAY - timedelta(days=1))]
+    requests = []
+
+    def fetch(symbols, start, end):
+        requests.append(list(symbols))
+        if "BAD" in symbols:
+            raise RuntimeError("rate limited")
+        # MISSING is absent from every response
+        return {s: history(days, 10.0) for s in symbols if s != "MISSING"}
+
+    monkeypatch.setattr(ohlcv_ingest, "FETCH_MODE", "download")
+    monkeypatch.setattr(ohlcv_ingest, "DOWNLOAD_BATCH", 4)
+    monkeypatch.setitem(ohlcv_ingest.FETCHERS, "download", fetch)
+    counts, statuses = loader.run(["A", "B", "BAD", "MISSING"], days[-1])
+
+    assert requests[0] == ["A", "B", "BAD", "MISSING"]
+    # The failed request is retried in halves until BAD is alone
+    assert ["BAD"] in requests and ["A", "B"] in requests
+    assert statuses["BAD"].startswith("FAILED")
+    assert statuses["MISSING"] == "skipped"
+    assert (counts["success"], counts["failed"], counts["skipped"]) == (2, 1, 1)
+    marks = watermarks(loader.db_path)
+    assert marks["A"][2] == "success" and marks["MISSING"][2] == "skipped"
+
+
+# ===== Index symbols =====
+
+def meta_index_names():
+    for name in update_Index_ohlcv.INDEX_META_FILES:
+        meta = pd.read_csv(update_Index_ohlcv.META_DIR / name, usecols=["IndexName"])
+        yield from meta["IndexName"].dropna().astype(str).str.strip().unique()
+
+
+def test_every_metadata_index_has_a_mapping_entry():
+    keys = set(update_Index_ohlcv.YAHOO_INDEX_SYMBOLS)
+    names = list(meta_index_names())
+    assert names
+    missing = [n for n in names if n not in keys and n.removesuffix("index") not in keys]
+    assert missing == []
+
+
+def test_load_indices_fetches_mapped_and_reports_unmapped(capsys):
+    symbols = update_Index_ohlcv.load_indices()
+    mapped = {s for s in update_Index_ohlcv.YAHOO_INDEX_SYMBOLS.values() if s}
+    assert set(symbols) == mapped | set(update_Index_ohlcv.INDICES)
+    assert len(symbols) == len(set(symbols))
+
+    warning = capsys.readouterr().out
+    for name, symbol in update_Index_ohlcv.YAHOO_INDEX_SYMBOLS.items():
+        if symbol is None:
+            assert name in warning
+
+
+def test_unknown_index_names_are_reported(tmp_path, monkeypatch, capsys):
+    pd.DataFrame({"IndexName": ["nifty50", "niftyNewIndex", "BSE Future Indexindex"]}).to_csv(
+        tmp_path / "meta.csv", index=False
+    )
+    monkeypatch.setattr(update_Index_ohlcv, "META_DIR", tmp_path)
+    monkeypatch.setattr(update_Index_ohlcv, "INDEX_META_FILES", ["meta.csv", "absent.csv"])
+
+    symbols = update_Index_ohlcv.load_indices()
+    assert symbols == update_Index_ohlcv.INDICES
+    out = capsys.readouterr().out
+    assert "absent.csv not found" in out
+    assert "No Yahoo symbol for 2 indices: BSE Future Indexindex, niftyNewIndex" in out
+
+
+# ===== Corporate actions =====
+
+def write_yahoo_fixture(directory, symbol, dates, closes, volumes, dividends=None, splits=None):
+    """Bars as Yahoo serves them: ``closes`` / ``volumes`` already adjusted for the splits after them."""
+    n = len(dates)
+    pd.DataFrame({
+        "Date": pd.to_datetime(dates),
+        "Open": closes, "High": closes, "Low": closes, "Close": closes, "Adj Close": closes,
+        "Volume": volumes,
+        "Dividends": dividends or [0.0] * n,
+        "Stock Splits": splits or [0.0] * n,
+    }).to_csv(directory / f"{symbol}.csv", index=False)
+
+
+def query(db_path, sql, params=()):
+    with duckdb.connect(str(db_path), read_only=True) as con:
+        return con.execute(sql, params).fetchall()
+
+
+def adjusted(con, symbol):
+    return con.execute(
+        "SELECT close, volume FROM adjusted_ohlcv WHERE symbol = ? ORDER BY date", (symbol,)
+    ).fetchall()
+
+
+SESSIONS = [d.date() for d in pd.bdate_range(TODAY - timedelta(days=30), TODAY - timedelta(days=1))][-15:]
+
+
+def test_unadjust_splits_restores_raw_prices_before_each_split():
+    df = pd.DataFrame({
+        "date": pd.to_datetime(SESSIONS[:4]),
+        "open": 5.0, "high": 5.0, "low": 5.0, "close": 5.0, "adj_close": 4.0,
+        "volume": 2000.0, "dividends": [0.5, 0.0, 0.0, 0.0], "stock_splits": [0.0, 0.0, 2.0, 0.0],
+    })
+    raw = ohlcv_ingest.unadjust_splits(df)
+
+    for col in ("open", "high", "low", "close"):
+        assert list(raw[col]) == [10.0, 10.0, 5.0, 5.0]
+    assert list(raw["adj_close"]) == [8.0, 8.0, 4.0, 4.0]
+    assert list(raw["dividends"]) == [1.0, 0.0, 0.0, 0.0]
+    assert list(raw["volume"]) == [1000.0, 1000.0, 2000.0, 2000.0]
+    # Without splits the frame is returned as is
+    plain = df.assign(stock_splits=0.0)
+    assert ohlcv_ingest.unadjust_splits(plain) is plain
+
+
+@pytest.fixture
+def actions(loader):
+    """AAA: 1.00 dividend on session 5, 2:1 split on session 12; BBB: 2.00 dividend on session 3."""
+    def first_run():
+        write_yahoo_fixture(loader.fixtures, "AAA", SESSIONS[:10], [10.0] * 5 + [9.0] * 5, [1000.0] * 10,
+                            dividends=[0.0] * 5 + [1.0] + [0.0] * 4)
+        write_yahoo_fixture(loader.fixtures, "BBB", SESSIONS[:10], [20.0] * 10, [500.0] * 10,
+                            dividends=[0.0] * 3 + [2.0] + [0.0] * 6)
+        return loader.run(["AAA", "BBB"], SESSIONS[9], start=SESSIONS[0])
+
+    def second_run():
+        # After the split Yahoo serves the whole history halved
+        write_yahoo_fixture(loader.fixtures, "AAA", SESSIONS, [5.0] * 5 + [4.5] * 10, [2000.0] * 15,
+                            dividends=[0.0] * 5 + [0.5] + [0.0] * 9,
+                            splits=[0.0] * 12 + [2.0] + [0.0] * 2)
+        write_yahoo_fixture(loader.fixtures, "BBB", SESSIONS, [20.0] * 15, [500.0] * 15,
+                            dividends=[0.0] * 3 + [2.0] + [0.0] * 11)
+        return loader.run(["AAA", "BBB"], SESSIONS[14], start=SESSIONS[0])
+
+    return types.SimpleNamespace(first_run=first_run, second_run=second_run)
+
+
+def test_dividend_factors_use_the_close_before_the_ex_date(loader, actions):
+    actions.first_run()
+
+    assert query(loader.db_path, "SELECT symbol, date, dividend, split_ratio, prices_adjusted FROM corporate_actions ORDER BY symbol") == [
+        ("AAA", SESSIONS[5], 1.0, 0.0, False),
+        ("BBB", SESSIONS[3], 2.0, 0.0, False),
+    ]
+    factors = query(loader.db_path, "SELECT symbol, to_date, price_factor, volume_factor FROM adjustment_factors ORDER BY symbol")
+    assert [(s, d) for s, d, *_ in factors] == [("AAA", SESSIONS[5]), ("BBB", SESSIONS[3])]
+    assert [pf for _, _, pf, _ in factors] == pytest.approx([0.9, 0.9])
+    with storage.connect(loader.db_path) as con:
+        assert [c for c, _ in adjusted(con, "AAA")] == pytest.approx([9.0] * 10)
+
+
+def test_new_split_refreshes_only_that_symbols_factors(loader, actions, monkeypatch):
+    actions.first_run()
+    bbb_before = query(loader.db_path, "SELECT * FROM adjustment_factors WHERE symbol = 'BBB'")
+    refreshed = []
+    real_refresh = ohlcv_ingest.refresh_factors
+
+    def recording_refresh(conn, dataset, symbols):
+        refreshed.extend(r[0] for r in conn.execute(f"SELECT symbol FROM {symbols}").fetchall())
+        real_refresh(conn, dataset, symbols)
+
+    monkeypatch.setattr(ohlcv_ingest, "refresh_factors", recording_refresh)
+    actions.second_run()
+
+    assert refreshed == ["AAA"]
+    assert query(loader.db_path, "SELECT * FROM adjustment_factors WHERE symbol = 'BBB'") == bbb_before
+    # Stored bars are raw: the two fetched pre-split sessions were scaled back up
+    assert query(loader.db_path, "SELECT close, adj_close, volume FROM yahoo_ohlcv WHERE symbol = 'AAA' ORDER BY date") == (
+        [(10.0, 10.0, 1000.0)] * 5 + [(9.0, 9.0, 1000.0)] * 7 + [(4.5, 4.5, 2000.0)] * 3
+    )
+    factors = query(loader.db_path, "SELECT from_date, to_date, price_factor, volume_factor FROM adjustment_factors "
+                                    "WHERE symbol = 'AAA' ORDER BY from_date")
+    assert [(f, t) for f, t, *_ in factors] == [(date(1900, 1, 1), SESSIONS[5]), (SESSIONS[5], SESSIONS[12])]
+    assert [pf for *_, pf, _ in factors] == pytest.approx([0.45, 0.5])
+    assert [vf for *_, vf in factors] == pytest.approx([2.0, 2.0])
+    # The adjusted series has no jump at the split
+    with storage.connect(loader.db_path) as con:
+        bars = adjusted(con, "AAA")
+    assert [c for c, _ in bars] == pytest.approx([4.5] * 15)
+    assert [v for _, v in bars] == pytest.approx([2000.0] * 15)
+
+
+def test_actions_seeded_from_adjusted_bars_are_not_applied_twice(tmp_path):
+    db_path = tmp_path / "stocks.duckdb"
+    # Bars stored before the loader kept raw prices: the 2:1 split on
+    # session 3 is already applied by Yahoo; 0.50 dividend on session 6
+    bars = pd.DataFrame({
+        "symbol": "CCC", "date": SESSIONS[:8], "open": 5.0, "high": 5.0, "low": 5.0, "close": 5.0,
+        "volume": 2000.0, "dividends": [0.0] * 6 + [0.5, 0.0], "stock_splits": [0.0] * 3 + [2.0] + [0.0] * 4,
+    })
+    with duckdb.connect(str(db_path)) as con:
+        con.execute("CREATE TABLE yahoo_ohlcv AS SELECT * FROM bars")
+
+    ohlcv_ingest.init_adjustments(db_path, "ohlcv")
+
+    assert query(db_path, "SELECT date, prices_adjusted FROM corporate_actions ORDER BY date") == [
+        (SESSIONS[3], True), (SESSIONS[6], True),
+    ]
+    factors = query(db_path, "SELECT price_factor, volume_factor FROM adjustment_factors ORDER BY from_date")
+    assert factors == [pytest.approx((0.9, 1.0)), pytest.approx((0.9, 1.0))]
+    with storage.connect(db_path) as con:
+        assert adjusted(con, "CCC") == [pytest.approx((4.5, 2000.0))] * 6 + [pytest.approx((5.0, 2000.0))] * 2
+
+
+def test_parquet_readers_join_the_published_factors(loader, actions, tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "parquet")
+    monkeypatch.setattr(storage, "PARQUET_ROOT", tmp_path / "parquet")
+    actions.first_run()
+    actions.second_run()
+
+    assert storage.factors_path("ohlcv").exists()
+    with storage.connect(loader.db_path) as con:
+        assert [c for c, _ in adjusted(con, "AAA")] == pytest.approx([4.5] * 15)
+        assert [c for c, _ in adjusted(con, "BBB")] == pytest.approx([18.0] * 3 + [20.0] * 12)
+
+
+# ===== Writer thread =====
+
+def test_ohlcv_writer_close_reraises_a_failed_tail_flush(tmp_path, monkeypatch):
+    def failing_flush(self, conn, frames, marks):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(OhlcvWriter, "_flush", failing_flush)
+    writer = OhlcvWriter(tmp_path / "stocks.duckdb", "ohlcv", queue_frames=2)
+    writer.__enter__()
+    writer.put("AAA", "skipped")
+
+    closer = threading.Thread(target=lambda: pytest.raises(OSError, writer.close), daemon=True)
+    closer.start()
+    closer.join(5)
+    assert not closer.is_alive(), "close() hung after a failed tail flush"
+    assert isinstance(writer.error, OSError)
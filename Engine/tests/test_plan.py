@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+import indicator_runner
+from indicator_runner import compile_plan, score_frame
+from conftest import make_bars
+
+
+def config(*rows):
+    return pd.DataFrame(
+        [
+            {"Indicator_Name": name, "Active": "Y", "Parameter_1": p1, "Parameter_2": p2,
+             "Parameter_3": p3, "Manual_Weight": 2.0, "Use_AI_Weight": "N", "AI_Latest_Weight": None}
+            for name, p1, p2, p3 in rows
+        ]
+    )
+
+
+def test_plan_parses_params_and_collects_inputs(monkeypatch):
+    monkeypatch.setattr(indicator_runner, "LOOKBACK_BARS", 0)
+    monkeypatch.setattr(indicator_runner, "HISTORY_SAFETY", 10)
+    monkeypatch.setattr(indicator_runner, "INCREMENTAL", False)
+    plan = compile_plan(config(("RSI", 14, None, None), ("SuperTrend", None, None, None)))
+
+    rsi, supertrend = plan["items"]
+    assert rsi["params"] == (14,) and rsi["column"] == "rsi" and rsi["weight"] == 2.0
+    # Optional slots fall back to their defaults
+    assert supertrend["params"] == (10, 3.0)
+    assert plan["columns"] == ["high", "low", "close"]
+    # Longest warm-up (RSI 14 -> 15 bars) times the safety factor
+    assert plan["history_bars"] == 150
+
+
+def test_plan_flags_bad_rows_instead_of_failing(monkeypatch):
+    monkeypatch.setattr(indicator_runner, "INCREMENTAL", False)
+    plan = compile_plan(config(("No Such Thing", 1, None, None), ("RSI", None, None, None), ("ROC", 5, None, None)))
+
+    unknown, missing, roc = plan["items"]
+    assert unknown["error"] == "unknown indicator"
+    assert missing["error"].startswith("bad parameters")
+    assert roc["error"] is None
+
+    bars = make_bars(["A"], 60).rename(columns=indicator_runner.PRICE_COLUMNS)
+    signals = score_frame(bars, plan["items"])
+    assert np.isnan(signals[0]) and np.isnan(signals[1]) and not np.isnan(signals[2])
+
+
+def test_lookback_is_raised_to_cover_warmup(monkeypatch):
+    monkeypatch.setattr(indicator_runner, "LOOKBACK_BARS", 20)
+    monkeypatch.setattr(indicator_runner, "INCREMENTAL", False)
+    plan = compile_plan(config(("MACD", 12, 26, 9)))
+
+    # MACD(12, 26, 9) needs 26 + 9 - 1 bars
+    assert plan["history_bars"] == 34 + indicator_runner.NORM_WINDOW
@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+from progress import PROGRESS_ENV, PROGRESS_MARKER, ProgressChannel
+from conftest import make_bars, write_ohlcv
+
+SYMBOLS = [f"S{i:03d}.NS" for i in range(12)]
+
+
+def events(out):
+    return [json.loads(line[len(PROGRESS_MARKER):]) for line in out.splitlines() if line.startswith(PROGRESS_MARKER)]
+
+
+def test_channel_is_silent_without_a_runner(monkeypatch, capsys):
+    monkeypatch.delenv(PROGRESS_ENV, raising=False)
+    channel = ProgressChannel(2)
+    channel.record("success", "A")
+    channel.close()
+    assert capsys.readouterr().out == ""
+
+
+def test_channel_sends_throttled_cumulative_snapshots(monkeypatch, capsys):
+    monkeypatch.setenv(PROGRESS_ENV, "stdout")
+    channel = ProgressChannel(3, interval=60)
+    channel.update(force=True)
+    channel.record("success", "A", "A | processed")
+    channel.record("failed", "B", "B | error")
+    channel.close("finished")
+
+    first, last = events(capsys.readouterr().out)
+    assert first["event"] == "progress" and first["done"] == 0
+    # Records inside the interval are folded into the final snapshot
+    assert last["event"] == "done"
+    assert (last["total"], last["done"]) == (3, 2)
+    assert last["counts"] == {"success": 1, "failed": 1, "skipped": 0, "uptodate": 0}
+    assert (last["symbol"], last["message"]) == ("B", "finished")
+
+
+def test_channel_writes_to_an_inherited_fd(monkeypatch, tmp_path):
+    path = tmp_path / "progress"
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT)
+    monkeypatch.setenv(PROGRESS_ENV, str(fd))
+    channel = ProgressChannel(1)
+    channel.record("uptodate", "A")
+    # Closing the channel closes the fd
+    channel.close()
+    (last,) = [json.loads(line) for line in path.read_text().splitlines()][-1:]
+    assert last["counts"]["uptodate"] == 1
+
+
+@pytest.mark.parametrize("mode", ["threads", "batch", "process"])
+def test_runner_reports_each_finished_symbol(project, mode):
+    write_ohlcv(project.ohlcv_db, make_bars(SYMBOLS, 120))
+    out = project.run_signals(runner_mode=mode, progress_fd="stdout", progress_interval=0)
+
+    lines = out.splitlines()
+    snapshots = events(out)
+    # Unthrottled: the initial snapshot, one per symbol and the final one
+    assert len(snapshots) == len(SYMBOLS) + 2
+    assert snapshots[-1]["event"] == "done"
+    assert snapshots[-1]["done"] == len(SYMBOLS)
+    assert snapshots[-1]["counts"]["success"] == len(SYMBOLS)
+    # Each progress line names the symbol of the result printed just before it
+    for i, line in enumerate(lines):
+        if line.startswith(PROGRESS_MARKER) and i and " | " in lines[i - 1]:
+            printed = lines[i - 1].split("] ", 1)[1].split(" | ", 1)[0]
+            assert json.loads(line[len(PROGRESS_MARKER):])["symbol"] == printed
@@ -0,0 +1,179 @@
+import threading
+
+import duckdb
+import pandas as pd
+import pytest
+
+import signal_writer
+from signal_writer import SignalWriter, init_signals_storage
+
+
+def frame(n, start=0):
+    return pd.DataFrame({
+        "symbol": [f"S{i}" for i in range(start, start + n)],
+        "date": pd.Timestamp("2024-01-02"),
+        "rsi_signal": [float(i) for i in range(n)],
+        "rsi_weight": 1.0,
+    })
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "signals.duckdb"
+    init_signals_storage(path, [])
+    return path
+
+
+def count_rows(path):
+    with duckdb.connect(str(path), read_only=True) as con:
+        return con.execute("SELECT count(*) FROM signals").fetchone()[0]
+
+
+def test_rows_and_frames_are_committed_in_chunks(db_path):
+    with SignalWriter(db_path, chunk_rows=10) as writer:
+        for i in range(7):
+            writer.put_row(frame(1, i).iloc[0].to_dict())
+        writer.put_frame(frame(25, 100))
+    assert writer.rows_written == 32
+    assert count_rows(db_path) == 32
+
+
+def test_frames_are_queued_in_chunk_sized_pieces(db_path):
+    writer = SignalWriter(db_path, chunk_rows=10)
+    writer.put_frame(frame(35), state_rows=["state"])
+
+    pieces = [writer._queue.get_nowait() for _ in range(writer._queue.qsize())]
+    assert [len(p[1]) for p in pieces] == [10, 10, 10, 5]
+    # State rows ride with the last piece only
+    assert [p[2] for p in pieces] == [[], [], [], ["state"]]
+
+
+def test_producers_wait_once_queued_rows_reach_the_bound(db_path):
+    writer = SignalWriter(db_path, chunk_rows=10)
+    writer.put_frame(frame(writer.max_queued_rows))
+    blocked = threading.Thread(target=writer.put_frame, args=(frame(5, 1000),), daemon=True)
+    blocked.start()
+    blocked.join(0.3)
+    assert blocked.is_alive()
+
+    with writer:
+        blocked.join(5)
+        assert not blocked.is_alive()
+    assert count_rows(db_path) == writer.max_queued_rows + 5
+
+
+def test_close_reraises_when_the_tail_flush_fails(db_path, monkeypatch):
+    def failing_flush(self, con, rows, frames, state_rows):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(SignalWriter, "_flush", failing_flush)
+    writer = SignalWriter(db_path, chunk_rows=100)
+    writer.__enter__()
+    writer.put_frame(frame(5))
+
+    closer = threading.Thread(target=lambda: pytest.raises(OSError, writer.close), daemon=True)
+    closer.start()
+    closer.join(5)
+    assert not closer.is_alive(), "close() hung after a failed tail flush"
+    assert isinstance(writer.error, OSError)
+
+
+def test_producers_see_a_failed_writer(db_path, monkeypatch):
+    def failing_flush(self, con, rows, frames, state_rows):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(SignalWriter, "_flush", failing_flush)
+    writer = SignalWriter(db_path, chunk_rows=2)
+    with pytest.raises(OSError):
+        with writer:
+            with pytest.raises(RuntimeError, match="signal writer failed"):
+                for i in range(100):
+                    writer.put_row(frame(1, i).iloc[0].to_dict())
+
+
+# ===== Long layout =====
+
+def item(column, params=(14,)):
+    return {"name": column.upper(), "column": column, "params": params}
+
+
+def wide_frame(columns, n=3):
+    df = pd.DataFrame({
+        "symbol": [f"S{i}" for i in range(n)],
+        "date": pd.Timestamp("2024-01-02"),
+    })
+    for k, col in enumerate(columns):
+        df[f"{col}_signal"] = [float(i + k) for i in range(n)]
+        df[f"{col}_weight"] = 1.0 + k
+    return df
+
+
+def read(path, sql):
+    with duckdb.connect(str(path), read_only=True) as con:
+        return con.execute(sql).fetchdf()
+
+
+def relation_type(path, name):
+    with duckdb.connect(str(path), read_only=True) as con:
+        return signal_writer._relation_type(con, name)
+
+
+@pytest.fixture
+def long_layout(monkeypatch):
+    monkeypatch.setattr(signal_writer, "SIGNALS_LAYOUT", "long")
+
+
+def sorted_frame(df):
+    df = df[sorted(df.columns)]
+    df = df.assign(date=pd.to_datetime(df["date"]))
+    return df.sort_values(["symbol", "date"]).reset_index(drop=True)
+
+
+def test_wide_table_migrates_to_long_and_is_kept(tmp_path, monkeypatch):
+    path = tmp_path / "signals.duckdb"
+    init_signals_storage(path, [])
+    wide = wide_frame(["rsi", "macd"])
+    with duckdb.connect(str(path)) as con:
+        signal_writer.write_signals(con, wide)
+
+    monkeypatch.setattr(signal_writer, "SIGNALS_LAYOUT", "long")
+    init_signals_storage(path, [item("rsi"), item("macd")])
+
+    assert relation_type(path, "signals_wide") == "BASE TABLE"
+    assert relation_type(path, "signals") == "VIEW"
+    assert len(read(path, "SELECT * FROM signal_values")) == 2 * len(wide)
+    # The view reads back exactly what the wide table held
+    pd.testing.assert_frame_equal(
+        sorted_frame(read(path, "SELECT * FROM signals")),
+        sorted_frame(read(path, "SELECT * FROM signals_wide")),
+    )
+
+
+def test_pivot_view_matches_wide_output(tmp_path, long_layout):
+    items = [item("rsi"), item("macd", (12, 26, 9))]
+    wide = wide_frame(["rsi", "macd"], n=5)
+    path = tmp_path / "signals.duckdb"
+    init_signals_storage(path, items)
+    with duckdb.connect(str(path)) as con:
+        signal_writer.write_signal_values(con, wide, items)
+
+    pd.testing.assert_frame_equal(
+        sorted_frame(read(path, "SELECT * FROM signals")), sorted_frame(wide), check_dtype=False,
+    )
+    hashes = read(path, "SELECT DISTINCT indicator_id, params_hash FROM signal_values")
+    assert hashes["params_hash"].notna().all()
+
+
+def test_new_indicator_rebuilds_only_the_view(tmp_path, long_layout):
+    path = tmp_path / "signals.duckdb"
+    init_signals_storage(path, [item("rsi")])
+    with duckdb.connect(str(path)) as con:
+        signal_writer.write_signal_values(con, wide_frame(["rsi"]), [item("rsi")])
+    before = read(path, "SELECT * FROM signal_values ORDER BY symbol")
+
+    init_signals_storage(path, [item("rsi"), item("atr")])
+
+    pd.testing.assert_frame_equal(read(path, "SELECT * FROM signal_values ORDER BY symbol"), before)
+    view = read(path, "SELECT * FROM signals")
+    assert {"rsi_signal", "atr_signal", "atr_weight"} <= set(view.columns)
+    assert view["atr_signal"].isna().all()
@@ -0,0 +1,132 @@
+import os
+import subprocess
+import sys
+
+import duckdb
+import pandas as pd
+import pytest
+
+import storage
+from conftest import make_bars, write_ohlcv
+
+
+@pytest.fixture
+def bars():
+    return make_bars(["A.NS", "B.BO", "C"], 50, start="2024-01-15")
+
+
+def append(bars, root, dataset="ohlcv"):
+    with duckdb.connect() as con:
+        con.register("bars", bars)
+        return storage.append_parquet(con, dataset, "bars", root)
+
+
+def read_view(root, dataset="ohlcv"):
+    with duckdb.connect() as con:
+        name = storage.create_view(con, dataset, root)
+        return con.execute(f"SELECT * FROM {name} ORDER BY symbol, date").fetchdf()
+
+
+def test_append_writes_month_partitions(tmp_path, bars, monkeypatch):
+    monkeypatch.setattr(storage, "PARQUET_PARTITION", "month")
+    files = append(bars, tmp_path)
+
+    parts = sorted(p.relative_to(tmp_path / "ohlcv").parent.as_posix() for p in (tmp_path / "ohlcv").rglob("*.parquet"))
+    assert parts == ["year=2024/month=1", "year=2024/month=2", "year=2024/month=3"]
+    assert files == len(parts)
+
+
+def test_append_writes_exchange_partitions(tmp_path, bars, monkeypatch):
+    monkeypatch.setattr(storage, "PARQUET_PARTITION", "exchange")
+    append(bars, tmp_path)
+
+    parts = {p.parent.name for p in (tmp_path / "ohlcv").rglob("*.parquet")}
+    assert parts == {"exchange=NS", "exchange=BO", "exchange=OTHER"}
+
+
+def test_append_renames_files_out_of_staging(tmp_path, bars, monkeypatch):
+    moves = []
+    real_replace = os.replace
+
+    def recording_replace(src, dst):
+        moves.append((src, dst))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(storage.os, "replace", recording_replace)
+    files = append(bars, tmp_path)
+
+    assert len(moves) == files
+    for src, dst in moves:
+        assert (tmp_path / "_staging") in src.parents
+        assert (tmp_path / "ohlcv") in dst.parents
+    assert not any((tmp_path / "_staging").iterdir())
+
+
+def test_view_reads_appends_without_partition_columns(tmp_path, bars):
+    append(bars.iloc[:60], tmp_path)
+    append(bars.iloc[60:], tmp_path)
+
+    df = read_view(tmp_path)
+    assert list(df.columns) == list(bars.columns)
+    expected = bars.sort_values(["symbol", "date"], ignore_index=True)
+    pd.testing.assert_frame_equal(df.assign(date=df["date"].dt.date), expected, check_dtype=False)
+
+
+def test_view_is_empty_before_any_file_exists(tmp_path):
+    df = read_view(tmp_path)
+    assert df.empty
+    assert list(df.columns) == [col for col, _ in storage.DATASETS["ohlcv"][1]]
+
+
+def test_export_cli_copies_duckdb_tables_once(project, bars):
+    write_ohlcv(project.ohlcv_db, bars)
+    root = project.root / "Data" / "Parquet"
+    env = dict(os.environ, RUBIKVIEW_PARQUET_ROOT=str(root))
+
+    def export():
+        result = subprocess.run(
+            [sys.executable, str(project.root / "Engine" / "storage.py"), "export"],
+            cwd=project.root, env=env, capture_output=True, text=True, timeout=120,
+        )
+        assert result.returncode == 0, result.stdout + result.stderr
+        return result.stdout
+
+    out = export()
+    assert "[OK] yahoo_ohlcv" in out
+    assert "[SKIP] index.duckdb: not found" in out
+    assert len(read_view(root)) == len(bars)
+
+    # A second export never duplicates rows
+    assert "[SKIP] ohlcv: Parquet dataset already has files" in export()
+    assert len(read_view(root)) == len(bars)
+
+
+def test_legacy_duckdb_file_gets_a_passthrough_adjusted_view(tmp_path, bars):
+    db_path = tmp_path / "stocks.duckdb"
+    write_ohlcv(db_path, bars)
+
+    with storage.connect(db_path) as con:
+        # Cursors (the runner's thread mode) see the view as well
+        cur = con.cursor()
+        n = cur.execute("SELECT count(*) FROM adjusted_ohlcv").fetchone()[0]
+        closes = cur.execute("SELECT close FROM adjusted_ohlcv WHERE symbol = 'A.NS' ORDER BY date").fetchdf()
+    assert n == len(bars)
+    assert list(closes["close"]) == list(bars.loc[bars["symbol"] == "A.NS", "close"])
+
+
+def test_adjusted_view_applies_factor_spans(tmp_path, bars):
+    db_path = tmp_path / "stocks.duckdb"
+    write_ohlcv(db_path, bars)
+    split = bars["date"].iloc[10]
+    with duckdb.connect(str(db_path)) as con:
+        con.execute("CREATE TABLE adjustment_factors (symbol VARCHAR, from_date DATE, to_date DATE, "
+                    "price_factor DOUBLE, volume_factor DOUBLE)")
+        con.execute("INSERT INTO adjustment_factors VALUES ('A.NS', DATE '1900-01-01', ?, 0.5, 2.0)", (split,))
+        storage.create_adjusted_view(con, "ohlcv", "yahoo_ohlcv", "adjustment_factors")
+
+    with storage.connect(db_path) as con:
+        df = con.execute("SELECT symbol, date, close, volume FROM adjusted_ohlcv ORDER BY symbol, date").fetchdf()
+    raw = bars.sort_values(["symbol", "date"], ignore_index=True)
+    before = (raw["symbol"] == "A.NS") & (raw["date"] < split)
+    assert list(df["close"]) == pytest.approx(list(raw["close"].where(~before, raw["close"] * 0.5)))
+    assert list(df["volume"]) == pytest.approx(list(raw["volume"].where(~before, raw["volume"] * 2)))
@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, UploadFile, File, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
@@ -79,10 +79,25 @@ async def get_job(
 @router.get("/jobs/{job_id}/log")
 async def get_job_log(
     job_id: int,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    tail: Optional[int] = Query(None, ge=0),
     _: str = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
-    return job_service.get_job_log(db, job_id)
+    return job_service.get_job_log(db, job_id, offset=offset, limit=limit, tail=tail)
+
+
+@router.get("/jobs/{job_id}/log/stream")
+async def stream_job_log(
+    job_id: int,
+    offset: int = Query(0, ge=0),
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+    _: str = Depends(require_admin),
+    db: Session = Depends(get_db),
+):
+    # EventSource reconnects send the id of the last event received
+    return job_service.stream_job_log(db, job_id, offset=last_event_id if last_event_id is not None else offset)
 
 
 @router.get("/ohlcv/status", response_model=OHCLVStatus)
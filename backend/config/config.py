@@ -21,6 +21,15 @@ class Settings(BaseSettings):
 
     # DuckDB
     DUCKDB_PATH: str = os.path.join(BASE_DIR, "Data", "OHCLV Data", "stocks.duckdb")
+    SIGNALS_DUCKDB_PATH: str = os.path.join(BASE_DIR, "Data", "Signals Data", "signals.duckdb")
+
+    # Market data may instead live in Parquet datasets: Engine/storage.py
+    # reads RUBIKVIEW_STORAGE_BACKEND / RUBIKVIEW_PARQUET_* for both sides.
+
+    # Admin jobs: "pool" runs them in pre-started workers with the heavy
+    # libraries already imported, "subprocess" starts a new interpreter per job
+    JOB_EXECUTOR: str = os.getenv("RUBIKVIEW_JOB_EXECUTOR", "pool")
+    JOB_WARM_WORKERS: int = int(os.getenv("RUBIKVIEW_JOB_WARM_WORKERS", "2"))
 
     # Security
     SECRET_KEY: str = "CHANGE_THIS_TO_A_SECURE_SECRET_KEY"
@@ -1,7 +1,8 @@
+import os
+import sys
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import duckdb
 from config.config import settings
 
 # --- SQLite for User Data ---
@@ -22,8 +23,16 @@ def get_db():
         db.close()
 
 # --- DuckDB for Market Data ---
+# Storage layout (DuckDB files or Parquet datasets) is shared with the Engine
+ENGINE_DIR = os.path.join(settings.BASE_DIR, "Engine")
+if ENGINE_DIR not in sys.path:
+    sys.path.append(ENGINE_DIR)
+import storage  # noqa: E402
+
 def get_duckdb_connection():
-    # Connect in read-only mode to avoid locking issues if multiple processes access it
-    # or use read_only=False if we need to write signals
-    conn = duckdb.connect(settings.DUCKDB_PATH, read_only=True)
-    return conn
+    # Read-only, so the nightly writer never blocks on the API. With the
+    # Parquet backend this is a view, empty until the first files land.
+    return storage.connect(settings.DUCKDB_PATH, "ohlcv")
+
+def get_signals_connection():
+    return storage.connect(settings.SIGNALS_DUCKDB_PATH, "signals")
@@ -0,0 +1,160 @@
+"""
+How admin job scripts are started.
+
+``SubprocessExecutor`` starts a new interpreter per job, which then spends
+seconds importing pandas, duckdb, TA-Lib and yfinance before doing any
+work. ``WarmPoolExecutor`` keeps ``JOB_WARM_WORKERS`` workers
+(core/job_worker.py) started with those imports done; a job is handed to
+an idle worker as its script path and runs right away. Each worker runs
+one job and exits, so no state leaks between runs, and a replacement is
+started in the background. When no warm worker is ready the job falls
+back to a fresh subprocess.
+
+Either way ``launch`` returns the job's ``subprocess.Popen`` (its stdout
+carries the output, ``terminate()`` cancels the job) and the read end of
+its progress pipe, so ``core.jobs`` handles both the same.
+"""
+import logging
+import os
+import subprocess
+import sys
+import threading
+from typing import List, Optional, Tuple
+
+from config.config import settings
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "job_worker.py")
+# Must match Engine/progress.py
+PROGRESS_ENV = "RUBIKVIEW_PROGRESS_FD"
+
+Launched = Tuple[subprocess.Popen, Optional[int]]
+
+
+def _job_env() -> dict:
+    # Inherit environment but disable Excel-based progress updates for backend jobs
+    env = os.environ.copy()
+    env["RUBIKVIEW_DISABLE_EXCEL"] = "1"
+    # Force unbuffered Python output so logs appear in real-time.
+    env["PYTHONUNBUFFERED"] = "1"
+    return env
+
+
+def _popen(args: List[str], stdin=None) -> Launched:
+    """Start ``args`` with merged line-buffered output and a progress pipe."""
+    env = _job_env()
+    # Progress goes over a pipe of its own; Windows cannot pass one, so
+    # there the script marks its progress lines on stdout instead
+    progress_fd, pass_fds = None, ()
+    if os.name == "nt":
+        env[PROGRESS_ENV] = "stdout"
+    else:
+        progress_fd, write_fd = os.pipe()
+        env[PROGRESS_ENV] = str(write_fd)
+        pass_fds = (write_fd,)
+
+    try:
+        process = subprocess.Popen(
+            args,
+            stdin=stdin,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, # Merge stderr into stdout
+            cwd=settings.BASE_DIR,
+            env=env,
+            text=True, # Text mode
+            bufsize=1, # Line buffered
+            pass_fds=pass_fds,
+        )
+    except Exception:
+        if progress_fd is not None:
+            os.close(progress_fd)
+        raise
+    finally:
+        # Only the script holds the write end, so the reader sees EOF when it exits
+        for fd in pass_fds:
+            os.close(fd)
+    return process, progress_fd
+
+
+def _discard(worker: Launched) -> None:
+    process, progress_fd = worker
+    if process.poll() is None:
+        process.kill()
+        process.wait()
+    for stream in (process.stdin, process.stdout):
+        if stream:
+            stream.close()
+    if progress_fd is not None:
+        os.close(progress_fd)
+
+
+class SubprocessExecutor:
+    """A new interpreter per job."""
+
+    def start(self) -> None:
+        pass
+
+    def launch(self, script_path: str) -> Launched:
+        return _popen([sys.executable, "-u", script_path])
+
+
+class WarmPoolExecutor:
+    """Pre-started workers with the heavy imports done, one job each."""
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._idle: List[Launched] = []
+        self._lock = threading.Lock()
+        self._refill_lock = threading.Lock()
+        self._fallback = SubprocessExecutor()
+
+    def start(self) -> None:
+        """Top the pool up to ``size`` workers in the background."""
+        threading.Thread(target=self._refill, name="job-worker-refill", daemon=True).start()
+
+    def _refill(self) -> None:
+        with self._refill_lock:
+            while True:
+                with self._lock:
+                    if len(self._idle) >= self.size:
+                        return
+                try:
+                    worker = _popen([sys.executable, "-u", WORKER_SCRIPT], stdin=subprocess.PIPE)
+                except OSError as exc:
+                    logger.error("Could not start a warm job worker: %s", exc)
+                    return
+                with self._lock:
+                    self._idle.append(worker)
+
+    def _take(self) -> Optional[Launched]:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop(0)
+                if worker[0].poll() is None:
+                    return worker
+                _discard(worker)
+        return None
+
+    def launch(self, script_path: str) -> Launched:
+        worker = self._take()
+        self.start()
+        if worker:
+            process = worker[0]
+            try:
+                process.stdin.write(script_path + "\n")
+                process.stdin.close()
+                return worker
+            except OSError:
+                # Worker died after it was taken
+                _discard(worker)
+        return self._fallback.launch(script_path)
+
+
+def make_executor():
+    if settings.JOB_EXECUTOR == "pool":
+        return WarmPoolExecutor(settings.JOB_WARM_WORKERS)
+    return SubprocessExecutor()
+
+
+executor = make_executor()
@@ -0,0 +1,42 @@
+"""
+Warm job worker, started ahead of time by ``core.executor.WarmPoolExecutor``.
+
+Imports the heavy libraries the job scripts use, then waits for one script
+path on stdin and runs that script as ``__main__`` in this interpreter, as
+``python -u <script>`` would. One job per worker: the process exits with
+the script, so nothing carries over to the next run.
+"""
+import importlib
+import os
+import runpy
+import sys
+
+# Imported before the job arrives; missing ones are left to the script
+PRELOAD_MODULES = os.getenv(
+    "RUBIKVIEW_JOB_PRELOAD", "numpy,pandas,pyarrow,duckdb,talib,yfinance"
+).split(",")
+
+
+def preload():
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name.strip())
+        except Exception:
+            pass
+
+
+def main():
+    preload()
+    script_path = sys.stdin.readline().strip()
+    if not script_path:
+        # Pool shut down (stdin closed) before a job was assigned
+        return
+    sys.stdin.close()
+    sys.argv = [script_path]
+    # Same import path as running the script directly
+    sys.path[0] = os.path.dirname(script_path)
+    runpy.run_path(script_path, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
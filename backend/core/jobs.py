@@ -3,14 +3,18 @@ import logging
 import os
 import signal
 import subprocess
-import sys
 import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Dict
+from functools import partial
+from typing import Dict, List
 
 from sqlalchemy.orm import Session
 from . import log_db
+from .log_hub import hub as log_hub
+from .executor import executor as job_executor
+from db import session as database
 from models.admin_job import AdminJob
 from config.config import settings
 
@@ -21,12 +25,42 @@ log_db.init_db()
 
 SCRIPT_MAP: Dict[str, str] = {
     "ohlcv_load": os.path.join(settings.BASE_DIR, "Data", "OHCLV Data", "update_stocks_ohlcv.py"),
+    "index_ohlcv_load": os.path.join(settings.BASE_DIR, "Data", "OHCLV Data", "update_Index_ohlcv.py"),
     "signal_process": os.path.join(settings.BASE_DIR, "Engine", "indicator_runner.py"),
 }
 
+# Pipelines: name -> {stage job type: job types it waits for}. A stage starts
+# as soon as all of its dependencies have completed, so independent stages
+# run side by side and a run takes as long as its longest chain. A pipeline
+# is started like any job type, by its name.
+#
+# The two loaders run side by side: while the index loader holds
+# index.duckdb, the stocks loader reads the trading calendar from the
+# snapshot of the previous index run (Data/OHCLV Data/trading_calendar.py).
+# The Engine/ML scripts are not stages yet; they do not run in this tree
+# (missing project-root config module and ML dependencies).
+PIPELINES: Dict[str, Dict[str, List[str]]] = {
+    "nightly": {
+        "index_ohlcv_load": [],
+        "ohlcv_load": [],
+        "signal_process": ["ohlcv_load"],
+    },
+}
+# Seconds between checks of a running pipeline for a stop request
+PIPELINE_POLL = 1.0
+
 # In-memory map of running processes keyed by AdminJob.id
 PROCESS_MAP: Dict[int, subprocess.Popen] = {}
 
+# Latest progress snapshot of each running job keyed by AdminJob.id. Scripts
+# send cumulative counters as JSON lines (Engine/progress.py); the final
+# snapshot is kept in the job's details as "progress".
+JOB_PROGRESS: Dict[int, dict] = {}
+# Must match Engine/progress.py
+PROGRESS_MARKER = "@@progress "
+# Seconds to wait for the progress pipe to drain after the script exits
+PROGRESS_DRAIN_TIMEOUT = 5.0
+
 def _job_is_running(db: Session, job_type: str) -> bool:
     return (
         db.query(AdminJob)
@@ -36,25 +70,62 @@ def _job_is_running(db: Session, job_type: str) -> bool:
     )
 
 
-def start_job(db: Session, job_type: str, triggered_by: str = "manual") -> AdminJob:
-    script_path = SCRIPT_MAP.get(job_type)
-    if not script_path:
-        raise ValueError(f"Unknown job type: {job_type}")
-    if not os.path.exists(script_path):
-        raise FileNotFoundError(f"Script not found for {job_type}: {script_path}")
-    if _job_is_running(db, job_type):
-        raise RuntimeError(f"{job_type} job is already running.")
+def _record_progress(job_id: int, raw: str) -> None:
+    try:
+        snapshot = json.loads(raw)
+    except ValueError:
+        return
+    if isinstance(snapshot, dict):
+        JOB_PROGRESS[job_id] = snapshot
+
+
+def _read_progress(job_id: int, fd: int) -> None:
+    """Keep the latest snapshot written to the progress pipe until the script closes it."""
+    with os.fdopen(fd, "r", encoding="utf-8", errors="ignore") as pipe:
+        for raw in pipe:
+            _record_progress(job_id, raw)
 
+
+def _store_progress(details: dict, job_id: int) -> None:
+    snapshot = JOB_PROGRESS.get(job_id)
+    if snapshot:
+        details["progress"] = snapshot
+
+
+def _load_details(job: AdminJob) -> dict:
+    try:
+        return json.loads(job.details) if job.details else {}
+    except Exception:
+        return {}
+
+
+def _create_job(db: Session, job_type: str, triggered_by: str, details: dict = None) -> AdminJob:
     job = AdminJob(
         job_type=job_type,
         status="running",
         triggered_by=triggered_by,
         log_path="DB", # Marker to indicate DB logging
+        details=json.dumps(details) if details else None,
         started_at=datetime.utcnow(),
     )
     db.add(job)
     db.commit()
     db.refresh(job)
+    return job
+
+
+def start_job(db: Session, job_type: str, triggered_by: str = "manual") -> AdminJob:
+    if job_type in PIPELINES:
+        return start_pipeline(db, job_type, triggered_by)
+    script_path = SCRIPT_MAP.get(job_type)
+    if not script_path:
+        raise ValueError(f"Unknown job type: {job_type}")
+    if not os.path.exists(script_path):
+        raise FileNotFoundError(f"Script not found for {job_type}: {script_path}")
+    if _job_is_running(db, job_type):
+        raise RuntimeError(f"{job_type} job is already running.")
+
+    job = _create_job(db, job_type, triggered_by)
 
     worker = threading.Thread(
         target=_execute_job, args=(job.id, script_path, job_type), daemon=True
@@ -63,26 +134,21 @@ def start_job(db: Session, job_type: str, triggered_by: str = "manual") -> Admin
     return job
 
 
-def _execute_job(job_id: int, script_path: str, job_type: str) -> None:
+def _execute_job(job_id: int, script_path: str, job_type: str, chain: bool = True) -> None:
     session = database.SessionLocal()
     return_code = None
+    progress_reader = None
+    # Live log watchers follow the job until finish() below
+    log_hub.start(job_id)
     try:
-        # Inherit environment but disable Excel-based progress updates for backend jobs
-        env = os.environ.copy()
-        env["RUBIKVIEW_DISABLE_EXCEL"] = "1"
-        # Force unbuffered Python output so logs appear in real-time.
-        env["PYTHONUNBUFFERED"] = "1"
-        
-        process = subprocess.Popen(
-            [sys.executable, "-u", script_path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT, # Merge stderr into stdout
-            cwd=settings.BASE_DIR,
-            env=env,
-            text=True, # Text mode
-            bufsize=1, # Line buffered
-        )
+        # Warm worker or fresh interpreter (core/executor.py); both give a Popen
+        process, progress_fd = job_executor.launch(script_path)
         PROCESS_MAP[job_id] = process
+        if progress_fd is not None:
+            progress_reader = threading.Thread(
+                target=_read_progress, args=(job_id, progress_fd), name=f"job-{job_id}-progress", daemon=True
+            )
+            progress_reader.start()
 
         # Persist PID
         job = session.get(AdminJob, job_id)
@@ -96,15 +162,20 @@ def _execute_job(job_id: int, script_path: str, job_type: str) -> None:
             session.add(job)
             session.commit()
 
-        # Read output in a loop
-        while True:
-            line = process.stdout.readline()
-            if not line and process.poll() is not None:
-                break
-            if line:
-                log_db.append_log(job_id, line)
-        
+        # Read output in a loop; lines are written to the log store in batches
+        with log_db.LogAppender(job_id, on_flush=partial(log_hub.publish, job_id)) as log:
+            while True:
+                line = process.stdout.readline()
+                if not line and process.poll() is not None:
+                    break
+                if line.startswith(PROGRESS_MARKER):
+                    _record_progress(job_id, line[len(PROGRESS_MARKER):])
+                elif line:
+                    log.write(line)
+
         return_code = process.poll()
+        if progress_reader:
+            progress_reader.join(PROGRESS_DRAIN_TIMEOUT)
 
         # Process finished, remove handle if still present
         PROCESS_MAP.pop(job_id, None)
@@ -121,6 +192,7 @@ def _execute_job(job_id: int, script_path: str, job_type: str) -> None:
                 except Exception:
                     details = {}
                 details["returncode"] = return_code
+                _store_progress(details, job_id)
                 if not job.finished_at:
                     job.finished_at = datetime.utcnow()
                 job.details = json.dumps(details)
@@ -144,6 +216,7 @@ def _execute_job(job_id: int, script_path: str, job_type: str) -> None:
                 except Exception:
                     details = {}
                 details["returncode"] = return_code
+                _store_progress(details, job_id)
                 job.details = json.dumps(details)
                 session.add(job)
                 session.commit()
@@ -174,8 +247,11 @@ def _execute_job(job_id: int, script_path: str, job_type: str) -> None:
                 session.commit()
     finally:
         session.close()
+        JOB_PROGRESS.pop(job_id, None)
+        log_hub.finish(job_id)
 
-    if return_code == 0 and job_type == "ohlcv_load":
+    # Pipelines start their own next stages
+    if chain and return_code == 0 and job_type == "ohlcv_load":
         _auto_trigger_signal_job()
 
 
@@ -192,6 +268,192 @@ def _auto_trigger_signal_job() -> None:
         session.close()
 
 
+# ---------------------------------------------------------------------------
+# Pipelines
+# ---------------------------------------------------------------------------
+
+def _check_pipeline(name: str, stages: Dict[str, List[str]]) -> None:
+    """Raise ValueError unless ``stages`` is a DAG of known job types."""
+    for stage, deps in stages.items():
+        if stage not in SCRIPT_MAP:
+            raise ValueError(f"Pipeline {name}: unknown job type {stage}")
+        for dep in deps:
+            if dep not in stages:
+                raise ValueError(f"Pipeline {name}: {stage} waits for {dep}, which is not a stage")
+    remaining = dict(stages)
+    while remaining:
+        ready = [stage for stage, deps in remaining.items() if not any(d in remaining for d in deps)]
+        if not ready:
+            raise ValueError(f"Pipeline {name}: dependency cycle among {', '.join(remaining)}")
+        for stage in ready:
+            del remaining[stage]
+
+
+def start_pipeline(db: Session, name: str, triggered_by: str = "manual") -> AdminJob:
+    """Start pipeline ``name`` as one job of its own; its stages run as child jobs."""
+    stages = PIPELINES.get(name)
+    if stages is None:
+        raise ValueError(f"Unknown pipeline: {name}")
+    _check_pipeline(name, stages)
+    for stage in stages:
+        if not os.path.exists(SCRIPT_MAP[stage]):
+            raise FileNotFoundError(f"Script not found for {stage}: {SCRIPT_MAP[stage]}")
+    if _job_is_running(db, name):
+        raise RuntimeError(f"{name} pipeline is already running.")
+
+    job = _create_job(db, name, triggered_by, {"stages": {stage: {"status": "pending"} for stage in stages}})
+    worker = threading.Thread(target=_run_pipeline, args=(job.id, name), daemon=True)
+    worker.start()
+    return job
+
+
+def _stage_changed(job: AdminJob) -> bool:
+    """Whether a completed stage wrote new data for the stages after it.
+
+    Scripts that report progress (Engine/progress.py) count a symbol as
+    "success" only when they wrote something for it; scripts that do not
+    report are assumed to have changed their output.
+    """
+    progress = _load_details(job).get("progress")
+    if not progress:
+        return True
+    return (progress.get("counts") or {}).get("success", 0) > 0
+
+
+def _last_run_completed(session: Session, job_type: str, before: datetime) -> bool:
+    last = (
+        session.query(AdminJob)
+        .filter(AdminJob.job_type == job_type, AdminJob.started_at < before)
+        .order_by(AdminJob.started_at.desc())
+        .first()
+    )
+    return last is not None and last.status == "completed"
+
+
+def _run_pipeline(pipeline_id: int, name: str) -> None:
+    """Run the stages of pipeline ``name`` as their dependencies complete.
+
+    A stage whose dependencies all completed without new data is skipped
+    when its own last run completed, since its inputs are unchanged; the
+    stages themselves only process what changed since their watermarks.
+    A failed or stopped stage cancels the stages that depend on it, while
+    independent branches run on. Stopping the pipeline job stops its
+    running stages.
+    """
+    stages = PIPELINES[name]
+    session = database.SessionLocal()
+    state = {stage: "pending" for stage in stages}
+    stage_jobs: Dict[str, int] = {}
+    changed: Dict[str, bool] = {}
+    running = {}
+    stopped = False
+    log_hub.start(pipeline_id)
+    pool = ThreadPoolExecutor(max_workers=len(stages), thread_name_prefix=f"pipeline-{pipeline_id}")
+    try:
+        pipeline = session.get(AdminJob, pipeline_id)
+        with log_db.LogAppender(pipeline_id, on_flush=partial(log_hub.publish, pipeline_id)) as log:
+
+            def note(text):
+                log.write(f"[{datetime.utcnow():%H:%M:%S}] {text}\n")
+
+            def save():
+                session.refresh(pipeline)
+                details = _load_details(pipeline)
+                details["stages"] = {
+                    stage: {"status": state[stage], "job_id": stage_jobs.get(stage)} for stage in stages
+                }
+                pipeline.details = json.dumps(details)
+                session.add(pipeline)
+                session.commit()
+
+            def schedule():
+                # Repeat until nothing changes: a skipped stage can make its dependents ready
+                progressed = True
+                while progressed:
+                    progressed = False
+                    for stage, deps in stages.items():
+                        dep_states = [state[d] for d in deps]
+                        if state[stage] != "pending" or not all(
+                            s in ("completed", "skipped", "failed", "stopped", "cancelled") for s in dep_states
+                        ):
+                            continue
+                        progressed = True
+                        if any(s in ("failed", "stopped", "cancelled") for s in dep_states):
+                            state[stage] = "cancelled"
+                            note(f"{stage} cancelled: a dependency did not complete")
+                        elif deps and not any(changed[d] for d in deps) and _last_run_completed(
+                            session, stage, pipeline.started_at
+                        ):
+                            state[stage], changed[stage] = "skipped", False
+                            note(f"{stage} skipped: no new input since its last run")
+                        elif _job_is_running(session, stage):
+                            state[stage] = "failed"
+                            note(f"{stage} failed: a {stage} job is already running")
+                        else:
+                            job = _create_job(session, stage, f"pipeline:{pipeline_id}")
+                            stage_jobs[stage], state[stage] = job.id, "running"
+                            running[pool.submit(_execute_job, job.id, SCRIPT_MAP[stage], stage, False)] = stage
+                            note(f"{stage} started (job {job.id})")
+
+            note(f"Pipeline {name}: {', '.join(stages)}")
+            schedule()
+            save()
+            while running:
+                done, _ = wait(running, timeout=PIPELINE_POLL, return_when=FIRST_COMPLETED)
+                session.refresh(pipeline)
+                if not stopped and pipeline.status == "stopped":
+                    stopped = True
+                    note("Stop requested; stopping running stages")
+                    for stage in running.values():
+                        try:
+                            stop_job(session, stage_jobs[stage])
+                        except Exception as exc:
+                            note(f"{stage}: could not stop job {stage_jobs[stage]}: {exc}")
+                for future in done:
+                    stage = running.pop(future)
+                    job = session.get(AdminJob, stage_jobs[stage])
+                    session.refresh(job)
+                    state[stage] = job.status if job.status in ("completed", "failed", "stopped") else "failed"
+                    changed[stage] = state[stage] == "completed" and _stage_changed(job)
+                    unchanged = state[stage] == "completed" and not changed[stage]
+                    note(f"{stage} {state[stage]}" + (" (no new data)" if unchanged else ""))
+                if not stopped:
+                    schedule()
+                if done:
+                    save()
+
+            for stage in stages:
+                if state[stage] == "pending":
+                    state[stage] = "cancelled"
+            failed = [stage for stage in stages if state[stage] in ("failed", "stopped", "cancelled")]
+            note(f"Pipeline {name} finished" + (f"; not completed: {', '.join(failed)}" if failed else ""))
+            save()
+            session.refresh(pipeline)
+            if pipeline.status == "running":
+                pipeline.status = "failed" if failed else "completed"
+            if not pipeline.finished_at:
+                pipeline.finished_at = datetime.utcnow()
+            session.add(pipeline)
+            session.commit()
+    except Exception as exc:  # pragma: no cover - defensive logging
+        logger.exception("Pipeline %s failed: %s", name, exc)
+        pipeline = session.get(AdminJob, pipeline_id)
+        if pipeline:
+            session.refresh(pipeline)
+            if pipeline.status == "running":
+                pipeline.status = "failed"
+                pipeline.finished_at = datetime.utcnow()
+                details = _load_details(pipeline)
+                details["error"] = str(exc)
+                pipeline.details = json.dumps(details)
+                session.add(pipeline)
+                session.commit()
+    finally:
+        pool.shutdown(wait=False)
+        session.close()
+        log_hub.finish(pipeline_id)
+
+
 def stop_job(db: Session, job_id: int) -> AdminJob:
     """
     Attempt to stop a running background job by terminating its subprocess.
@@ -225,6 +487,11 @@ def stop_job(db: Session, job_id: int) -> AdminJob:
     db.add(job)
     db.commit()
 
+    if job.job_type in PIPELINES:
+        # The pipeline's thread sees the status and stops its running stages
+        db.refresh(job)
+        return job
+
     return_code = None
     try:
         if proc:
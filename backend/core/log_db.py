@@ -1,14 +1,39 @@
+"""
+Job log storage (Data/logs.db, SQLite).
+
+Logs are append-only: ``job_log_lines`` holds one row per output line
+keyed by (job_id, seq), so writing a line never rereads or rewrites the
+lines before it and readers can page by ``seq``. The database runs in WAL
+mode, so API reads do not block the job that is writing.
+
+``LogAppender`` batches a job's lines into one insert per
+``FLUSH_LINES`` lines or ``FLUSH_INTERVAL`` seconds. Jobs logged before
+this layout keep their single ``job_logs.content`` blob, which ``get_log``
+still reads.
+"""
 import sqlite3
 import os
+import threading
 from datetime import datetime
+from typing import Callable, List, Optional
 from config.config import settings
 
 DB_PATH = os.path.join(settings.BASE_DIR, "Data", "logs.db")
+# A job's pending lines are written once either limit is reached
+FLUSH_LINES = 200
+FLUSH_INTERVAL = 0.5
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    # WAL is persistent; NORMAL sync is safe with it and skips an fsync per commit
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
 
 def init_db():
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS job_logs (
             job_id INTEGER PRIMARY KEY,
@@ -16,29 +41,139 @@ def init_db():
             updated_at TIMESTAMP
         )
     """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS job_log_lines (
+            job_id INTEGER NOT NULL,
+            seq INTEGER NOT NULL,
+            ts TIMESTAMP,
+            text TEXT,
+            PRIMARY KEY (job_id, seq)
+        ) WITHOUT ROWID
+    """)
     conn.commit()
     conn.close()
 
+def _next_seq(conn, job_id: int) -> int:
+    row = conn.execute("SELECT MAX(seq) FROM job_log_lines WHERE job_id = ?", (job_id,)).fetchone()
+    return 0 if row[0] is None else row[0] + 1
+
+def append_lines(job_id: int, lines: List[str], start_seq: Optional[int] = None) -> int:
+    """Insert ``lines`` (each keeping its newline) in one transaction; returns the next seq."""
+    if not lines:
+        return start_seq or 0
+    conn = _connect()
+    try:
+        with conn:
+            seq = _next_seq(conn, job_id) if start_seq is None else start_seq
+            now = datetime.utcnow()
+            conn.executemany(
+                "INSERT INTO job_log_lines (job_id, seq, ts, text) VALUES (?, ?, ?, ?)",
+                [(job_id, seq + i, now, line) for i, line in enumerate(lines)],
+            )
+    finally:
+        conn.close()
+    return seq + len(lines)
+
 def append_log(job_id: int, text: str):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    # Check if exists
-    cursor.execute("SELECT content FROM job_logs WHERE job_id = ?", (job_id,))
-    row = cursor.fetchone()
-    if row:
-        new_content = row[0] + text
-        cursor.execute("UPDATE job_logs SET content = ?, updated_at = ? WHERE job_id = ?", 
-                       (new_content, datetime.utcnow(), job_id))
-    else:
-        cursor.execute("INSERT INTO job_logs (job_id, content, updated_at) VALUES (?, ?, ?)", 
-                       (job_id, text, datetime.utcnow()))
-    conn.commit()
-    conn.close()
+    append_lines(job_id, text.splitlines(keepends=True))
 
-def get_log(job_id: int) -> str:
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT content FROM job_logs WHERE job_id = ?", (job_id,))
-    row = cursor.fetchone()
-    conn.close()
-    return row[0] if row else ""
+
+class LogAppender:
+    """Buffered, thread-safe appender of one job's output lines.
+
+    ``write`` only buffers; a background thread flushes at least every
+    ``interval`` seconds so quiet jobs still show their latest line.
+    ``close()`` writes whatever is left. ``on_flush(start_seq, lines)`` is
+    called after each written batch, in seq order.
+    """
+
+    def __init__(self, job_id: int, max_lines: int = FLUSH_LINES, interval: float = FLUSH_INTERVAL,
+                 on_flush: Optional[Callable[[int, List[str]], None]] = None):
+        self.job_id = job_id
+        self.on_flush = on_flush
+        self.max_lines = max(1, max_lines)
+        self.interval = interval
+        self._lines: List[str] = []
+        self._seq: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-{job_id}-log", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, line: str):
+        with self._lock:
+            self._lines.append(line)
+            full = len(self._lines) >= self.max_lines
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            lines, self._lines = self._lines, []
+            if lines:
+                # Keep the lock so concurrent flushes cannot interleave their seqs
+                self._seq = append_lines(self.job_id, lines, self._seq)
+                if self.on_flush:
+                    self.on_flush(self._seq - len(lines), lines)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # That batch is dropped; the job itself keeps running
+                pass
+
+
+def _legacy_lines(conn, job_id: int) -> List[str]:
+    row = conn.execute("SELECT content FROM job_logs WHERE job_id = ?", (job_id,)).fetchone()
+    return row[0].splitlines(keepends=True) if row and row[0] else []
+
+def get_log_lines(job_id: int, offset: int = 0, limit: Optional[int] = None, tail: Optional[int] = None) -> List[str]:
+    """Lines of a job's log: from line ``offset`` (at most ``limit``), or the last ``tail`` lines."""
+    conn = _connect()
+    try:
+        if tail is not None:
+            rows = conn.execute(
+                "SELECT text FROM job_log_lines WHERE job_id = ? ORDER BY seq DESC LIMIT ?",
+                (job_id, max(tail, 0)),
+            ).fetchall()
+            lines = [r[0] for r in reversed(rows)]
+        else:
+            rows = conn.execute(
+                "SELECT text FROM job_log_lines WHERE job_id = ? AND seq >= ? ORDER BY seq LIMIT ?",
+                (job_id, max(offset, 0), -1 if limit is None else limit),
+            ).fetchall()
+            lines = [r[0] for r in rows]
+        if lines or _next_seq(conn, job_id):
+            return lines
+        # Job logged before the line store existed
+        legacy = _legacy_lines(conn, job_id)
+    finally:
+        conn.close()
+    if tail is not None:
+        return legacy[-tail:] if tail > 0 else []
+    end = None if limit is None else offset + limit
+    return legacy[offset:end]
+
+def get_log(job_id: int, offset: int = 0, limit: Optional[int] = None, tail: Optional[int] = None) -> str:
+    return "".join(get_log_lines(job_id, offset, limit, tail))
+
+def count_lines(job_id: int) -> int:
+    conn = _connect()
+    try:
+        count = _next_seq(conn, job_id)
+        return count or len(_legacy_lines(conn, job_id))
+    finally:
+        conn.close()
@@ -0,0 +1,91 @@
+"""
+In-process fan-out of job log lines to live watchers.
+
+The job's log appender publishes each batch of lines once, right after
+writing it to the log store; every subscribed stream (one per watching
+admin, see ``JobService.stream_job_log``) gets the same batch pushed onto
+its own asyncio queue, so watchers add no database reads beyond their
+initial catch-up from their cursor.
+
+Publishing happens on the job's threads; subscribers live on the API
+event loop, so batches cross over with ``call_soon_threadsafe``.
+"""
+import asyncio
+import threading
+from typing import Dict, List, Set
+
+# Batches a subscriber may fall behind before it is switched to catching up from the store
+SUBSCRIBER_QUEUE = 1000
+
+# Pushed to subscribers when the job's output has ended
+END = None
+
+
+class Subscriber:
+    """One watcher's queue of ``(start_seq, lines)`` batches (or ``END``)."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE)
+        # Set when a batch was dropped; the reader then re-reads from the store
+        self.overflowed = False
+
+    def _offer(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            if item is END:
+                # Make room so the end is never lost; the gap is caught up from the store
+                self.queue.get_nowait()
+                self.queue.put_nowait(END)
+
+    def push(self, item):
+        try:
+            self.loop.call_soon_threadsafe(self._offer, item)
+        except RuntimeError:
+            # Event loop already closed (server shutting down)
+            pass
+
+
+class LogHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active: Set[int] = set()
+        self._subscribers: Dict[int, List[Subscriber]] = {}
+
+    def start(self, job_id: int):
+        with self._lock:
+            self._active.add(job_id)
+
+    def publish(self, job_id: int, start_seq: int, lines: List[str]):
+        with self._lock:
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for sub in subscribers:
+            sub.push((start_seq, lines))
+
+    def finish(self, job_id: int):
+        with self._lock:
+            self._active.discard(job_id)
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for sub in subscribers:
+            sub.push(END)
+
+    def subscribe(self, job_id: int):
+        """Subscribe from the running event loop; returns (subscriber, job still producing)."""
+        sub = Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append(sub)
+            # Read under the lock: a job that is active here will push END to this subscriber
+            return sub, job_id in self._active
+
+    def unsubscribe(self, job_id: int, sub: Subscriber):
+        with self._lock:
+            subs = self._subscribers.get(job_id, [])
+            if sub in subs:
+                subs.remove(sub)
+            if not subs:
+                self._subscribers.pop(job_id, None)
+
+
+hub = LogHub()
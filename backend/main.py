@@ -11,6 +11,7 @@ from models.user import User as UserModel
 
 # scheduler as scheduler_module  # Temporarily disabled
 from config.config import settings
+from core.executor import executor as job_executor
 from api.v1 import stocks_routes, analysis_routes, admin_routes, auth_routes
 from security.hashing import get_password_hash, verify_password
 
@@ -142,6 +143,9 @@ ensure_superadmin()
 # 4) Initialize job scheduler
 # scheduler_module.init_scheduler()  # Temporarily disabled
 
+# 5) Start warm job workers so the first admin job skips the heavy imports
+job_executor.start()
+
 app = FastAPI(
     title="Rubik View API",
     description="Professional Stock Trading Platform API",
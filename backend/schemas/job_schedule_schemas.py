@@ -5,7 +5,7 @@ from typing import Optional, Literal
 JobScheduleType = Literal["daily", "weekly", "interval", "cron"]
 
 class JobScheduleCreate(BaseModel):
-    job_type: str  # "ohlcv_load" or "signal_process"
+    job_type: str  # a job type or pipeline name, see schemas.job_schemas.JobType
     schedule_type: JobScheduleType
     schedule_value: dict  # JSON object with schedule details
     is_active: bool = True
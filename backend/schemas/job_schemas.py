@@ -2,7 +2,13 @@ from datetime import datetime
 from pydantic import BaseModel
 from typing import Optional, Literal
 
-JobType = Literal["ohlcv_load", "signal_process"]
+JobType = Literal[
+    "ohlcv_load",
+    "index_ohlcv_load",
+    "signal_process",
+    # Pipelines (core.jobs.PIPELINES)
+    "nightly",
+]
 
 class AdminJob(BaseModel):
     id: int
@@ -1,8 +1,15 @@
+import asyncio
+import json
 import os
+import duckdb
 from fastapi import HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
+from config.config import settings
 from core import jobs, log_db
+from core.log_hub import END, hub as log_hub
 from models.admin_job import AdminJob
 
 class JobService:
@@ -49,24 +56,202 @@ class JobService:
             raise HTTPException(404, "Job not found")
         return job
 
-    def get_job_log(self, db: Session, job_id: int):
+    def get_job_log(self, db: Session, job_id: int, offset: int = 0, limit: int = None, tail: int = None):
+        """Job log as text: lines from ``offset`` (at most ``limit``) or the last ``tail`` lines.
+
+        ``X-Log-Lines`` carries the log's current line count, so a client can
+        poll with ``offset`` set to it and only receive new lines.
+        """
         job = self.get_job(db, job_id)
 
-        content = log_db.get_log(job_id)
+        content = log_db.get_log(job_id, offset=offset, limit=limit, tail=tail)
+        total = log_db.count_lines(job_id)
 
-        if not content and job.log_path and os.path.exists(job.log_path):
+        if not content and not total and job.log_path and os.path.exists(job.log_path):
             with open(job.log_path, "r", encoding="utf-8", errors="ignore") as f:
                 content = f.read()
 
-        return Response(content or "No log available", media_type="text/plain")
+        return Response(
+            content or "No log available",
+            media_type="text/plain",
+            headers={"X-Log-Lines": str(total)},
+        )
+
+    # Lines per store read while a log stream catches up, and idle seconds between keep-alives
+    STREAM_PAGE_LINES = 2000
+    STREAM_KEEPALIVE = 15.0
+
+    @staticmethod
+    def _sse(next_offset: int, lines):
+        """One SSE event for a batch of lines; its id is the offset to resume from."""
+        data = "".join("data: " + line.rstrip("\r\n") + "\n" for line in lines)
+        return f"id: {next_offset}\n{data}\n"
+
+    def stream_job_log(self, db: Session, job_id: int, offset: int = 0):
+        """Server-Sent Events stream of a job's log from line ``offset``.
+
+        Lines already stored are read in pages from the log store; after
+        that the stream is fed by the in-process log hub, shared by all
+        watchers of the job. Each event's id is the next line offset (pass
+        it back as ``offset`` or ``Last-Event-ID`` to resume); an ``end``
+        event closes the stream once the job's output is complete.
+        """
+        self.get_job(db, job_id)
+
+        async def catch_up(cursor):
+            while True:
+                lines = await run_in_threadpool(log_db.get_log_lines, job_id, cursor, self.STREAM_PAGE_LINES)
+                if lines:
+                    cursor += len(lines)
+                    yield cursor, lines
+                if len(lines) < self.STREAM_PAGE_LINES:
+                    return
+
+        async def events():
+            # Subscribe before reading the store so no batch falls between the two
+            sub, producing = log_hub.subscribe(job_id)
+            cursor = offset
+            try:
+                async for cursor, lines in catch_up(cursor):
+                    yield self._sse(cursor, lines)
+                while producing:
+                    try:
+                        item = await asyncio.wait_for(sub.queue.get(), self.STREAM_KEEPALIVE)
+                    except asyncio.TimeoutError:
+                        yield ": keep-alive\n\n"
+                        continue
+                    if sub.overflowed:
+                        # Fell behind and batches were dropped: re-read the gap from the store
+                        sub.overflowed = False
+                        async for cursor, lines in catch_up(cursor):
+                            yield self._sse(cursor, lines)
+                    if item is END:
+                        break
+                    start_seq, lines = item
+                    # Skip what the catch-up already sent
+                    lines = lines[max(cursor - start_seq, 0):]
+                    if lines:
+                        cursor = max(cursor, start_seq) + len(lines)
+                        yield self._sse(cursor, lines)
+                yield f"event: end\nid: {cursor}\ndata: {cursor}\n\n"
+            finally:
+                log_hub.unsubscribe(job_id, sub)
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    def _watermark_counts(self, since):
+        """Symbol counts per fetch outcome since ``since``, from ohlcv_watermarks.
+
+        Reads the loader's small per-symbol table instead of scanning
+        yahoo_ohlcv. Returns None when it cannot be read (no loader run yet,
+        or the loader holds stocks.duckdb for writing).
+        """
+        try:
+            with duckdb.connect(settings.DUCKDB_PATH, read_only=True) as conn:
+                total = conn.execute("SELECT count(*) FROM ohlcv_watermarks").fetchone()[0]
+                by_status = dict(conn.execute(
+                    "SELECT status, count(*) FROM ohlcv_watermarks WHERE last_fetch_at >= ? GROUP BY status",
+                    (since,),
+                ).fetchall())
+                last = conn.execute(
+                    "SELECT symbol FROM ohlcv_watermarks WHERE last_fetch_at >= ? ORDER BY last_fetch_at DESC LIMIT 1",
+                    (since,),
+                ).fetchone()
+        except duckdb.Error:
+            return None
+        return total, by_status, last[0] if last else None
+
+    def _latest_job(self, db: Session, job_type: str):
+        return (
+            db.query(AdminJob)
+            .filter(AdminJob.job_type == job_type)
+            .order_by(AdminJob.started_at.desc())
+            .first()
+        )
+
+    def _job_progress(self, job):
+        """Latest progress snapshot of a job: kept in memory while it runs, in its details after."""
+        snapshot = jobs.JOB_PROGRESS.get(job.id)
+        if snapshot is None and job.details:
+            try:
+                snapshot = json.loads(job.details).get("progress")
+            except (ValueError, AttributeError):
+                snapshot = None
+        return snapshot
+
+    def _job_status(self, job):
+        """Status fields of ``job``, with counters from its progress snapshot when it sent one."""
+        status = {
+            "job_id": job.id,
+            "status": job.status,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
+        snapshot = self._job_progress(job)
+        if snapshot:
+            counts = snapshot.get("counts") or {}
+            total = snapshot.get("total") or 0
+            done = snapshot.get("done") or 0
+            status.update(
+                total_symbols=total,
+                processed_symbols=done,
+                success=counts.get("success", 0),
+                failed=counts.get("failed", 0),
+                skipped=counts.get("skipped", 0),
+                uptodate=counts.get("uptodate", 0),
+                last_symbol=snapshot.get("symbol"),
+                last_message=snapshot.get("message"),
+                percent_complete=round(min(done, total) / total * 100, 2) if total else 0.0,
+            )
+        return status
+
+    def _add_log_preview(self, status, job_id: int):
+        lines = [line for line in log_db.get_log(job_id, tail=20).splitlines() if line.strip()]
+        if lines:
+            if not status.get("last_message"):
+                status["last_message"] = lines[-1]
+            status["log_preview"] = lines[-10:]
 
     def get_ohlcv_status(self, db: Session):
-        # your full logic here — already clean
-        ...
+        job = self._latest_job(db, "ohlcv_load")
+        if not job:
+            return {"status": "never_run"}
+
+        status = self._job_status(job)
+        # Jobs run before progress events existed: derive counts from the watermarks
+        counts = None if "total_symbols" in status else self._watermark_counts(job.started_at)
+        if counts:
+            total, by_status, last_symbol = counts
+            processed = sum(by_status.values())
+            status.update(
+                total_symbols=total,
+                processed_symbols=processed,
+                success=by_status.get("success", 0),
+                failed=by_status.get("failed", 0),
+                # Deferred: recently empty symbols the loader is backing off from
+                skipped=by_status.get("skipped", 0) + by_status.get("deferred", 0),
+                uptodate=by_status.get("uptodate", 0),
+                last_symbol=last_symbol,
+                percent_complete=round(processed / total * 100, 2) if total else 0.0,
+            )
+
+        self._add_log_preview(status, job.id)
+        return status
 
     def get_signal_status(self, db: Session):
-        # your full logic here — already clean
-        ...
+        job = self._latest_job(db, "signal_process")
+        if not job:
+            return {"status": "never_run"}
+
+        status = self._job_status(job)
+        if "total_symbols" in status:
+            status.update(processed=status["success"], errors=status["failed"])
+        self._add_log_preview(status, job.id)
+        return status
 
 
 job_service = JobService()
@@ -39,7 +39,7 @@ def get_symbol_history(symbol: str, limit: int = 100):
     try:
         query = """
             SELECT date, open, high, low, close, volume
-            FROM yahoo_ohlcv
+            FROM adjusted_ohlcv
             WHERE symbol = ?
             ORDER BY date DESC
             LIMIT ?
@@ -53,6 +53,8 @@ def get_symbol_history(symbol: str, limit: int = 100):
         df["date"] = df["date"].astype(str)
         return df.to_dict(orient="records")
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DB error: {e}")
 
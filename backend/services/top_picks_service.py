@@ -1,10 +1,8 @@
-from pathlib import Path
 from fastapi import HTTPException
-import duckdb
 import pandas as pd
 
-from config import config as settings
 from core import constants
+from core.database import get_signals_connection
 
 
 def classify_signal(score, min_score, max_score):
@@ -29,10 +27,7 @@ def classify_signal(score, min_score, max_score):
 
 def get_top_picks(limit: int = 10):
     try:
-        ohlcv_path = Path(settings.DUCKDB_PATH)
-        signals_db_path = ohlcv_path.parent.parent / "Signals Data" / "signals.duckdb"
-
-        conn = duckdb.connect(str(signals_db_path), read_only=True)
+        conn = get_signals_connection()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Could not connect to signals DB: {str(e)}")
 
@@ -0,0 +1,51 @@
+"""
+Fixtures for the backend tests.
+
+Settings, the users database and the job log store are resolved at import
+time, so they are pointed at a scratch directory here, before any app
+module is imported; the tracked Data/*.db files are never touched. Jobs
+start as plain subprocesses unless a test builds its own executor.
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+ENGINE_DIR = BACKEND_DIR.parent / "Engine"
+SCRATCH = tempfile.mkdtemp(prefix="rubikview-tests-")
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+os.environ["SQLITE_USERS_DB"] = f"sqlite:///{SCRATCH}/users.db"
+os.environ["RUBIKVIEW_JOB_EXECUTOR"] = "subprocess"
+
+from core import log_db  # noqa: E402
+
+log_db.DB_PATH = os.path.join(SCRATCH, "logs.db")
+log_db.init_db()
+
+import models  # noqa: E402
+from db import session as database  # noqa: E402
+
+models.Base.metadata.create_all(bind=database.engine)
+
+
+@pytest.fixture
+def db():
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def wait_for(predicate, timeout=30.0, interval=0.05):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(interval)
+    return False
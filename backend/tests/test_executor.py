@@ -0,0 +1,99 @@
+import os
+import signal
+import sys
+import textwrap
+
+import pytest
+
+from conftest import ENGINE_DIR, wait_for
+from core.executor import SubprocessExecutor, WarmPoolExecutor, _discard
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="progress pipes are POSIX-only")
+
+
+@pytest.fixture
+def script(tmp_path):
+    def make(body):
+        path = tmp_path / f"job_{len(list(tmp_path.iterdir()))}.py"
+        path.write_text(textwrap.dedent(body))
+        return str(path)
+    return make
+
+
+def output(process):
+    out = process.stdout.read()
+    process.wait(10)
+    return out
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    # A light module stands in for pandas & co.
+    monkeypatch.setenv("RUBIKVIEW_JOB_PRELOAD", "decimal")
+    pool = WarmPoolExecutor(1)
+    pool.start()
+    assert wait_for(lambda: len(pool._idle) == 1)
+    yield pool
+    pool._refill_lock.acquire()
+    for worker in pool._idle:
+        _discard(worker)
+
+
+def test_warm_worker_runs_the_script_as_main_with_preloaded_modules(pool, script):
+    path = script("""
+        import sys
+        print("preloaded", "decimal" in sys.modules)
+        print("main", __name__, sys.argv == [__file__])
+        print("path", sys.path[0] == __import__("os").path.dirname(__file__))
+    """)
+    warm_pid = pool._idle[0][0].pid
+    process, progress_fd = pool.launch(path)
+
+    assert process.pid == warm_pid
+    assert output(process).splitlines() == ["preloaded True", "main __main__ True", "path True"]
+    assert process.returncode == 0
+    os.close(progress_fd)
+    # The used worker is replaced, never reused
+    assert wait_for(lambda: len(pool._idle) == 1 and pool._idle[0][0].pid != warm_pid)
+
+
+def test_exit_codes_and_progress_pipe_reach_the_runner(pool, script):
+    path = script(f"""
+        import os, sys
+        sys.path.insert(0, {str(ENGINE_DIR)!r})
+        from progress import ProgressChannel
+        channel = ProgressChannel(1)
+        channel.record("success", "X")
+        channel.close()
+        sys.exit(3)
+    """)
+    process, progress_fd = pool.launch(path)
+    output(process)
+    assert process.returncode == 3
+    with os.fdopen(progress_fd) as pipe:
+        assert '"event": "done"' in pipe.read().splitlines()[-1]
+
+
+def test_terminate_cancels_a_running_job(pool, script):
+    process, progress_fd = pool.launch(script("import time; print('started', flush=True); time.sleep(60)"))
+    assert process.stdout.readline() == "started\n"
+    process.terminate()
+    assert process.wait(10) == -signal.SIGTERM
+    os.close(progress_fd)
+
+
+def test_pool_falls_back_to_a_fresh_interpreter_when_no_worker_is_ready(script, monkeypatch):
+    pool = WarmPoolExecutor(1)
+    # Never filled: every launch finds the pool empty
+    monkeypatch.setattr(pool, "start", lambda: None)
+    process, progress_fd = pool.launch(script("import sys; print(sys.argv[0])"))
+
+    assert output(process).strip().endswith(".py")
+    assert process.args[:2] == [sys.executable, "-u"]
+    os.close(progress_fd)
+
+
+def test_subprocess_executor_runs_a_new_interpreter(script):
+    process, progress_fd = SubprocessExecutor().launch(script("print('hi')"))
+    assert output(process) == "hi\n" and process.returncode == 0
+    os.close(progress_fd)
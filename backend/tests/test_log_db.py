@@ -0,0 +1,71 @@
+import sqlite3
+import threading
+
+from core import log_db
+from core.log_db import LogAppender, append_lines, count_lines, get_log, get_log_lines
+
+_next_job = iter(range(10_000, 20_000))
+
+
+def new_job_id():
+    return next(_next_job)
+
+
+def test_lines_page_in_write_order():
+    job_id = new_job_id()
+    lines = [f"line {i}\n" for i in range(10)]
+    assert append_lines(job_id, lines[:4]) == 4
+    assert append_lines(job_id, lines[4:]) == 10
+
+    assert get_log_lines(job_id) == lines
+    assert get_log_lines(job_id, offset=3, limit=4) == lines[3:7]
+    assert get_log_lines(job_id, offset=8, limit=5) == lines[8:]
+    assert get_log_lines(job_id, tail=3) == lines[-3:]
+    assert get_log_lines(job_id, offset=10) == []
+    assert count_lines(job_id) == 10
+
+
+def test_appender_batches_and_reports_each_flush_in_seq_order():
+    job_id = new_job_id()
+    flushed = []
+    with LogAppender(job_id, max_lines=3, interval=60, on_flush=lambda seq, lines: flushed.append((seq, lines))) as log:
+        for i in range(7):
+            log.write(f"{i}\n")
+        # Two full batches went out; the seventh line waits for close()
+        assert count_lines(job_id) == 6
+
+    assert get_log(job_id) == "".join(f"{i}\n" for i in range(7))
+    assert [seq for seq, _ in flushed] == [0, 3, 6]
+    assert [len(lines) for _, lines in flushed] == [3, 3, 1]
+
+
+def test_concurrent_writers_keep_every_line_once():
+    job_id = new_job_id()
+    with LogAppender(job_id, max_lines=5, interval=0.01) as log:
+        threads = [
+            threading.Thread(target=lambda t=t: [log.write(f"{t}:{i}\n") for i in range(50)])
+            for t in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    lines = get_log_lines(job_id)
+    assert sorted(lines) == sorted(f"{t}:{i}\n" for t in range(4) for i in range(50))
+    # Each writer's lines keep their relative order
+    for t in range(4):
+        mine = [line for line in lines if line.startswith(f"{t}:")]
+        assert mine == [f"{t}:{i}\n" for i in range(50)]
+
+
+def test_legacy_blob_logs_are_still_paged():
+    job_id = new_job_id()
+    conn = sqlite3.connect(log_db.DB_PATH)
+    with conn:
+        conn.execute("INSERT INTO job_logs (job_id, content) VALUES (?, ?)", (job_id, "a\nb\nc\n"))
+    conn.close()
+
+    assert get_log_lines(job_id, offset=1, limit=1) == ["b\n"]
+    assert get_log_lines(job_id, tail=2) == ["b\n", "c\n"]
+    assert count_lines(job_id) == 3
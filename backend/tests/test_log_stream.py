@@ -0,0 +1,114 @@
+import asyncio
+import threading
+from datetime import datetime
+
+import pytest
+
+from core import log_db, log_hub
+from core.log_hub import END, LogHub
+from models.admin_job import AdminJob
+from services.job_service import job_service
+
+
+def test_hub_fans_out_batches_published_from_other_threads():
+    hub = LogHub()
+
+    async def watch():
+        first, producing = hub.subscribe(1)
+        second, _ = hub.subscribe(1)
+        assert producing is False
+        hub.start(1)
+        publisher = threading.Thread(target=lambda: (hub.publish(1, 0, ["a\n"]), hub.publish(1, 1, ["b\n"]), hub.finish(1)))
+        publisher.start()
+        got = []
+        for sub in (first, second):
+            items = []
+            while True:
+                item = await asyncio.wait_for(sub.queue.get(), 5)
+                if item is END:
+                    break
+                items.append(item)
+            got.append(items)
+        publisher.join()
+        hub.unsubscribe(1, first)
+        hub.unsubscribe(1, second)
+        return got
+
+    first, second = asyncio.run(watch())
+    assert first == second == [(0, ["a\n"]), (1, ["b\n"])]
+
+
+def test_full_subscriber_is_flagged_and_still_gets_the_end(monkeypatch):
+    monkeypatch.setattr(log_hub, "SUBSCRIBER_QUEUE", 2)
+    hub = LogHub()
+
+    async def watch():
+        sub, _ = hub.subscribe(7)
+        hub.start(7)
+        for i in range(5):
+            hub.publish(7, i, [f"{i}\n"])
+        hub.finish(7)
+        await asyncio.sleep(0.05)
+        items = [sub.queue.get_nowait() for _ in range(sub.queue.qsize())]
+        return sub.overflowed, items
+
+    overflowed, items = asyncio.run(watch())
+    assert overflowed
+    assert items[-1] is END
+
+
+def parse_events(chunks):
+    events = []
+    for block in "".join(chunks).split("\n\n"):
+        if not block or block.startswith(":"):
+            continue
+        event = {"event": "message", "data": []}
+        for line in block.splitlines():
+            field, _, value = line.partition(": ")
+            if field == "data":
+                event["data"].append(value)
+            else:
+                event[field] = value
+        events.append(event)
+    return events
+
+
+@pytest.fixture
+def running_job(db):
+    job = AdminJob(job_type="signal_process", status="running", triggered_by="test",
+                   log_path="DB", started_at=datetime.utcnow())
+    db.add(job)
+    db.commit()
+    yield job
+    db.delete(job)
+    db.commit()
+
+
+def test_stream_catches_up_from_offset_then_follows_the_job(db, running_job, monkeypatch):
+    monkeypatch.setattr(job_service, "STREAM_PAGE_LINES", 2)
+    job_id = running_job.id
+    log_db.append_lines(job_id, [f"old {i}\n" for i in range(5)])
+    log_hub.hub.start(job_id)
+
+    async def consume():
+        response = job_service.stream_job_log(db, job_id, offset=1)
+        chunks = []
+
+        def produce():
+            seq = log_db.append_lines(job_id, ["new 5\n", "new 6\n"])
+            log_hub.hub.publish(job_id, seq - 2, ["new 5\n", "new 6\n"])
+            log_hub.hub.finish(job_id)
+
+        async for chunk in response.body_iterator:
+            chunks.append(chunk)
+            if len(chunks) == 1:
+                # The catch-up has subscribed by now; the job writes on its own thread
+                threading.Thread(target=produce).start()
+        return chunks
+
+    events = parse_events(asyncio.run(asyncio.wait_for(consume(), 10)))
+    lines = [line for event in events if event["event"] == "message" for line in event["data"]]
+    assert lines == ["old 1", "old 2", "old 3", "old 4", "new 5", "new 6"]
+    # Each id is the offset to resume from; the stream ends with an end event
+    assert [e["id"] for e in events] == ["3", "5", "7", "7"]
+    assert events[-1]["event"] == "end"
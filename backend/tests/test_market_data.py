@@ -0,0 +1,37 @@
+import duckdb
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+from core import database
+from services import stock_service, top_picks_service
+
+
+@pytest.fixture
+def parquet(tmp_path, monkeypatch):
+    monkeypatch.setattr(database.storage, "STORAGE_BACKEND", "parquet")
+    monkeypatch.setattr(database.storage, "PARQUET_ROOT", tmp_path)
+    return tmp_path
+
+
+def test_empty_parquet_dataset_reads_as_no_data(parquet):
+    assert stock_service.get_all_symbols() == []
+    assert top_picks_service.get_top_picks() == []
+    with pytest.raises(HTTPException) as err:
+        stock_service.get_symbol_history("A.NS")
+    assert err.value.status_code == 404
+
+
+def test_parquet_dataset_serves_symbols(parquet):
+    bars = pd.DataFrame({
+        "symbol": ["B.NS", "A.NS", "A.NS"],
+        "date": pd.to_datetime(["2024-01-02", "2024-01-02", "2024-01-03"]),
+        "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 100.0,
+    })
+    with duckdb.connect() as con:
+        con.register("bars", bars)
+        database.storage.append_parquet(con, "ohlcv", "bars")
+
+    assert stock_service.get_all_symbols() == ["A.NS", "B.NS"]
+    history = stock_service.get_symbol_history("A.NS")
+    assert [row["date"] for row in history] == ["2024-01-03", "2024-01-02"]
@@ -0,0 +1,118 @@
+import json
+import textwrap
+
+import pytest
+
+from conftest import ENGINE_DIR, wait_for
+from core import jobs, log_db
+from models.admin_job import AdminJob
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch, db):
+    """Run a pipeline of stub stages; ``stubs`` maps job type -> (outcome, exit code)."""
+    monkeypatch.setattr(jobs, "PIPELINE_POLL", 0.05)
+
+    def run(stages, stubs, sleep=0.0):
+        script_map = {}
+        for stage, (outcome, code) in stubs.items():
+            path = tmp_path / f"{stage}.py"
+            path.write_text(textwrap.dedent(f"""
+                import sys, time
+                sys.path.insert(0, {str(ENGINE_DIR)!r})
+                from progress import ProgressChannel
+                print("{stage} running", flush=True)
+                time.sleep({sleep})
+                channel = ProgressChannel(1)
+                channel.record({outcome!r}, "AAA")
+                channel.close()
+                sys.exit({code})
+            """))
+            script_map[stage] = str(path)
+        monkeypatch.setattr(jobs, "SCRIPT_MAP", script_map)
+        monkeypatch.setitem(jobs.PIPELINES, "test", stages)
+
+        job = jobs.start_job(db, "test", triggered_by="tests")
+
+        def finished():
+            db.expire_all()
+            return db.get(AdminJob, job.id).status != "running" and "finished" in log_db.get_log(job.id)
+
+        assert wait_for(finished)
+        pipeline_job = db.get(AdminJob, job.id)
+        stage_jobs = {
+            row.job_type: row
+            for row in db.query(AdminJob).filter(AdminJob.triggered_by == f"pipeline:{job.id}")
+        }
+        states = {
+            stage: info["status"] for stage, info in json.loads(pipeline_job.details)["stages"].items()
+        }
+        return pipeline_job, states, stage_jobs
+
+    return run
+
+
+CHAIN = {"ohlcv_load": [], "signal_process": ["ohlcv_load"]}
+
+
+def test_pipeline_runs_each_stage_once_without_auto_chaining(pipeline, db):
+    job, states, stage_jobs = pipeline(CHAIN, {"ohlcv_load": ("success", 0), "signal_process": ("success", 0)})
+
+    assert job.status == "completed"
+    assert states == {"ohlcv_load": "completed", "signal_process": "completed"}
+    # ohlcv_load completing inside a pipeline must not also auto-start signal_process
+    signal_jobs = db.query(AdminJob).filter(
+        AdminJob.job_type == "signal_process", AdminJob.started_at >= job.started_at
+    ).all()
+    assert [row.triggered_by for row in signal_jobs] == [f"pipeline:{job.id}"]
+
+
+def test_dependents_wait_and_independent_stages_overlap(pipeline):
+    stages = {"index_ohlcv_load": [], "ohlcv_load": [], "signal_process": ["index_ohlcv_load", "ohlcv_load"]}
+    stubs = {stage: ("success", 0) for stage in stages}
+    job, states, stage_jobs = pipeline(stages, stubs, sleep=0.5)
+
+    assert job.status == "completed"
+    index, stocks, signals = (stage_jobs[s] for s in stages)
+    assert index.started_at < stocks.finished_at and stocks.started_at < index.finished_at
+    assert signals.started_at >= max(index.finished_at, stocks.finished_at)
+
+
+def test_stage_is_skipped_when_its_inputs_did_not_change(pipeline):
+    stubs = {"ohlcv_load": ("success", 0), "signal_process": ("success", 0)}
+    first, states, _ = pipeline(CHAIN, stubs)
+    assert states["signal_process"] == "completed"
+
+    stubs["ohlcv_load"] = ("uptodate", 0)
+    job, states, stage_jobs = pipeline(CHAIN, stubs)
+    assert job.status == "completed"
+    assert states == {"ohlcv_load": "completed", "signal_process": "skipped"}
+    assert "signal_process" not in stage_jobs
+    assert "signal_process skipped" in log_db.get_log(job.id)
+
+
+def test_failed_stage_cancels_its_dependents_only(pipeline):
+    stages = {"index_ohlcv_load": [], "ohlcv_load": [], "signal_process": ["ohlcv_load"]}
+    stubs = {"index_ohlcv_load": ("success", 0), "ohlcv_load": ("failed", 1), "signal_process": ("success", 0)}
+    job, states, stage_jobs = pipeline(stages, stubs)
+
+    assert job.status == "failed"
+    assert states == {"index_ohlcv_load": "completed", "ohlcv_load": "failed", "signal_process": "cancelled"}
+    assert "signal_process" not in stage_jobs
+    assert "not completed: ohlcv_load, signal_process" in log_db.get_log(job.id)
+
+
+def test_check_pipeline_rejects_cycles_and_unknown_stages():
+    jobs._check_pipeline("nightly", jobs.PIPELINES["nightly"])
+    with pytest.raises(ValueError, match="cycle"):
+        jobs._check_pipeline("loop", {"ohlcv_load": ["signal_process"], "signal_process": ["ohlcv_load"]})
+    with pytest.raises(ValueError, match="not a stage"):
+        jobs._check_pipeline("partial", {"signal_process": ["ohlcv_load"]})
+    with pytest.raises(ValueError, match="unknown job type"):
+        jobs._check_pipeline("ml", {"ml_train": []})
+
+
+def test_nightly_loaders_run_side_by_side():
+    nightly = jobs.PIPELINES["nightly"]
+    assert nightly["index_ohlcv_load"] == [] and nightly["ohlcv_load"] == []
+    assert nightly["signal_process"] == ["ohlcv_load"]